@@ -1,20 +1,20 @@
 import copy
-from datetime import datetime, timezone
 import json
-from pathlib import Path
 import time
-from typing import Any, Callable, cast, List, Optional, Tuple
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple, cast  # NOQA: F401
 
 import requests
-
 from catalogsources.adapters.base_adapter import BaseAdapter
 from catalogsources.adapters.helpers import check_rate_limit
+from catalogsources.adapters.steam_client import SteamClient, steam_ids
 from catalogsources.models import FetchedGame, FetchedPlatform
 from django.conf import settings
 from django.core.management.base import OutputWrapper
 from django.core.management.color import Style
-from finishedgames import constants
 
+from finishedgames import constants
 
 """
 References:
@@ -81,7 +81,9 @@ class SteamAdapter(BaseAdapter):
         self.stdout_style = stdout_color_style
 
         self.api_key = settings.CATALOG_SOURCES_ADAPTERS[self.SOURCE_ID][constants.ADAPTER_API_KEY]
-        self.user_id = settings.CATALOG_SOURCES_ADAPTERS[self.SOURCE_ID][constants.ADAPTER_USER_ID]
+        # Games owned by any of the configured accounts
+        self.user_ids = steam_ids()
+        self.steam_client = SteamClient(api_key=self.api_key)
 
         # Steam in theory allows 100k requests per day, which would be ~4166 per hour,
         # but internet mentions around 200 in 5-minute buckets,
@@ -154,47 +156,29 @@ class SteamAdapter(BaseAdapter):
         """
         self.offset = self.next_offset
 
-        url = "http://api.steampowered.com/IPlayerService/GetOwnedGames/v0001/?key={api_key}&steamid={steam_id}&format=json&include_appinfo=true".format(
-            api_key=self.api_key, steam_id=self.user_id
-        )
-
-        request = requests.get(url, headers={"user-agent": settings.CATALOG_SOURCES_ADAPTER_USER_AGENT})
-
-        if request.status_code == 200:
-            try:
-                response_data = request.json()
-            except json.decoder.JSONDecodeError:
-                self.stdout.write(self.stdout_style.ERROR("Unable to decode content as JSON"))
-                self.errored = True
-                return []
-        else:
+        owned_games, errors = self.steam_client.get_owned_games_of_accounts(self.user_ids)
+        for steam_id, error in errors.items():
+            self.stdout.write(self.stdout_style.ERROR("{}: {}.\nInfo: T:{}".format(steam_id, error, self.total_results)))
+        # Games of the other accounts are still fetched
+        if not owned_games:
             self.errored = True
-            self.stdout.write(
-                self.stdout_style.ERROR(
-                    "{code}: {error}.\nInfo: S:{status_code} T:{total_results}".format(
-                        code=request.status_code,
-                        error=request.text,
-                        status_code=request.status_code,
-                        total_results=self.total_results,
-                    )
-                )
-            )
             return []
 
-        if "response" not in response_data or "games" not in response_data["response"]:
-            self.stdout.write(self.stdout_style.ERROR("Unexpected response structure:\n{}".format(response_data)))
-            self.errored = True
-            return []
-
-        games = response_data["response"]["games"]
-        game_count = response_data["response"]["game_count"]
-
-        if len(games) != game_count:
-            self.stdout.write(
-                self.stdout_style.WARNING(
-                    "Game count mismatch: expected {}, got {}".format(game_count, len(games))
+        # Libraries of different accounts overlap, so each game (and its details) is only fetched once
+        games_by_app_id = {}  # type: Dict[int, Dict[str, Any]]
+        for steam_id, response_data in owned_games.items():
+            if len(response_data["games"]) != response_data["game_count"]:
+                self.stdout.write(
+                    self.stdout_style.WARNING(
+                        "Game count mismatch for {}: expected {}, got {}".format(
+                            steam_id, response_data["game_count"], len(response_data["games"])
+                        )
+                    )
                 )
-            )
+            for game in response_data["games"]:
+                games_by_app_id.setdefault(game["appid"], game)
+        games = list(games_by_app_id.values())
+        game_count = len(games)
 
         # Steam returns all games in one call (not paginated)
         self.total_results = game_count
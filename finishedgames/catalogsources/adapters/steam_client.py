@@ -0,0 +1,183 @@
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from time import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple, cast
+
+import requests
+from django.conf import settings
+
+from finishedgames import constants
+
+"""
+Shared client for the Steam Web API calls made by both the `SteamAdapter` and the `import_steam_game_times` command.
+
+References:
+- https://developer.valvesoftware.com/wiki/Steam_Web_API#GetOwnedGames_.28v0001.29
+"""
+
+
+OWNED_GAMES_URL = "http://api.steampowered.com/IPlayerService/GetOwnedGames/v0001/"
+
+# If we change the request parameters or the cached structure
+OWNED_GAMES_CACHE_FOLDER_NAME = "cache_steam_owned_games_v1"
+CACHE_FETCHED_TS_KEY = "fetched_timestamp"
+CACHE_ETAG_KEY = "etag"
+CACHE_LAST_MODIFIED_KEY = "last_modified"
+CACHE_DATA_KEY = "data"
+
+REQUEST_TIMEOUT_SECONDS = 30
+
+SOURCE_ID = "steam"
+
+
+def steam_accounts() -> Dict[int, str]:
+    """
+    Steam ids of the Finished Games users, keyed by user id, from the `ADAPTER_USER_IDS` of the Steam source settings.
+    """
+    user_ids = settings.CATALOG_SOURCES_ADAPTERS.get(SOURCE_ID, {}).get(constants.ADAPTER_USER_IDS, {})
+    return {int(fg_user_id): str(steam_id) for fg_user_id, steam_id in user_ids.items()}
+
+
+def steam_ids() -> List[str]:
+    """
+    All configured Steam ids: the single `ADAPTER_USER_ID` (if any) plus the ones of `ADAPTER_USER_IDS`, without
+    duplicates.
+    """
+    user_id = settings.CATALOG_SOURCES_ADAPTERS.get(SOURCE_ID, {}).get(constants.ADAPTER_USER_ID)
+    ids = [str(user_id)] if user_id else []
+    return list(dict.fromkeys(ids + list(steam_accounts().values())))
+
+
+class SteamClientError(Exception):
+    pass
+
+
+class SteamClient:
+    """
+    Fetches the owned games of a Steam user, keeping the payload on disk (one file per steam id) for
+    `settings.STEAM_OWNED_GAMES_CACHE_SECONDS`. Once expired, the next request is conditional, so if the library did
+    not change the cached payload is kept without downloading it again.
+    """
+
+    def __init__(
+        self,
+        api_key: str,
+        cache_dir: Optional[str] = None,
+        cache_seconds: Optional[int] = None,
+        time: Any = time,
+    ) -> None:
+        self.api_key = api_key
+        self.cache_dir = Path(cache_dir if cache_dir is not None else OWNED_GAMES_CACHE_FOLDER_NAME)
+        self.cache_seconds = cache_seconds if cache_seconds is not None else settings.STEAM_OWNED_GAMES_CACHE_SECONDS
+        self.time = time
+
+    def get_owned_games(self, steam_id: str) -> Dict[str, Any]:
+        """
+        Returns the `response` of GetOwnedGames, containing `game_count` and the `games` list (with app info and
+        playtimes). Raises `SteamClientError` if it cannot be fetched.
+        """
+        cached = self._cache_read(steam_id)
+        if cached is not None and self.time() - cached[CACHE_FETCHED_TS_KEY] < self.cache_seconds:
+            return cast(Dict[str, Any], cached[CACHE_DATA_KEY])
+
+        headers = {"user-agent": settings.CATALOG_SOURCES_ADAPTER_USER_AGENT}
+        if cached is not None:
+            if cached.get(CACHE_ETAG_KEY):
+                headers["If-None-Match"] = cached[CACHE_ETAG_KEY]
+            if cached.get(CACHE_LAST_MODIFIED_KEY):
+                headers["If-Modified-Since"] = cached[CACHE_LAST_MODIFIED_KEY]
+
+        try:
+            request = requests.get(
+                OWNED_GAMES_URL,
+                params={"key": self.api_key, "steamid": steam_id, "format": "json", "include_appinfo": "true"},
+                headers=headers,
+                timeout=REQUEST_TIMEOUT_SECONDS,
+            )
+        except requests.RequestException as e:
+            raise SteamClientError("Request failed: {}".format(e))
+
+        if request.status_code == 304 and cached is not None:
+            cached[CACHE_FETCHED_TS_KEY] = self.time()
+            self._cache_write(steam_id, cached)
+            return cast(Dict[str, Any], cached[CACHE_DATA_KEY])
+
+        if request.status_code != 200:
+            raise SteamClientError("{code}: {error}".format(code=request.status_code, error=request.text))
+
+        try:
+            response_data = request.json()
+        except json.decoder.JSONDecodeError:
+            raise SteamClientError("Unable to decode content as JSON")
+
+        if "response" not in response_data or "games" not in response_data["response"]:
+            raise SteamClientError("Unexpected response structure:\n{}".format(response_data))
+
+        self._cache_write(
+            steam_id,
+            {
+                CACHE_FETCHED_TS_KEY: self.time(),
+                CACHE_ETAG_KEY: request.headers.get("ETag"),
+                CACHE_LAST_MODIFIED_KEY: request.headers.get("Last-Modified"),
+                CACHE_DATA_KEY: response_data["response"],
+            },
+        )
+        return cast(Dict[str, Any], response_data["response"])
+
+    def get_owned_games_of_accounts(
+        self, steam_ids: Iterable[str]
+    ) -> Tuple[Dict[str, Dict[str, Any]], Dict[str, SteamClientError]]:
+        """
+        Fetches the owned games of several Steam users concurrently (up to `settings.STEAM_MAX_CONCURRENT_REQUESTS`).
+        Returns both the owned games and the errors, keyed by steam id, so that an account failing does not prevent
+        using the rest.
+        """
+        unique_steam_ids = list(dict.fromkeys(steam_ids))
+        owned_games = {}  # type: Dict[str, Dict[str, Any]]
+        errors = {}  # type: Dict[str, SteamClientError]
+
+        def fetch(steam_id: str) -> Tuple[str, Optional[Dict[str, Any]], Optional[SteamClientError]]:
+            try:
+                return steam_id, self.get_owned_games(steam_id), None
+            except SteamClientError as e:
+                return steam_id, None, e
+
+        with ThreadPoolExecutor(max_workers=max(1, settings.STEAM_MAX_CONCURRENT_REQUESTS)) as executor:
+            for steam_id, games, error in executor.map(fetch, unique_steam_ids):
+                if error is not None:
+                    errors[steam_id] = error
+                else:
+                    owned_games[steam_id] = cast(Dict[str, Any], games)
+
+        return owned_games, errors
+
+    def _cache_file(self, steam_id: str) -> Path:
+        return self.cache_dir / "{}.json".format(steam_id)
+
+    def _cache_read(self, steam_id: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self._cache_file(steam_id), "r", encoding="utf-8") as file_handle:
+                data = json.load(file_handle)
+        except (json.decoder.JSONDecodeError, IOError):
+            # Missing or unreadable, so fetched again
+            return None
+
+        if not isinstance(data, dict) or CACHE_DATA_KEY not in data or CACHE_FETCHED_TS_KEY not in data:
+            return None
+        return data
+
+    def _cache_write(self, steam_id: str, data: Dict[str, Any]) -> None:
+        cache_file = self._cache_file(steam_id)
+        temporary_file = cache_file.with_suffix(".tmp")
+
+        # Not critical if it fails, next call will simply fetch again
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            with open(temporary_file, "w", encoding="utf-8") as file_handle:
+                json.dump(data, file_handle)
+            # So a concurrent reader never sees a partially written payload
+            os.replace(temporary_file, cache_file)
+        except IOError:
+            pass
@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class CatalogSourcesConfig(AppConfig):
     name = "catalogsources"
+
+    def ready(self) -> None:
+        import catalogsources.signals  # NOQA: F401
@@ -1,8 +1,8 @@
 from typing import Dict, List, Tuple, cast
 
-from catalogsources.helpers import clean_string_field
 from catalogsources.management.helpers import TimeProfiler, source_class_from_id, wait_if_needed
 from catalogsources.models import FetchedGame, FetchedPlatform
+from core.helpers import clean_string_field
 from django.core.management.base import BaseCommand, CommandParser
 
 
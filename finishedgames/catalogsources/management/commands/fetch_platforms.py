@@ -1,8 +1,8 @@
 from typing import Any, Dict, List
 
-from catalogsources.helpers import clean_string_field
 from catalogsources.management.helpers import TimeProfiler, source_class_from_id, wait_if_needed
 from catalogsources.models import FetchedPlatform
+from core.helpers import clean_string_field
 from django.core.management.base import BaseCommand, CommandParser
 
 
@@ -0,0 +1,255 @@
+import random
+from typing import Any, Dict, List, cast
+
+from catalogsources.adapters.giant_bomb_adapter import GiantBombAdapter
+from catalogsources.adapters.steam_adapter import SteamAdapter
+from catalogsources.management.helpers import TimeProfiler
+from catalogsources.models import FetchedGame, FetchedPlatform
+from core.helpers import sort_name
+from core.models import Game, Platform, UserGame, WishlistedUserGame
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+from django.db import router, transaction
+from django.utils import timezone
+
+USERNAME_PREFIX = "synthetic"
+
+NAME_WORDS = [
+    "Ancient",
+    "Blade",
+    "Chrono",
+    "Dark",
+    "Dragon",
+    "Empire",
+    "Fantasy",
+    "Galaxy",
+    "Heroes",
+    "Island",
+    "Kingdom",
+    "Legend",
+    "Metal",
+    "Night",
+    "Odyssey",
+    "Quest",
+    "Racing",
+    "Shadow",
+    "Space",
+    "Tactics",
+    "Ultra",
+    "Warriors",
+    "Zero",
+]
+
+
+class Command(BaseCommand):
+    help = "Generates a reproducible synthetic dataset (catalog, fetched games and user catalogs) for benchmarking"
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument("--seed", type=int, default=42, help="Random seed, same seed generates same dataset")
+        parser.add_argument("--users", type=int, default=10)
+        parser.add_argument("--platforms", type=int, default=40)
+        parser.add_argument("--games", type=int, default=50000)
+        parser.add_argument("--dlc-ratio", type=float, default=0.1, help="Ratio of games that are DLCs of another game")
+        parser.add_argument(
+            "--sources",
+            nargs="+",
+            default=[GiantBombAdapter.source_id(), SteamAdapter.source_id()],
+            help="Source ids for which to generate fetched platforms and games",
+        )
+        parser.add_argument("--fetched-games", type=int, default=10000, help="Fetched games per source")
+        parser.add_argument("--user-games", type=int, default=2000, help="Catalog games per user")
+        parser.add_argument("--wishlisted-games", type=int, default=200, help="Wishlisted games per user")
+        parser.add_argument(
+            "--last-year",
+            type=int,
+            default=2025,
+            help="Last year games can be finished, fixed so the same seed generates the same dataset any year",
+        )
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args: Any, **options: Dict) -> None:
+        self.random = random.Random(cast(int, options["seed"]))
+        self.batch_size = cast(int, options["batch_size"])
+        self.last_year = cast(int, options["last_year"])
+
+        # DLCs need at least a base game, and every game a platform
+        if not 0 <= cast(float, options["dlc_ratio"]) < 1:
+            raise CommandError("--dlc-ratio must be between 0 (included) and 1 (excluded)")
+        if cast(int, options["platforms"]) < 1:
+            raise CommandError("--platforms must be at least 1")
+
+        if get_user_model().objects.filter(username__startswith=USERNAME_PREFIX).exists():
+            raise CommandError("A synthetic dataset already exists, generate it on a clean database")
+
+        with TimeProfiler(use_performance_counter=True) as profiler:
+            # Fetched data might be in its own database
+            with transaction.atomic(), transaction.atomic(using=router.db_for_write(FetchedGame)):
+                platforms = self._create_platforms(cast(int, options["platforms"]))
+                games = self._create_games(cast(int, options["games"]), cast(float, options["dlc_ratio"]), platforms)
+                for source_id in cast(List[str], options["sources"]):
+                    self._create_fetched_data(source_id, cast(int, options["fetched_games"]), platforms, games)
+                self._create_user_catalogs(
+                    cast(int, options["users"]),
+                    cast(int, options["user_games"]),
+                    cast(int, options["wishlisted_games"]),
+                    games,
+                )
+
+        self.stdout.write(self.style.SUCCESS("> Synthetic dataset generated in {:.2f}s".format(profiler.duration)))
+
+    def _create_platforms(self, amount: int) -> List[Platform]:
+        self.stdout.write("> Creating {} Platforms".format(amount))
+
+        platforms = [
+            Platform(
+                name="{} {} Platform".format(self.random.choice(NAME_WORDS), index),
+                shortname="{}{}".format(self.random.choice(NAME_WORDS)[:3].upper(), index),
+                publish_date=self.random.randint(1977, 2025),
+            )
+            for index in range(1, amount + 1)
+        ]
+        return cast(List[Platform], Platform.objects.bulk_create(platforms, batch_size=self.batch_size))
+
+    def _create_games(self, amount: int, dlc_ratio: float, platforms: List[Platform]) -> List[Game]:
+        dlcs_amount = int(amount * dlc_ratio)
+        self.stdout.write("> Creating {} Games ({} DLCs)".format(amount, dlcs_amount))
+
+        # Base games first, as DLCs need their parent ids
+        base_games = [
+            self._build_game(index, publish_date=self.random.randint(1980, 2025))
+            for index in range(1, amount - dlcs_amount + 1)
+        ]
+        Game.objects.bulk_create(base_games, batch_size=self.batch_size)
+        games_platforms = [
+            self.random.sample(platforms, k=min(len(platforms), self.random.randint(1, 3))) for _ in base_games
+        ]
+
+        dlcs = []  # type: List[Game]
+        for index in range(amount - dlcs_amount + 1, amount + 1):
+            parent_index = self.random.randrange(len(base_games))
+            parent_game = base_games[parent_index]
+            dlcs.append(
+                self._build_game(
+                    index, publish_date=parent_game.publish_date, dlc_or_expansion=True, parent_game=parent_game
+                )
+            )
+            games_platforms.append(games_platforms[parent_index])
+        Game.objects.bulk_create(dlcs, batch_size=self.batch_size)
+
+        games = base_games + dlcs
+        relations = [
+            Game.platforms.through(game_id=game.id, platform_id=platform.id)
+            for game, game_platforms in zip(games, games_platforms)
+            for platform in game_platforms
+        ]
+        Game.platforms.through.objects.bulk_create(relations, batch_size=self.batch_size)
+
+        return games
+
+    def _build_game(self, index: int, **kwargs: Any) -> Game:
+        # Index suffix keeps names unique
+        name = "{} {} {}".format(self.random.choice(NAME_WORDS), self.random.choice(NAME_WORDS), index)
+        return Game(name=name, name_for_search=Game.clean_name_for_search(name), **kwargs)
+
+    def _create_fetched_data(self, source_id: str, amount: int, platforms: List[Platform], games: List[Game]) -> None:
+        self.stdout.write("> Creating {} Fetched Platforms and {} Fetched Games".format(len(platforms), amount))
+
+        now = timezone.now()
+        fetched_platforms = [
+            FetchedPlatform(
+                name=platform.name,
+                shortname=platform.shortname,
+                publish_date=platform.publish_date,
+                source_id=source_id,
+                source_platform_id=str(platform.id),
+                source_url="https://{}.test/platforms/{}".format(source_id, platform.id),
+                fg_platform=platform,
+                last_modified_date=now,
+            )
+            for platform in platforms
+        ]
+        FetchedPlatform.objects.bulk_create(fetched_platforms, batch_size=self.batch_size)
+
+        # Most fetched games already exist in the catalog (some imported, some not yet synced), the rest are new
+        fetched_games = []  # type: List[FetchedGame]
+        for index in range(1, amount + 1):
+            fetched_game = FetchedGame(
+                source_id=source_id,
+                source_game_id=str(index),
+                source_url="https://{}.test/games/{}".format(source_id, index),
+                publish_date=self.random.randint(1980, 2025),
+                last_modified_date=now,
+            )
+            kind = self.random.random()
+            if kind < 0.7:
+                game = self.random.choice(games)
+                fetched_game.name = game.name
+                fetched_game.fg_game = game
+                fetched_game.last_sync_date = now if kind < 0.6 else None
+            else:
+                fetched_game.name = "{} {} Fetched {}".format(
+                    self.random.choice(NAME_WORDS), self.random.choice(NAME_WORDS), index
+                )
+            fetched_games.append(fetched_game)
+        FetchedGame.objects.bulk_create(fetched_games, batch_size=self.batch_size)
+
+        relations = [
+            FetchedGame.platforms.through(fetchedgame_id=fetched_game.id, fetchedplatform_id=fetched_platform.id)
+            for fetched_game in fetched_games
+            for fetched_platform in self.random.sample(
+                fetched_platforms, k=min(len(fetched_platforms), self.random.randint(1, 2))
+            )
+        ]
+        FetchedGame.platforms.through.objects.bulk_create(relations, batch_size=self.batch_size)
+
+    def _create_user_catalogs(self, users: int, user_games: int, wishlisted_games: int, games: List[Game]) -> None:
+        self.stdout.write(
+            "> Creating {} Users with {} games and {} wishlisted".format(users, user_games, wishlisted_games)
+        )
+
+        # Only the first game platform, the query is cheaper than prefetching all the relations
+        platforms_by_game_id = {}  # type: Dict[int, Platform]
+        platforms_by_id = {platform.id: platform for platform in Platform.objects.all()}
+        for game_id, platform_id in Game.platforms.through.objects.values_list("game_id", "platform_id"):
+            platforms_by_game_id.setdefault(game_id, platforms_by_id[platform_id])
+
+        password = make_password(None)
+        user_model = get_user_model()
+        created_users = user_model.objects.bulk_create(
+            [user_model(username="{}_{}".format(USERNAME_PREFIX, index), password=password) for index in range(users)]
+        )
+        for user in created_users:
+            user_catalog = []  # type: List[UserGame]
+            for game in self.random.sample(games, k=min(len(games), user_games)):
+                platform = platforms_by_game_id[game.id]
+                status = self.random.random()
+                user_catalog.append(
+                    UserGame(
+                        user=user,
+                        game=game,
+                        platform=platform,
+                        game_sort_name=sort_name(game.name),
+                        platform_sort_name=sort_name(platform.shortname),
+                        currently_playing=status < 0.02,
+                        year_finished=self.random.randint(1990, self.last_year) if 0.02 <= status < 0.45 else None,
+                        abandoned=0.45 <= status < 0.5,
+                        no_longer_owned=self.random.random() < 0.03,
+                        minutes_played=self.random.randint(0, 6000) if status < 0.5 else 0,
+                    )
+                )
+            UserGame.objects.bulk_create(user_catalog, batch_size=self.batch_size)
+
+            wishlist = []  # type: List[WishlistedUserGame]
+            for game in self.random.sample(games, k=min(len(games), wishlisted_games)):
+                platform = platforms_by_game_id[game.id]
+                wishlist.append(
+                    WishlistedUserGame(
+                        user=user,
+                        game=game,
+                        platform=platform,
+                        game_sort_name=sort_name(game.name),
+                        platform_sort_name=sort_name(platform.shortname),
+                    )
+                )
+            WishlistedUserGame.objects.bulk_create(wishlist, batch_size=self.batch_size)
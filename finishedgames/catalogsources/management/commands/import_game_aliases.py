@@ -0,0 +1,244 @@
+from typing import Any, Dict, List, Optional, Tuple, cast
+
+from catalogsources.management.commands import import_gog_db_game_times, import_steam_game_times
+from core.helpers import alias_title, sort_name
+from core.models import Game, GameAlias
+from django.core.management.base import BaseCommand, CommandParser
+from django.db import transaction
+
+# Titles and mappings previously hardcoded at the playtime importers. Titles are the ones after cleaning them, and
+# mapped titles can be mapped again to a catalog name.
+
+# Titles to skip without any output
+GOG_IGNORED_TITLES: List[str] = [
+    "Soulstone Survivors: Prologue",
+    'RESIDENT EVIL 2 / BIOHAZARD RE:2 "1-Shot Demo"',
+    "The Planet Crafter: Prologue",
+    "12 is Better than 6",
+    "Call of Duty: Modern Warfare 2 Multiplayer",
+    "Crust Crusaders",
+    "DFHack - Dwarf Fortress Modding Engine",
+    "DOOM Eternal (BATTLEMODE - PC)",
+    "Halls of Torment Prelude",
+    "Infection Free Zone - Prologue",
+    "Metal Gear Solid Master Collection: Volume 1 - Bonus Content",
+    "Project Borealis: Prologue",
+    "Resident Evil 7 Teaser: Beginning Hour",
+    "RetroArch",
+    "Stones of Solace",
+    "Train Simulator",
+    "RESIDENT EVIL RESISTANCE",
+]
+
+# Mappings to catalog names
+GOG_CATALOG_TITLE_MAPPINGS: Dict[str, str] = {
+    "Resident Evil HD REMASTER": "Resident Evil (2002)",
+    "The Elder Scrolls III: Morrowind GOTY Edition": "The Elder Scrolls III: Morrowind",
+    "Immortals Fenyx Rising": "Immortals: Fenyx Rising",
+    "Need for Speed Hot Pursuit Remastered": "Need for Speed: Hot Pursuit Remastered",
+    "Ghost Recon Breakpoint": "Tom Clancy's Ghost Recon Breakpoint",
+    "Heroes of Might & Magic: Olden Era": "Heroes of Might and Magic: Olden Era",
+    "Resident Evil 7: Biohazard": "Resident Evil 7 biohazard",
+    "Vampire Crawlers: The Turbo Wildcard from Vampire Survivors": "Vampire Crawlers",
+}
+
+# Mappings applied first, an empty value means ignoring the title
+GOG_CLEANED_TITLE_MAPPINGS: Dict[str, str] = {
+    "RUINER": "Ruiner",
+    "1701 A.D.: Gold Edition": "1701 A.D.",
+    "20 Minutes Till Dawn": "20 Minutes Until Dawn",
+    "ADOM: Ancient Domains of Mystery": "Ancient Domains of Mystery",
+    "Age of Empires III: Complete Collection": "Age of Empires III",
+    "Alien Shooter 2: Reloaded": "Alien Shooter 2",
+    "Alien Shooter: Revisited": "Alien Shooter",
+    "Aliens Versus Predator Classic 2000": "Aliens Versus Predator",
+    "Ark: Survival Evolved": "ARK: Survival Evolved",
+    "Ashes of the Singularity: Escalation": "Ashes of the Singularity",
+    "Assassin's Creed: Director's Cut": "Assassin's Creed",
+    "Assassin's Creed: Odyssey": "Assassin's Creed Odyssey",
+    "Assassin’s Creed III Remastered": "Assassin's Creed III",
+    "Bad Rats": "Bad Rats: the Rats' Revenge",
+    "Batman: Arkham Asylum - Game of the Year Edition": "Batman: Arkham Asylum",
+    "Batman: Arkham City - Game of the Year Edition": "Batman: Arkham City",
+    "Battlefield 2142 Deluxe Edition": "Battlefield 2142",
+    "Battlefleet Gothic: Armada 2": "Battlefleet Gothic: Armada II",
+    "Battletoads": "Battletoads (2019)",
+    "BioShock Remastered": "BioShock",
+    "Bioshock Infinite": "BioShock Infinite",
+    "Bit.Trip Runner": "Bit.Trip RUNNER",
+    "Ghost Recon Wildlands": "Tom Clancy's Ghost Recon: Wildlands",
+    "Blood Bowl: Dark Elves Edition": "Blood Bowl: Legendary Edition",
+    "BloodRealm: Battlegrounds": "",
+    "Brigador: Up-Armored Edition": "Brigador",
+    "Burnout Paradise: The Ultimate Box": "Burnout Paradise",
+    "CYGNI - All Guns Blazing": "Cygni: All Guns Blazing",
+    "Carmageddon Max Pack": "Carmageddon",
+    "Castle of Illusion Starring Mickey Mouse": "Disney Castle of Illusion Starring Mickey Mouse",
+    "Castlevania: Lords of Shadow - Mirror of Fate HD": "Castlevania: Lords of Shadow - Mirror of Fate",
+    "Chantelise - A Tale of Two Sisters": "Chantelise",
+    "Colin McRae: Dirt 2": "DiRT 2",
+    "Command & Conquer Generals Zero Hour": "Command & Conquer: Generals - Zero Hour",
+    "Command & Conquer Remastered Collection": "Command & Conquer: Remastered Collection",
+    "Command & Conquer and The Covert Operations": "Command & Conquer: The Covert Operations",
+    "Crysis 2 Remastered": "Crysis 2",
+    "Crysis 3 Remastered": "Crysis 3",
+    "Crysis Remastered": "Crysis",
+    "Cursed Castilla EX": "Maldita Castilla",
+    "DEFCON": "DEFCON: Everybody Dies",
+    "Dark Messiah of Might and Magic": "Dark Messiah of Might & Magic",
+    "Dead Island: Riptide - Definitive Edition": "Dead Island Riptide",
+    "Dead Space (2008)": "Dead Space",
+    "Deus Ex: Human Revolution - Director's Cut": "Deus Ex: Human Revolution Director's Cut",
+    "DiRT 3 Complete Edition": "DiRT 3",
+    "Diablo + Hellfire": "Diablo",
+    "DmC: Devil May Cry": "DmC Devil May Cry",
+    "Dragon Age: Origins - Ultimate Edition": "Dragon Age: Origins",
+    "Elite Dangerous": "Elite: Dangerous",
+    "Epistory - Typing Chronicles": "Epistory: Typing Chronicles",
+    "Fallout Classic": "Fallout",
+    "Far Cry Primal": "Far Cry: Primal",
+    "Gauntlet: Slayer Edition": "Gauntlet (2014)",
+    "Grand Theft Auto III - The Definitive Edition": "Grand Theft Auto III",
+    "Grand Theft Auto V Enhanced": "Grand Theft Auto V",
+    "Grand Theft Auto: San Andreas - The Definitive Edition": "Grand Theft Auto: San Andreas",
+    "Grand Theft Auto: Vice City - The Definitive Edition": "Grand Theft Auto: Vice City",
+    "Half-Life: Source": "Half-Life",
+    "Heart&Slash": "Heart & Slash",
+    "Helldivers 2": "Helldivers II",
+    "Horizon Zero Dawn Complete Edition": "Horizon Zero Dawn",
+    "Kingdom: Classic": "Kingdom Classic",
+    "Krater: Shadows over Solside": "Krater",
+    "LEGO Builder's Journey": "LEGO Builder’s Journey",
+    "Locomotion, Chris Sawyer's": "Chris Sawyer's Locomotion",
+    "METAL GEAR SOLID 2: Sons of Liberty - Master Collection Version": "Metal Gear Solid 2: Substance",
+    "METAL GEAR SOLID: MASTER COLLECTION Vol.1 METAL GEAR SOLID 3: Snake Eater": "Metal Gear Solid 3: Snake Eater",
+    "Madballs in Babo: Invasion": "Madballs in... Babo: Invasion",
+    "Magic: Legends": "Magic Legends",
+    "Mass Effect Legendary Edition": "Mass Effect: Legendary Edition",
+    "Metal Gear Solid Master Collection: Volume 1": "Metal Gear Solid: Master Collection Vol. 1",
+    "Metro Exodus Enhanced Edition": "Metro Exodus",
+    "Minecraft: Windows 10 Edition": "Minecraft",
+    "Never Alone: Kisima Ingitchuna": "Never Alone",
+    "Oddworld: Stranger's Wrath HD": "Oddworld: Stranger's Wrath",
+    "OpenTTD": "Open Transport Tycoon Deluxe",
+    "PAC-MAN Championship Edition DX+": "Pac-Man Championship Edition DX",
+    "Painkiller: Black Edition": "Painkiller",
+    "Peggle Deluxe": "Peggle (2007)",
+    "Planescape: Torment - Enhanced Edition": "Planescape: Torment: Enhanced Edition",
+    "Plants vs. Zombies: Game of the Year": "Plants vs. Zombies",
+    "Portal with RTX": "Portal RTX",
+    "Quake: Mission Pack 1 - Scourge of Armagon": "Quake Mission Pack 1: Scourge of Armagon",
+    "Quake: Mission Pack 2 - Dissolution of Eternity": "Quake Mission Pack 2: Dissolution of Eternity",
+    "RESIDENT EVIL 2 / BIOHAZARD RE:2": "Resident Evil 2 (2019)",
+    "Red Dead Redemption 2": "Red Dead Redemption II",
+    "Red Faction: Guerrilla - Steam Edition": "Red Faction: Guerrilla",
+    "Red Faction: Guerrilla Re-Mars-tered": "Red Faction: Guerrilla",
+    "Resident Evil: Revelations HD": "Resident Evil: Revelations",
+    "Retro City Rampage DX": "Retro City Rampage",
+    "Rise of the Tomb Raider: 20 Year Celebration": "Rise of the Tomb Raider",
+    "STAR WARS Battlefront II: Celebration Edition": "Star Wars Battlefront II",
+    "STAR WARS: TIE Fighter Collector's CD (1995)": "Star Wars: TIE Fighter",
+    "Sacred Gold": "Sacred",
+    "Scourge Outbreak": "Scourge: Outbreak",
+    "Serious Sam HD: The First Encounter": "Serious Sam: The First Encounter",
+    "Serious Sam HD: The Second Encounter": "Serious Sam: The Second Encounter",
+    "Shadow of the Tomb Raider: Definitive Edition": "Shadow of the Tomb Raider",
+    "Sid Meier's Alpha Centauri Planetary Pack": "Sid Meier's Alpha Centauri",
+    "Sid Meier's Civilization III: Complete": "Sid Meier's Civilization III",
+    "SimCity 2000 Special Edition": "SimCity 2000",
+    "SimCity: Complete Edition": "SimCity",
+    "Space Hulk: Ascension": "Space Hulk Ascension",
+    "Space Hulk: Deathwing - Enhanced Edition": "Space Hulk: Deathwing",
+    "Star Wars: Empire at War - Gold Pack": "Star Wars: Empire at War",
+    "Starlink: Battler For Atlas": "Starlink: Battle for Atlas",
+    "Strider": "Strider (2014)",
+    "Super Bit Blaster XL": "Bit Blaster XL",
+    "Talisman: Digital Edition": "Talisman Digital Edition",
+    "Talisman: Prologue": "Talisman Prologue",
+    "Teleglitch: Die More Edition": "Teleglitch",
+    "The Elder Scrolls V: Skyrim - Special Edition": "The Elder Scrolls V: Skyrim",
+    "The Lord of The Rings Return to Moria": "The Lord of the Rings: Return to Moria",
+    "The Scourge Project: Episodes 1 and 2": "The Scourge Project",
+    "The Secret of Monkey Island: Special Edition": "The Secret of Monkey Island",
+    "The Textorcist": "The Textorcist: The Story of Ray Bibbia",
+    "The Witcher 2: Assassins of Kings Enhanced Edition": "The Witcher 2: Assassins of Kings",
+    "The Witcher 3: Wild Hunt - Game of the Year Edition": "The Witcher 3: Wild Hunt",
+    "Ticket to Ride: Classic Edition": "Ticket to Ride",
+    "Titan Quest Anniversary Edition": "Titan Quest: Anniversary Edition",
+    "Trials 2: Second Edition": "Trials 2 Second Edition",
+    "Ultima 8 Gold Edition": "Ultima VIII: Pagan",
+    "Unreal Gold": "Unreal",
+    "Unreal Tournament III: Black Edition": "Unreal Tournament 3",
+    "Uplink": "Uplink: Hacker Elite",
+    "Warhammer 40,000: Dawn of War - Game of the Year Edition": "Warhammer 40,000: Dawn of War",
+    "Warhammer 40,000: Dawn of War II - Chaos Rising": "Warhammer 40,000: Dawn of War II: Chaos Rising",
+    "Warhammer 40,000: Deathwatch - Enhanced Edition": "Warhammer 40,000: Deathwatch - Tyranid Invasion",
+    "Warhammer 40,000: Inquisitor - Martyr": "Warhammer 40,000: Inquisitor Martyr",
+    "Warhammer: The Horus Heresy - Legions": "The Horus Heresy: Legions",
+    "Wasteland 2 Director's Cut": "Wasteland 2",
+    "World of Tanks: Blitz": "World of Tanks Blitz",
+}
+
+STEAM_IGNORED_TITLES: List[str] = [
+    "Call of Duty: Modern Warfare 2 (2009) - Multiplayer",
+    "Left 4 Dead 2 Demo",
+    "METAL GEAR SOLID: MASTER COLLECTION Vol.1 BONUS CONTENT",
+    "Manual Samuel - Last Tuesday Edition",
+    "Sentinels of the Multiverse",
+]
+
+SEED_ALIASES = {
+    import_gog_db_game_times.SOURCE_ID: (GOG_IGNORED_TITLES, GOG_CATALOG_TITLE_MAPPINGS, GOG_CLEANED_TITLE_MAPPINGS),
+    import_steam_game_times.SOURCE_ID: (STEAM_IGNORED_TITLES, {}, {}),
+}  # type: Dict[str, Tuple[List[str], Dict[str, str], Dict[str, str]]]
+
+
+class Command(BaseCommand):
+    help = "Creates or updates the game aliases of the playtime importers from their former hardcoded mappings"
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument("--source", type=str, choices=list(SEED_ALIASES.keys()), default=None)
+
+    def handle(self, *args: Any, **options: Dict) -> None:
+        source = cast(Optional[str], options["source"])
+        source_ids = [source] if source else list(SEED_ALIASES.keys())
+        # Mapped names are matched case-insensitively, as importers did
+        game_ids_by_name = {
+            sort_name(name): game_id for game_id, name in Game.objects.order_by("-id").values_list("id", "name")
+        }  # type: Dict[str, int]
+
+        # By source and normalized title, as some titles only differ by case, the last one wins
+        aliases = {}  # type: Dict[Tuple[str, str], GameAlias]
+        for source_id in source_ids:
+            for title, game_name in self._seed_aliases(*SEED_ALIASES[source_id]):
+                game_id = game_ids_by_name.get(sort_name(game_name)) if game_name is not None else None
+                if game_name is not None and game_id is None:
+                    self.stdout.write(self.style.WARNING(f"{source_id} : {title} -> {game_name} : game not found"))
+                    continue
+                aliases[(source_id, alias_title(title))] = GameAlias(
+                    source_id=source_id, title=alias_title(title), game_id=game_id, ignored=game_id is None
+                )
+
+        with transaction.atomic():
+            GameAlias.objects.bulk_create(
+                list(aliases.values()),
+                update_conflicts=True,
+                unique_fields=["source_id", "title"],
+                update_fields=["game", "ignored"],
+            )
+
+        self.stdout.write(self.style.SUCCESS(f"{len(aliases)} aliases created or updated"))
+
+    @staticmethod
+    def _seed_aliases(
+        ignored_titles: List[str], catalog_title_mappings: Dict[str, str], cleaned_title_mappings: Dict[str, str]
+    ) -> List[Tuple[str, Optional[str]]]:
+        """(title, game name or `None` if ignored) pairs, following the mappings as the importers did."""
+        aliases = [(title, None) for title in ignored_titles]  # type: List[Tuple[str, Optional[str]]]
+        for title, mapped_title in cleaned_title_mappings.items():
+            game_name = catalog_title_mappings.get(mapped_title, mapped_title)
+            aliases.append((title, game_name or None))
+        for title, game_name in catalog_title_mappings.items():
+            if title not in cleaned_title_mappings:
+                aliases.append((title, game_name))
+        return aliases
@@ -1,44 +1,80 @@
 from dataclasses import dataclass
-import json
-from typing import Any, cast, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Set, Tuple, cast  # NOQA: F401
 
-import requests
-
-from core.models import Game, UserGame
+from catalogsources.adapters.steam_client import SteamClient, SteamClientError, steam_accounts
 from catalogsources.models import FetchedGame
-from catalogsources.helpers import clean_string_field
+from catalogsources.playtimes import GameAliasResolver, PlatformGameMatcher, bulk_update_minutes_played
+from core.helpers import clean_string_field
+from core.models import Game, UserGame
+from core.title_index import format_matches
 from django.conf import settings
-from django.core.management.base import BaseCommand, CommandParser
-from finishedgames import constants
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+from django.db import transaction
+from django.db.models import F
 
+from finishedgames import constants
 
 # TODO: This should also be a parameter
 PLATFORM_PC = 3
 
+# Also the one of its `GameAlias` entries
 SOURCE_ID = "steam"
 
-# List of game titles to skip without any output
-IGNORED_TITLES: List[str] = [
-    "Call of Duty: Modern Warfare 2 (2009) - Multiplayer",
-    "Left 4 Dead 2 Demo",
-    "METAL GEAR SOLID: MASTER COLLECTION Vol.1 BONUS CONTENT",
-    "Manual Samuel - Last Tuesday Edition",
-    "Sentinels of the Multiverse",
-]
-
-# Mappings to apply before cleaning the title, when searching in the catalog/DB
-CATALOG_TITLE_MAPPINGS: Dict[str, str] = {
-}
-
-# Mappings to apply after cleaning the title
-CLEANED_TITLE_MAPPINGS: Dict[str, str] = {
-}
 
 @dataclass
 class GameTimeData:
     title: str
     platform_id: int
     minutes_played: int
+    app_id: Optional[int] = None
+
+
+class SteamGameMatcher:
+    """
+    Matches game times against the catalog through the game aliases and the fetched games of their app ids, loaded
+    once for all of them.
+    """
+
+    def __init__(self, game_times: List[GameTimeData]) -> None:
+        self.aliases = GameAliasResolver(SOURCE_ID)
+
+        # Steam has sometimes confusing names, so unless there is an alias we always match through FetchedGame by app
+        # id, e.g. Resident Evil 4 is the new remake in steam, but might not be the case in the main Game catalog
+        app_ids = {str(data.app_id) for data in game_times if data.app_id is not None}
+        # If an app was fetched more than once, linked ones come last so they win
+        self.fg_game_ids_by_app_id = dict(
+            FetchedGame.objects.filter(source_id=SOURCE_ID, source_game_id__in=app_ids)
+            .order_by(F("fg_game_id").asc(nulls_first=True))
+            .values_list("source_game_id", "fg_game_id")
+        )  # type: Dict[str, Optional[int]]
+
+        # Fetched games are not constrained, so their linked game might be gone (as the game of an alias since loaded)
+        linked_game_ids = {game_id for game_id in self.fg_game_ids_by_app_id.values() if game_id is not None}
+        alias_game_ids = {
+            game_id for game_id in (self.aliases.game_id(data.title) for data in game_times) if game_id is not None
+        }
+        self.game_ids = set(
+            Game.objects.filter(id__in=linked_game_ids | alias_game_ids).values_list("id", flat=True)
+        )  # type: Set[int]
+
+    def is_ignored(self, data: GameTimeData) -> bool:
+        return self.aliases.is_ignored(data.title)
+
+    def find_game_id(self, data: GameTimeData) -> Tuple[Optional[int], Optional[str]]:
+        """The matched game id, or else why it was not found."""
+        game_id = self.aliases.game_id(data.title)
+        if game_id is not None:
+            if game_id not in self.game_ids:
+                return None, "Game alias exists but linked Finished Games entry not found"
+            return game_id, None
+
+        app_id = str(data.app_id)
+        if app_id not in self.fg_game_ids_by_app_id:
+            return None, f"Game title not found for platform ID {data.platform_id}"
+        game_id = self.fg_game_ids_by_app_id[app_id]
+        if game_id not in self.game_ids:
+            return None, "Fetched game exists but linked Finished Games entry not found"
+        return game_id, None
 
 
 class Command(BaseCommand):
@@ -48,8 +84,7 @@ class Command(BaseCommand):
         parser.add_argument(
             "--fg-user-id",
             type=int,
-            required=True,
-            help="Finished Games user ID",
+            help="Finished Games user ID. If not set, imports the game times of all users with a configured Steam ID",
         )
         parser.add_argument(
             "--verbose",
@@ -57,124 +92,156 @@ class Command(BaseCommand):
             default=False,
             help="Print verbose output",
         )
+        parser.add_argument(
+            "--suggest",
+            action="store_true",
+            default=False,
+            help="Suggest the most similar catalog games for the titles not found",
+        )
 
     def handle(self, *args: Any, **options: Dict) -> None:
-        steam_user_id = settings.CATALOG_SOURCES_ADAPTERS[SOURCE_ID][constants.ADAPTER_USER_ID]
-        steam_api_key = settings.CATALOG_SOURCES_ADAPTERS[SOURCE_ID][constants.ADAPTER_API_KEY]
-
-        fg_user_id = cast(int, options["fg_user_id"])
+        fg_user_id = cast(Optional[int], options["fg_user_id"])
         verbose = cast(bool, options["verbose"])
 
-        self.stdout.write(f"Going to import Steam game times for user ID {steam_user_id} into Finished Games user ID {fg_user_id}")
-
-        game_data = self._fetch_data(steam_user_id, steam_api_key)
-        for data in game_data:
-            self.process_game_time(data.title, data.platform_id, data.minutes_played, fg_user_id, verbose)
-
-    def _get_game(self, game_name: str, platform_id: int) -> Any:
-        mapped_name = CATALOG_TITLE_MAPPINGS.get(game_name, game_name)
-        return Game.objects.filter(name__iexact=mapped_name, platforms__in=[platform_id]).first()
-
-    def _get_game_by_id(self, game_id: int) -> Any:
-        return Game.objects.filter(id=game_id).first()
-
-    def _get_fetched_game(self, game_name: str) -> Any:
-        return FetchedGame.objects.filter(name__iexact=game_name, source_id=SOURCE_ID).first()
-
-    def _get_user_game(self, game_name: str, platform_id: int, fg_user_id: int) -> Any:
-        game = self._get_game(game_name, platform_id)
-        user_game = UserGame.objects.filter(user=fg_user_id, game=game, platform_id=platform_id).first()
-        return user_game
-
-    def _fetch_data(self, steam_user_id: str, steam_api_key: str) -> List[GameTimeData]:
-        url = "http://api.steampowered.com/IPlayerService/GetOwnedGames/v0001/?key={api_key}&steamid={steam_id}&format=json&include_appinfo=true".format(
-            api_key=steam_api_key, steam_id=steam_user_id
-        )
-
-        request = requests.get(url, headers={"user-agent": settings.CATALOG_SOURCES_ADAPTER_USER_AGENT})
-        if request.status_code == 200:
-            try:
-                response_data = request.json()
-            except json.decoder.JSONDecodeError:
-                self.stdout.write(self.style.ERROR("Unable to decode content as JSON"))
-                return []
-        else:
+        accounts = self.get_accounts(fg_user_id)
+        for account_fg_user_id, steam_user_id in accounts.items():
             self.stdout.write(
-                self.style.ERROR(
-                    "{code}: {error}.\n".format(
-                        code=request.status_code,
-                        error=request.text,
-                    )
-                )
+                f"Going to import Steam game times for user ID {steam_user_id} "
+                f"into Finished Games user ID {account_fg_user_id}"
             )
-            return []
 
-        if "response" not in response_data or "games" not in response_data["response"]:
-            self.stdout.write(self.style.ERROR("Unexpected response structure:\n{}".format(response_data)))
-            return []
+        game_times_by_user, errors = self.read_game_times(accounts)
+        for steam_user_id, error in errors.items():
+            self.stdout.write(self.style.ERROR("{}: {}.\n".format(steam_user_id, error)))
 
-        games = response_data["response"]["games"]
+        self.process_users_game_times(game_times_by_user, verbose, cast(bool, options["suggest"]))
 
+    @classmethod
+    def read_game_times(
+        cls, accounts: Dict[int, str]
+    ) -> Tuple[Dict[int, List[GameTimeData]], Dict[str, SteamClientError]]:
+        """
+        Fetches (concurrently) the game times of the Steam account of each Finished Games user, without touching the
+        database. Returns them by user id, plus the errors by Steam id of the accounts that could not be fetched.
+        """
+        steam_api_key = settings.CATALOG_SOURCES_ADAPTERS[SOURCE_ID][constants.ADAPTER_API_KEY]
+        owned_games, errors = SteamClient(api_key=steam_api_key).get_owned_games_of_accounts(accounts.values())
+        game_times_by_user = {
+            fg_user_id: cls._game_times(owned_games[steam_user_id])
+            for fg_user_id, steam_user_id in accounts.items()
+            if steam_user_id in owned_games
+        }
+        return game_times_by_user, errors
+
+    @staticmethod
+    def get_accounts(fg_user_id: Optional[int]) -> Dict[int, str]:
+        """The Steam id of a Finished Games user, or of all of them with one configured, by user id."""
+        accounts = steam_accounts()
+        if fg_user_id is None:
+            if not accounts:
+                raise CommandError("No Steam accounts configured, set the Steam source user IDs or use --fg-user-id")
+            return accounts
+
+        if fg_user_id in accounts:
+            return {fg_user_id: accounts[fg_user_id]}
+        # A single Steam account
+        steam_user_id = settings.CATALOG_SOURCES_ADAPTERS[SOURCE_ID].get(constants.ADAPTER_USER_ID)
+        if not steam_user_id:
+            raise CommandError("No Steam account configured for Finished Games user ID {}".format(fg_user_id))
+        return {fg_user_id: str(steam_user_id)}
+
+    @staticmethod
+    def _game_times(owned_games: Dict[str, Any]) -> List[GameTimeData]:
         result: List[GameTimeData] = []
 
-        for game in games:
+        for game in owned_games["games"]:
             name = game.get("name")
             # in minutes
             playtime_forever = game.get("playtime_forever", 0)
             if name:
-                cleaned_name = cast(str, clean_string_field(name))
-                if cleaned_name in IGNORED_TITLES:
-                    continue
-                mapped_name = CLEANED_TITLE_MAPPINGS.get(cleaned_name, cleaned_name)
                 result.append(
                     GameTimeData(
-                        title=mapped_name,
+                        title=cast(str, clean_string_field(name)),
                         platform_id=PLATFORM_PC,
                         minutes_played=playtime_forever,
+                        app_id=game.get("appid"),
                     )
                 )
 
         return sorted(result, key=lambda x: x.title)
 
-    def process_game_time(
-        self, game_name: str, platform_id: int, minutes_played: int, fg_user_id: int, verbose: bool = False
+    def process_game_times(self, game_times: List[GameTimeData], fg_user_id: int, verbose: bool = False) -> None:
+        self.process_users_game_times({fg_user_id: game_times}, verbose)
+
+    def process_users_game_times(
+        self, game_times_by_user: Dict[int, List[GameTimeData]], verbose: bool = False, suggest: bool = False
     ) -> None:
-        if minutes_played == 0 or not game_name:
-            if verbose:
-                self.stdout.write(f"{game_name} : skipped (zero playtime or empty name)")
-            return
-
-        user_game: Optional[UserGame] = None
-
-        # Steam has sometimes confusing names, so we always match through FetchedGame
-        # e.g. Resident Evil 4 is the new remake in steam, but might not be the case in the main Game catalog
-        fetched_game = self._get_fetched_game(game_name)
-        if fetched_game:
-            game = self._get_game_by_id(fetched_game.fg_game_id)
-            if game:
-                user_game = self._get_user_game(game.name, platform_id, fg_user_id)
-            else:
-                self.stdout.write(self.style.WARNING(
-                    f"{game_name} : Fetched game exists but linked Finished Games entry not found"
-                ))
-                return
-        else:
-            self.stdout.write(self.style.WARNING(f"{game_name} : Game title not found for platform ID {platform_id}"))
-            return
-
-        if user_game:
-            old_minutes = user_game.minutes_played
-
-            if user_game.minutes_played >= minutes_played:
-                if verbose:
-                    self.stdout.write(f"{game_name} : skipped, {old_minutes} > {minutes_played}")
-                return
-
-            user_game.minutes_played = minutes_played
-            user_game.save()
-            self.stdout.write(self.style.SUCCESS(f"{game_name} : updated, {old_minutes} -> {minutes_played}"))
-        else:
-            # Do not create new entries
-            self.stdout.write(self.style.WARNING(
-                f"{game_name} : UserGame entry not found for user ID {fg_user_id} and platform ID {platform_id}"
-            ))
+        """
+        Resolves the whole libraries of all users in memory after a few bulk queries (aliases, fetched games by app id,
+        their linked games and the user games), then applies all updates with a single bulk update.
+        """
+        all_game_times = [data for game_times in game_times_by_user.values() for data in game_times]
+        matcher = SteamGameMatcher(all_game_times)
+
+        user_games = {
+            (user_game.user_id, user_game.game_id, user_game.platform_id): user_game
+            for user_game in UserGame.objects.filter(
+                user_id__in=game_times_by_user.keys(),
+                game_id__in=matcher.game_ids,
+                platform_id__in={data.platform_id for data in all_game_times},
+            ).only("id", "user", "game", "platform", "minutes_played")
+        }  # type: Dict[Tuple[int, int, int], UserGame]
+
+        updated_user_games = {}  # type: Dict[int, UserGame]
+        previous_minutes = {}  # type: Dict[int, int]
+        # Only to suggest games for the titles not found
+        platform_matchers = {}  # type: Dict[int, PlatformGameMatcher]
+        for fg_user_id, game_times in game_times_by_user.items():
+            if len(game_times_by_user) > 1:
+                self.stdout.write(f"> Finished Games user ID {fg_user_id}")
+
+            for data in game_times:
+                game_name, platform_id, minutes_played = data.title, data.platform_id, data.minutes_played
+                if minutes_played == 0 or not game_name:
+                    if verbose:
+                        self.stdout.write(f"{game_name} : skipped (zero playtime or empty name)")
+                    continue
+
+                if matcher.is_ignored(data):
+                    continue
+
+                game_id, error = matcher.find_game_id(data)
+                if game_id is None:
+                    suggestions = ""
+                    if suggest:
+                        if platform_id not in platform_matchers:
+                            platform_matchers[platform_id] = PlatformGameMatcher(platform_id)
+                        suggestions = format_matches(platform_matchers[platform_id].suggest(game_name))
+                    self.stdout.write(self.style.WARNING(f"{game_name} : {error}{suggestions}"))
+                    continue
+
+                user_game = user_games.get((fg_user_id, game_id, platform_id))
+                if user_game:
+                    old_minutes = user_game.minutes_played
+
+                    if user_game.minutes_played >= minutes_played:
+                        if verbose:
+                            self.stdout.write(f"{game_name} : skipped, {old_minutes} > {minutes_played}")
+                        continue
+
+                    previous_minutes.setdefault(user_game.id, old_minutes)
+                    user_game.minutes_played = minutes_played
+                    updated_user_games[user_game.id] = user_game
+                    self.stdout.write(
+                        self.style.SUCCESS(f"{game_name} : updated, {old_minutes} -> {minutes_played}")
+                    )
+                else:
+                    # Do not create new entries
+                    self.stdout.write(
+                        self.style.WARNING(
+                            f"{game_name} : UserGame entry not found for user ID {fg_user_id} and platform ID {platform_id}"
+                        )
+                    )
+
+        with transaction.atomic():
+            bulk_update_minutes_played(list(updated_user_games.values()), previous_minutes, SOURCE_ID)
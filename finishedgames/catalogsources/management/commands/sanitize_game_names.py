@@ -1,7 +1,7 @@
 from typing import Any, Dict, List, Union
 
-from catalogsources.helpers import clean_string_field
 from catalogsources.models import FetchedGame
+from core.helpers import clean_string_field
 from core.models import Game
 from django.core.management.base import BaseCommand, CommandParser
 from django.db.utils import IntegrityError
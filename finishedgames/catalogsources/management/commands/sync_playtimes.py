@@ -0,0 +1,330 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from io import StringIO
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple, cast  # NOQA: F401
+
+from catalogsources.management.commands import import_gog_db_game_times, import_steam_game_times
+from catalogsources.playtimes import (
+    MERGE_POLICIES,
+    MERGE_POLICY_MAX,
+    GameAliasResolver,
+    PlatformGameMatcher,
+    UserGameKey,
+    bulk_create_user_games,
+    bulk_update_minutes_played,
+    merge_playtimes,
+)
+from core.management.commands import import_games_playtime
+from core.models import UserGame
+from core.playtime_history import SOURCE_FILES, SOURCE_SYNC
+from core.title_index import format_matches
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+from django.db import transaction
+
+SOURCE_STEAM = "steam"
+SOURCE_GOG = "gog"
+SOURCES = [SOURCE_STEAM, SOURCE_GOG, SOURCE_FILES]
+
+
+@dataclass
+class SourcePlaytimes:
+    """Minutes played by user game that a source reports, and the titles that it could not match."""
+
+    minutes: Dict[UserGameKey, int] = field(default_factory=dict)
+    titles: Dict[UserGameKey, str] = field(default_factory=dict)
+    unmatched: List[str] = field(default_factory=list)
+
+    def add(self, key: UserGameKey, title: str, minutes: int) -> None:
+        # Several titles might match the same user game
+        if minutes >= self.minutes.get(key, 0):
+            self.minutes[key] = minutes
+            self.titles[key] = title
+
+
+class Command(BaseCommand):
+    help = (
+        "Synchronizes the playtimes of several sources at once: reads them concurrently, merges the values of each "
+        "user game with a policy and writes all changes in a single transaction"
+    )
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "sources",
+            nargs="+",
+            choices=SOURCES,
+            help="Sources to read, in order of priority (the last one wins with the 'latest' policy)",
+        )
+        parser.add_argument(
+            "--policy",
+            choices=MERGE_POLICIES,
+            default=MERGE_POLICY_MAX,
+            help=(
+                "How to merge the playtimes of a game: 'max' keeps the highest one, 'sum' adds the ones of each "
+                "source (neither decreases the current value), and 'latest' sets the one of the last source reporting "
+                "it"
+            ),
+        )
+        parser.add_argument(
+            "--fg-user-id",
+            type=int,
+            help="Finished Games user ID. Required by gog and files, without it steam syncs all configured accounts",
+        )
+        parser.add_argument("--gog-user-id", type=int, help="GOG Galaxy user ID")
+        parser.add_argument("--title-game-piece-id", type=int, help="GOG Galaxy game piece type ID for titles")
+        parser.add_argument(
+            "--db-path",
+            type=str,
+            default=None,
+            help="GOG Galaxy database file, by default the one configured for this OS at GOG_GALAXY_DB_PATHS",
+        )
+        parser.add_argument(
+            "--snapshot",
+            action="store_true",
+            default=False,
+            help="Read from an in-memory copy of the GOG Galaxy database",
+        )
+        parser.add_argument(
+            "--files",
+            nargs="+",
+            help="A game names file and a playtimes (in hours) file, or a single CSV/TSV file, as import_games_playtime",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            default=False,
+            help="Only print the changes, without saving them",
+        )
+        parser.add_argument(
+            "--verbose",
+            action="store_true",
+            default=False,
+            help="Also list the titles that could not be matched",
+        )
+        parser.add_argument(
+            "--suggest",
+            action="store_true",
+            default=False,
+            help="With --verbose, suggest the most similar catalog games for the Steam and GOG titles not found",
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        sources = list(dict.fromkeys(cast(List[str], options["sources"])))
+        fg_user_id = cast(Optional[int], options["fg_user_id"])
+
+        # Validated (and settings read) beforehand, as readers run in other threads and must not touch the database
+        readers = {}  # type: Dict[str, Callable[[], Any]]
+        user_ids = set()  # type: Set[int]
+        if SOURCE_STEAM in sources:
+            accounts = import_steam_game_times.Command.get_accounts(fg_user_id)
+            user_ids.update(accounts.keys())
+            readers[SOURCE_STEAM] = lambda: import_steam_game_times.Command.read_game_times(accounts)
+        if SOURCE_GOG in sources:
+            gog_user_id, title_game_piece_id = options["gog_user_id"], options["title_game_piece_id"]
+            if fg_user_id is None or gog_user_id is None or title_game_piece_id is None:
+                raise CommandError("gog requires --fg-user-id, --gog-user-id and --title-game-piece-id")
+            db_path = import_gog_db_game_times.Command.get_db_path(options["db_path"])
+            user_ids.add(fg_user_id)
+            readers[SOURCE_GOG] = lambda: list(
+                import_gog_db_game_times.Command.read_game_times(
+                    db_path, str(gog_user_id), title_game_piece_id, options["snapshot"]
+                )
+            )
+        if SOURCE_FILES in sources:
+            files = cast(Optional[List[str]], options["files"])
+            if fg_user_id is None or not files or len(files) > 2:
+                raise CommandError("files requires --fg-user-id and --files with either two files or a CSV/TSV file")
+            for filename in files:
+                if not os.path.isfile(filename):
+                    raise CommandError(f"File '{filename}' not found")
+            user_ids.add(fg_user_id)
+            readers[SOURCE_FILES] = lambda: list(import_games_playtime.Command.read_files(files))
+
+        with ThreadPoolExecutor(max_workers=len(readers)) as executor:
+            futures = {source: executor.submit(reader) for source, reader in readers.items()}
+
+            # Meanwhile, the user games of all users (as values, as only the changed ones are updated)
+            user_game_ids = {}  # type: Dict[UserGameKey, int]
+            current_minutes = {}  # type: Dict[UserGameKey, int]
+            user_games = UserGame.objects.filter(user_id__in=user_ids).values_list(
+                "id", "user_id", "game_id", "platform_id", "minutes_played"
+            )
+            for user_game_id, user_id, game_id, platform_id, minutes_played in user_games.iterator():
+                user_game_ids[(user_id, game_id, platform_id)] = user_game_id
+                current_minutes[(user_id, game_id, platform_id)] = minutes_played
+
+            read_data = {source: future.result() for source, future in futures.items()}
+
+        # Unmatched titles are only listed with --verbose
+        suggest = cast(bool, options["suggest"]) and cast(bool, options["verbose"])
+        # To create the user games that only GOG reports
+        gog_matchers = {}  # type: Dict[int, PlatformGameMatcher]
+
+        playtimes = {}  # type: Dict[str, SourcePlaytimes]
+        if SOURCE_STEAM in read_data:
+            game_times_by_user, errors = read_data[SOURCE_STEAM]
+            for steam_user_id, error in errors.items():
+                self.stdout.write(self.style.ERROR(f"{SOURCE_STEAM} : {steam_user_id}: {error}"))
+            playtimes[SOURCE_STEAM] = self._match_steam_game_times(game_times_by_user, current_minutes, suggest)
+        if SOURCE_GOG in read_data:
+            playtimes[SOURCE_GOG] = self._match_gog_game_times(
+                read_data[SOURCE_GOG], cast(int, fg_user_id), gog_matchers, suggest
+            )
+        if SOURCE_FILES in read_data:
+            playtimes[SOURCE_FILES] = self._match_files_playtimes(
+                read_data[SOURCE_FILES], cast(int, fg_user_id), user_game_ids
+            )
+
+        changes = merge_playtimes(
+            current_minutes,
+            [playtimes[source].minutes for source in sources],
+            cast(str, options["policy"]),
+        )
+
+        self._write_report(sources, playtimes, current_minutes, changes, cast(bool, options["verbose"]))
+
+        # Grouped by the playtime history source of each change: the first source reporting the new value, if any
+        updated_user_games = {}  # type: Dict[str, List[UserGame]]
+        created_user_games = {}  # type: Dict[str, List[UserGame]]
+        for key, minutes_played in changes.items():
+            source = next(
+                (source for source in sources if playtimes[source].minutes.get(key) == minutes_played), SOURCE_SYNC
+            )
+            if key in user_game_ids:
+                updated_user_games.setdefault(source, []).append(
+                    UserGame(id=user_game_ids[key], user_id=key[0], minutes_played=minutes_played)
+                )
+            else:
+                created_user_games.setdefault(source, []).append(
+                    gog_matchers[key[2]].build_user_game(key[0], key[1], minutes_played)
+                )
+
+        if not options["dry_run"]:
+            previous_minutes = {user_game_ids[key]: current_minutes[key] for key in changes if key in user_game_ids}
+            with transaction.atomic():
+                for source, user_games in updated_user_games.items():
+                    bulk_update_minutes_played(user_games, previous_minutes, source)
+                for source, user_games in created_user_games.items():
+                    bulk_create_user_games(user_games, source)
+
+    @staticmethod
+    def _match_steam_game_times(
+        game_times_by_user: Dict[int, List[import_steam_game_times.GameTimeData]],
+        current_minutes: Dict[UserGameKey, int],
+        suggest: bool = False,
+    ) -> SourcePlaytimes:
+        playtimes = SourcePlaytimes()
+        matcher = import_steam_game_times.SteamGameMatcher(
+            [data for game_times in game_times_by_user.values() for data in game_times]
+        )
+        platform_matchers = {}  # type: Dict[int, PlatformGameMatcher]
+
+        for fg_user_id, game_times in game_times_by_user.items():
+            for data in game_times:
+                if data.minutes_played == 0 or not data.title or matcher.is_ignored(data):
+                    continue
+                game_id, error = matcher.find_game_id(data)
+                if game_id is None:
+                    suggestions = ""
+                    if suggest:
+                        if data.platform_id not in platform_matchers:
+                            platform_matchers[data.platform_id] = PlatformGameMatcher(data.platform_id)
+                        suggestions = format_matches(platform_matchers[data.platform_id].suggest(data.title))
+                    playtimes.unmatched.append(f"{data.title} : {error}{suggestions}")
+                    continue
+                key = (fg_user_id, game_id, data.platform_id)
+                # Steam does not create user games
+                if key not in current_minutes:
+                    playtimes.unmatched.append(
+                        f"{data.title} : UserGame entry not found for user ID {fg_user_id} and platform ID "
+                        f"{data.platform_id}"
+                    )
+                    continue
+                playtimes.add(key, data.title, data.minutes_played)
+
+        return playtimes
+
+    @staticmethod
+    def _match_gog_game_times(
+        game_times: List[import_gog_db_game_times.GameTimeData],
+        fg_user_id: int,
+        matchers: Dict[int, PlatformGameMatcher],
+        suggest: bool = False,
+    ) -> SourcePlaytimes:
+        playtimes = SourcePlaytimes()
+        aliases = GameAliasResolver(import_gog_db_game_times.SOURCE_ID)
+
+        for data in game_times:
+            if data.platform_id not in matchers:
+                matchers[data.platform_id] = PlatformGameMatcher(data.platform_id, aliases)
+            matcher = matchers[data.platform_id]
+            if data.minutes_played == 0 or not data.title or matcher.is_ignored(data.title):
+                continue
+            game_id = matcher.find_game_id(data.title)
+            if game_id is None:
+                suggestions = format_matches(matcher.suggest(data.title)) if suggest else ""
+                playtimes.unmatched.append(
+                    f"{data.title} : Game title not found for platform ID {data.platform_id}{suggestions}"
+                )
+                continue
+            playtimes.add((fg_user_id, game_id, data.platform_id), data.title, data.minutes_played)
+
+        return playtimes
+
+    @staticmethod
+    def _match_files_playtimes(
+        rows: List[Tuple[str, str, Optional[str]]], fg_user_id: int, user_game_ids: Dict[UserGameKey, int]
+    ) -> SourcePlaytimes:
+        playtimes = SourcePlaytimes()
+        # Reused as is, collecting the rows it could not match
+        output = StringIO()
+        files_command = import_games_playtime.Command(stdout=output)
+
+        resolved_playtimes = files_command.resolve_playtimes(
+            iter(rows), files_command.load_user_games_index(fg_user_id)
+        )
+        keys_by_id = {user_game_id: key for key, user_game_id in user_game_ids.items()}
+        for user_game_id, (name, minutes, _) in resolved_playtimes.items():
+            playtimes.add(keys_by_id[user_game_id], name, minutes)
+
+        playtimes.unmatched = output.getvalue().splitlines()
+        return playtimes
+
+    def _write_report(
+        self,
+        sources: List[str],
+        playtimes: Dict[str, SourcePlaytimes],
+        current_minutes: Dict[UserGameKey, int],
+        changes: Dict[UserGameKey, int],
+        verbose: bool,
+    ) -> None:
+        def title(key: UserGameKey) -> str:
+            return next(playtimes[source].titles[key] for source in sources if key in playtimes[source].titles)
+
+        user_ids = {key[0] for key in changes}
+        for key in sorted(changes, key=lambda key: (key[0], title(key).lower())):
+            source_minutes = ", ".join(
+                f"{source}: {playtimes[source].minutes[key]}" for source in sources if key in playtimes[source].minutes
+            )
+            user_fragment = f"user ID {key[0]} : " if len(user_ids) > 1 else ""
+            if key in current_minutes:
+                change = f"updated, {current_minutes[key]} -> {changes[key]} minutes"
+            else:
+                change = f"created, {changes[key]} minutes"
+            self.stdout.write(self.style.SUCCESS(f"{user_fragment}{title(key)} : {change} ({source_minutes})"))
+
+        if verbose:
+            for source in sources:
+                for line in playtimes[source].unmatched:
+                    self.stdout.write(self.style.WARNING(f"{source} : {line}"))
+
+        created = len([key for key in changes if key not in current_minutes])
+        unmatched = sum(len(playtimes[source].unmatched) for source in sources)
+        self.stdout.write(
+            "> {updated} updated, {created} created, {unmatched} not matched{hint}".format(
+                updated=len(changes) - created,
+                created=created,
+                unmatched=unmatched,
+                hint=" (use --verbose to list them)" if unmatched and not verbose else "",
+            )
+        )
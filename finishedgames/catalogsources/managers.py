@@ -1,11 +1,13 @@
 import re
 from typing import List, Optional, Tuple, cast
 
-from catalogsources.helpers import clean_string_field
 from catalogsources.models import FetchedGame, FetchedPlatform
 from core.constants import UNKNOWN_PUBLISH_DATE
+from core.helpers import clean_string_field
 from core.models import Game, Platform
+from core.title_index import TitleIndex, catalog_title_index, format_matches
 from django.conf import settings
+from django.db import router, transaction
 
 from finishedgames import constants
 
@@ -77,22 +79,26 @@ class ImportManager:
         if source_display_name and source_url:
             game.upsert_url(display_name=source_display_name, url=source_url)
 
-        try:
-            game.save()
-        except Exception as error:
-            raise GameImportSaveError(str(error))
-
-        # many to many need an id to be set, so platforms added after initial save
-        if include_all_fields or "platforms" in cast(List[str], update_fields_filter):
+        # Fetched games might live in another database (see `CatalogSourcesRouter`) and there are no cross-database
+        # transactions, so the game is committed before linking it: a failure leaves an unlinked game, never a link
+        # to a missing one
+        with transaction.atomic(using=router.db_for_write(Game)):
             try:
-                platforms = Platform.objects.filter(id__in=platforms)
-                # Add new platforms if proceed, not removing existing ones (and if already added, nothing happens).
-                # Also, because one catalog source might only include a subset of the platforms for a game.
-                game.platforms.add(*platforms)
                 game.save()
             except Exception as error:
                 raise GameImportSaveError(str(error))
 
+            # many to many need an id to be set, so platforms added after initial save
+            if include_all_fields or "platforms" in cast(List[str], update_fields_filter):
+                try:
+                    platforms = Platform.objects.filter(id__in=platforms)
+                    # Add new platforms if proceed, not removing existing ones (and if already added, nothing happens).
+                    # Also, because one catalog source might only include a subset of the platforms for a game.
+                    game.platforms.add(*platforms)
+                    game.save()
+                except Exception as error:
+                    raise GameImportSaveError(str(error))
+
         # Update always linked game
         fetched_game = FetchedGame.objects.filter(id=fetched_game_id).get()
         fetched_game.fg_game_id = game.id
@@ -123,10 +129,12 @@ class ImportManager:
         if include_all_fields or "publish_date" in cast(List[str], update_fields_filter):
             platform.publish_date = publish_date_string
 
-        try:
-            platform.save()
-        except Exception as error:
-            raise PlatformImportSaveError(str(error))
+        # Same as with games, committed before linking it as fetched platforms might live in another database
+        with transaction.atomic(using=router.db_for_write(Platform)):
+            try:
+                platform.save()
+            except Exception as error:
+                raise PlatformImportSaveError(str(error))
 
         # Update always linked platform
         fetched_platform = FetchedPlatform.objects.filter(id=fetched_platform_id).get()
@@ -272,6 +280,14 @@ class ImportManager:
             for key in settings.CATALOG_SOURCES_ADAPTERS.keys()
         }
         warnings: List[str] = []
+        title_index: Optional[TitleIndex] = None
+
+        def suggestions(name: str) -> str:
+            # Built (or checked) once, and only if some game has no match
+            nonlocal title_index
+            if title_index is None:
+                title_index = catalog_title_index()
+            return format_matches(title_index.search(name))
 
         for fetched_game_id in fetched_game_ids:
             fetched_game = FetchedGame.objects.filter(id=fetched_game_id).get()
@@ -301,9 +317,10 @@ class ImportManager:
                 existing_game_id = existing_game.id
             except Game.DoesNotExist:
                 if not fallback_to_name_match:
-                    warnings.append("No exact match found for '{}' ({})".format(
+                    warnings.append("No exact match found for '{}' ({}){}".format(
                         fetched_game.name,
-                        fetched_game.publish_date
+                        fetched_game.publish_date,
+                        suggestions(fetched_game.name)
                     ))
                 # Else don't add warning yet, fallback will do it if needed
                 pass
@@ -323,9 +340,10 @@ class ImportManager:
                     ).get()
                     existing_game_id = existing_game.id
                 except Game.DoesNotExist:
-                    warnings.append("No matching game name found for '{}' ({})".format(
+                    warnings.append("No matching game name found for '{}' ({}){}".format(
                         fetched_game.name,
-                        fetched_game.publish_date
+                        fetched_game.publish_date,
+                        suggestions(fetched_game.name)
                     ))
                 except Game.MultipleObjectsReturned:
                     warnings.append("Multiple matching game names found for '{}' ({})".format(
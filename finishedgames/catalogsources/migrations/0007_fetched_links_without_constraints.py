@@ -0,0 +1,39 @@
+# Generated by Django 6.0.7 on 2026-10-19 18:44
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("catalogsources", "0006_fetchedgame_cover"),
+        ("core", "0012_usergame_status_indexes"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="fetchedgame",
+            name="fg_game",
+            field=models.ForeignKey(
+                blank=True,
+                db_constraint=False,
+                default=None,
+                null=True,
+                on_delete=django.db.models.deletion.DO_NOTHING,
+                to="core.game",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="fetchedplatform",
+            name="fg_platform",
+            field=models.ForeignKey(
+                blank=True,
+                db_constraint=False,
+                default=None,
+                null=True,
+                on_delete=django.db.models.deletion.DO_NOTHING,
+                to="core.platform",
+            ),
+        ),
+    ]
@@ -16,7 +16,10 @@ class FetchedGame(BaseGame):
     source_url = models.CharField("Resource source URI", max_length=255)
     change_hash = models.CharField("Marker to detect data changes after fetch", max_length=32)
     hidden = models.BooleanField("Item hidden", default=False, db_index=True)
-    fg_game = models.ForeignKey(Game, on_delete=models.SET_NULL, null=True, default=None, blank=True)
+    # Might live in another database (see `CatalogSourcesRouter`), so no constraint and unlinked on `Game` deletion
+    fg_game = models.ForeignKey(
+        Game, on_delete=models.DO_NOTHING, db_constraint=False, null=True, default=None, blank=True
+    )
     # Override parent fields
     # Allow repeated names as for sure will be duplicates once using multiple sources
     name = models.CharField("Name", max_length=200, unique=False, db_index=True)
@@ -98,7 +101,10 @@ class FetchedPlatform(BasePlatform):
     hidden = models.BooleanField("Item hidden", default=False, db_index=True)
     # This basic mapping allows to aggregate multiple source platform ids to same destination platform
     # e.g iOS, Android & J2ME -> Mobile
-    fg_platform = models.ForeignKey(Platform, on_delete=models.SET_NULL, null=True, default=None, blank=True)
+    # Might live in another database (see `CatalogSourcesRouter`), so no constraint and unlinked on `Platform` deletion
+    fg_platform = models.ForeignKey(
+        Platform, on_delete=models.DO_NOTHING, db_constraint=False, null=True, default=None, blank=True
+    )
     # Override parent fields
     # Allow repeated names as for sure will be duplicates once using multiple sources
     name = models.CharField("Name", max_length=100, unique=False, db_index=True)
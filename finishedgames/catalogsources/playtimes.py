@@ -0,0 +1,210 @@
+from typing import Dict, List, Optional, Tuple
+
+from core.helpers import alias_title, sort_name
+from core.models import Game, GameAlias, Platform, UserGame
+from core.playtime_history import record_playtime_changes
+from core.title_index import TitleIndex, TitleMatch, catalog_title_index  # NOQA: F401
+from django.db import transaction
+from django.utils import timezone
+
+# How `merge_playtimes` combines the minutes played reported by several sources for the same user game:
+# - The highest of them and the current value, so playtimes only increase (as each importer does on its own)
+MERGE_POLICY_MAX = "max"
+# - Their sum, for games played on more than one source (e.g. owned both on Steam and GOG). Never decreases either.
+MERGE_POLICY_SUM = "sum"
+# - The one of the last source reporting it (in order of the sources), replacing the current value as a snapshot
+MERGE_POLICY_LATEST = "latest"
+MERGE_POLICIES = [MERGE_POLICY_MAX, MERGE_POLICY_SUM, MERGE_POLICY_LATEST]
+
+# Playtime history source of the changes of reconcilers without aliases
+SOURCE_UNKNOWN = "unknown"
+
+# (user id, game id, platform id) of a user game
+UserGameKey = Tuple[int, int, int]
+
+
+class GameAliasResolver:
+    """All `GameAlias` of a source, loaded once to resolve titles in memory."""
+
+    def __init__(self, source_id: str) -> None:
+        self.source_id = source_id
+        # Title -> game id, or `None` if ignored
+        self.aliases = {
+            title: None if ignored else game_id
+            for title, game_id, ignored in GameAlias.objects.filter(source_id=source_id).values_list(
+                "title", "game_id", "ignored"
+            )
+        }  # type: Dict[str, Optional[int]]
+
+    def is_ignored(self, title: str) -> bool:
+        key = alias_title(title)
+        return key in self.aliases and self.aliases[key] is None
+
+    def game_id(self, title: str) -> Optional[int]:
+        return self.aliases.get(alias_title(title))
+
+
+class PlatformGameMatcher:
+    """
+    Matches titles of an external source against the catalog games of a platform, loaded once. Titles are first
+    resolved through the aliases of the source, if any.
+    """
+
+    def __init__(self, platform_id: int, aliases: Optional[GameAliasResolver] = None) -> None:
+        self.platform_id = platform_id
+        self.aliases = aliases
+        self.platform_sort_name = sort_name(Platform.objects.only("shortname").get(id=platform_id).shortname)
+
+        self.game_names = dict(
+            Game.objects.filter(platforms=platform_id).values_list("id", "name").iterator()
+        )  # type: Dict[int, str]
+        # By lowercased name. Descending, so if names only differ by case the oldest game wins.
+        self.game_ids_by_name = {
+            sort_name(name): game_id for game_id, name in sorted(self.game_names.items(), reverse=True)
+        }  # type: Dict[str, int]
+        # Only loaded if suggestions are requested
+        self._title_index = None  # type: Optional[TitleIndex]
+
+    def is_ignored(self, title: str) -> bool:
+        return self.aliases is not None and self.aliases.is_ignored(title)
+
+    def find_game_id(self, title: str) -> Optional[int]:
+        """The platform game of an alias of the title, or else with the same (case-insensitive) name."""
+        game_id = self.aliases.game_id(title) if self.aliases else None
+        if game_id is None:
+            return self.game_ids_by_name.get(sort_name(title))
+        return game_id if game_id in self.game_names else None
+
+    def suggest(self, title: str) -> List[TitleMatch]:
+        """The platform games most similar to a title that could not be matched, e.g. to add an alias for it."""
+        if self._title_index is None:
+            self._title_index = catalog_title_index()
+        return self._title_index.search(title, game_ids=self.game_names)
+
+    def build_user_game(self, fg_user_id: int, game_id: int, minutes_played: int) -> UserGame:
+        """A new (not saved) user game of the platform. As it will be bulk created, sort names must be set here."""
+        return UserGame(
+            user_id=fg_user_id,
+            game_id=game_id,
+            platform_id=self.platform_id,
+            minutes_played=minutes_played,
+            game_sort_name=sort_name(self.game_names[game_id]),
+            platform_sort_name=self.platform_sort_name,
+        )
+
+
+class PlaytimeReconciler(PlatformGameMatcher):
+    """
+    Matches game times of an external source against the catalog games of a platform and the user games of a user on
+    it, both loaded once, accumulating the resulting changes in memory until `apply()` writes them in bulk.
+    """
+
+    def __init__(self, fg_user_id: int, platform_id: int, aliases: Optional[GameAliasResolver] = None) -> None:
+        super().__init__(platform_id, aliases)
+        self.fg_user_id = fg_user_id
+
+        self.user_games = {
+            user_game.game_id: user_game
+            for user_game in UserGame.objects.filter(user_id=fg_user_id, platform_id=platform_id).only(
+                "id", "user", "game", "minutes_played"
+            )
+        }  # type: Dict[int, UserGame]
+        self._updated_user_games = {}  # type: Dict[int, UserGame]
+        # Minutes played as loaded, of the updated user games
+        self._previous_minutes = {}  # type: Dict[int, int]
+        self._created_user_games = []  # type: List[UserGame]
+
+    def get_user_game(self, game_id: int) -> Optional[UserGame]:
+        """The user game of the platform for a given game, including those pending to be created."""
+        return self.user_games.get(game_id)
+
+    def set_minutes_played(self, user_game: UserGame, minutes_played: int) -> None:
+        if user_game.id is not None:
+            self._previous_minutes.setdefault(user_game.id, user_game.minutes_played)
+            self._updated_user_games[user_game.id] = user_game
+        user_game.minutes_played = minutes_played
+
+    def create_user_game(self, game_id: int, minutes_played: int) -> UserGame:
+        user_game = self.build_user_game(self.fg_user_id, game_id, minutes_played)
+        self.user_games[game_id] = user_game
+        self._created_user_games.append(user_game)
+        return user_game
+
+    def apply(self) -> Tuple[int, int]:
+        """
+        Writes all changes (and their playtime history) in a single transaction, returning the number of updated and
+        created user games.
+        """
+        updated_user_games = list(self._updated_user_games.values())
+        source = self.aliases.source_id if self.aliases else SOURCE_UNKNOWN
+
+        # Without a savepoint if within a transaction, as this is all or nothing too
+        with transaction.atomic(savepoint=False):
+            bulk_update_minutes_played(updated_user_games, self._previous_minutes, source)
+            bulk_create_user_games(self._created_user_games, source)
+
+        counts = (len(updated_user_games), len(self._created_user_games))
+        self._updated_user_games = {}
+        self._previous_minutes = {}
+        self._created_user_games = []
+        return counts
+
+
+def bulk_update_minutes_played(user_games: List[UserGame], previous_minutes: Dict[int, int], source: str) -> None:
+    """
+    Updates the minutes played of the user games (which must have their user id), recording the changes from their
+    previous minutes (by user game id) in the playtime history.
+    """
+    # `auto_now` is only applied by `save()` and bulk creates
+    now = timezone.now()
+    for user_game in user_games:
+        user_game.modified_at = now
+    UserGame.objects.bulk_update(user_games, ["minutes_played", "modified_at"])
+    record_playtime_changes(
+        (
+            (user_game.user_id, user_game.id, previous_minutes[user_game.id], user_game.minutes_played)
+            for user_game in user_games
+        ),
+        source,
+        observed_at=now,
+    )
+
+
+def bulk_create_user_games(user_games: List[UserGame], source: str) -> None:
+    """Creates the user games, recording their minutes played in the playtime history."""
+    user_games = UserGame.objects.bulk_create(user_games)
+    record_playtime_changes(
+        ((user_game.user_id, user_game.id, 0, user_game.minutes_played) for user_game in user_games), source
+    )
+
+
+def merge_playtimes(
+    current_minutes: Dict[UserGameKey, int], sources_minutes: List[Dict[UserGameKey, int]], policy: str
+) -> Dict[UserGameKey, int]:
+    """
+    Merges the minutes played of the user games reported by each source (in order) with their current value, or `0` if
+    not existing yet. Returns the new minutes played only of those user games that change.
+    """
+    if policy not in MERGE_POLICIES:
+        raise ValueError("Unknown merge policy '{}'".format(policy))
+
+    merged = {}  # type: Dict[UserGameKey, int]
+    for source_minutes in sources_minutes:
+        for key, minutes in source_minutes.items():
+            if key not in merged:
+                merged[key] = minutes
+            elif policy == MERGE_POLICY_MAX:
+                merged[key] = max(merged[key], minutes)
+            elif policy == MERGE_POLICY_SUM:
+                merged[key] += minutes
+            else:
+                merged[key] = minutes
+
+    changes = {}  # type: Dict[UserGameKey, int]
+    for key, minutes in merged.items():
+        current = current_minutes.get(key, 0)
+        if policy != MERGE_POLICY_LATEST:
+            minutes = max(minutes, current)
+        if minutes != current or key not in current_minutes:
+            changes[key] = minutes
+    return changes
@@ -0,0 +1,45 @@
+from typing import Any, Optional, Type, cast
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models import Model
+
+APP_LABEL = "catalogsources"
+
+
+class CatalogSourcesRouter:
+    """
+    Places the catalog sources staging tables in the `CATALOG_SOURCES_DATABASE`, so fetching games does not compete for
+    the write lock of the database serving the website. Every other model stays in the default database.
+    """
+
+    def db_for_read(self, model: Type[Model], **hints: Any) -> Optional[str]:
+        return self._db_for_model(model, **hints)
+
+    def db_for_write(self, model: Type[Model], **hints: Any) -> Optional[str]:
+        return self._db_for_model(model, **hints)
+
+    def allow_relation(self, obj1: Model, obj2: Model, **hints: Any) -> Optional[bool]:
+        # `fg_game` & `fg_platform` cross databases, everything else keeps the default same database check
+        if APP_LABEL in (obj1._meta.app_label, obj2._meta.app_label):
+            return True
+        return None
+
+    def allow_migrate(self, db: str, app_label: str, model_name: Optional[str] = None, **hints: Any) -> Optional[bool]:
+        if app_label == APP_LABEL:
+            return bool(db == settings.CATALOG_SOURCES_DATABASE)
+        if db == settings.CATALOG_SOURCES_DATABASE and db != DEFAULT_DB_ALIAS:
+            return False
+        return None
+
+    @staticmethod
+    def _db_for_model(model: Type[Model], **hints: Any) -> Optional[str]:
+        if model._meta.app_label == APP_LABEL:
+            return cast(str, settings.CATALOG_SOURCES_DATABASE)
+
+        # Else Django would use the database of the instance, e.g. when following `fg_game` from a fetched game
+        instance = hints.get("instance")
+        if instance is not None and instance._meta.app_label == APP_LABEL:
+            return cast(str, DEFAULT_DB_ALIAS)
+
+        return None
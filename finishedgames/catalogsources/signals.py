@@ -0,0 +1,17 @@
+from typing import Any
+
+from catalogsources.models import FetchedGame, FetchedPlatform
+from core.models import Game, Platform
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+
+
+# These replace `on_delete=SET_NULL`, which only works when both tables are in the same database
+@receiver(post_delete, sender=Game)
+def unlink_fetched_games(sender: Any, instance: Game, **kwargs: Any) -> None:
+    FetchedGame.objects.filter(fg_game_id=instance.id).update(fg_game=None)
+
+
+@receiver(post_delete, sender=Platform)
+def unlink_fetched_platforms(sender: Any, instance: Platform, **kwargs: Any) -> None:
+    FetchedPlatform.objects.filter(fg_platform_id=instance.id).update(fg_platform=None)
@@ -0,0 +1,84 @@
+from io import StringIO
+
+from catalogsources.models import FetchedGame, FetchedPlatform
+from core.models import Game, Platform, UserGame, WishlistedUserGame
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+
+
+class GenerateSyntheticDatasetTests(TestCase):
+    def _generate(self, seed: int = 1, *args: str) -> None:
+        call_command(
+            "generate_synthetic_dataset",
+            "--seed={}".format(seed),
+            "--users=2",
+            "--platforms=4",
+            "--games=50",
+            "--dlc-ratio=0.2",
+            "--sources",
+            "a_source",
+            "another_source",
+            "--fetched-games=10",
+            "--user-games=20",
+            "--wishlisted-games=5",
+            *args,
+            stdout=StringIO(),
+        )
+
+    def test_generates_requested_amounts(self) -> None:
+        self._generate()
+
+        self.assertEqual(Platform.objects.count(), 4)
+        self.assertEqual(Game.objects.count(), 50)
+        self.assertEqual(Game.objects.filter(dlc_or_expansion=True, parent_game__isnull=False).count(), 10)
+        self.assertFalse(Game.objects.filter(platforms__isnull=True).exists())
+        self.assertEqual(FetchedPlatform.objects.count(), 8)
+        self.assertEqual(FetchedGame.objects.filter(source_id="a_source").count(), 10)
+        self.assertEqual(FetchedGame.objects.filter(source_id="another_source").count(), 10)
+        self.assertEqual(get_user_model().objects.count(), 2)
+        self.assertEqual(UserGame.objects.count(), 40)
+        self.assertEqual(WishlistedUserGame.objects.count(), 10)
+
+    def test_user_games_have_sort_names(self) -> None:
+        self._generate()
+
+        for user_game in UserGame.objects.select_related("game", "platform"):
+            self.assertEqual(user_game.game_sort_name, user_game.game.name.lower())
+            self.assertEqual(user_game.platform_sort_name, user_game.platform.shortname.lower())
+
+    def test_same_seed_generates_same_dataset(self) -> None:
+        self._generate(seed=7)
+        game_names = list(Game.objects.order_by("id").values_list("name", flat=True))
+
+        Game.objects.all().delete()
+        Platform.objects.all().delete()
+        FetchedGame.objects.all().delete()
+        FetchedPlatform.objects.all().delete()
+        get_user_model().objects.all().delete()
+        self._generate(seed=7)
+
+        self.assertEqual(list(Game.objects.order_by("id").values_list("name", flat=True)), game_names)
+
+    def test_refuses_to_generate_twice(self) -> None:
+        self._generate()
+
+        with self.assertRaises(CommandError):
+            self._generate()
+
+    def test_validates_dlc_ratio_and_platforms(self) -> None:
+        for arguments in (["--dlc-ratio=1"], ["--dlc-ratio=-0.1"], ["--platforms=0"]):
+            with self.subTest(arguments=arguments), self.assertRaises(CommandError):
+                self._generate(1, *arguments)
+
+        self.assertFalse(Game.objects.exists())
+
+    def test_finished_years_do_not_depend_on_the_current_date(self) -> None:
+        self._generate(1, "--last-year=2000")
+
+        years_finished = set(
+            UserGame.objects.filter(year_finished__isnull=False).values_list("year_finished", flat=True)
+        )
+        self.assertTrue(years_finished)
+        self.assertLessEqual(max(years_finished), 2000)
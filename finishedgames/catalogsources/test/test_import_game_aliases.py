@@ -0,0 +1,61 @@
+from io import StringIO
+
+from catalogsources.management.commands.import_game_aliases import GOG_CLEANED_TITLE_MAPPINGS, GOG_IGNORED_TITLES
+from catalogsources.management.commands.import_gog_db_game_times import SOURCE_ID
+from catalogsources.playtimes import GameAliasResolver
+from core.models import GameAlias
+from core.test.tests_helpers import create_game, create_platform
+from django.core.exceptions import ValidationError
+from django.core.management import call_command
+from django.test import TestCase
+
+
+class ImportGameAliasesTests(TestCase):
+    def setUp(self) -> None:
+        platform = create_platform()
+        self.game = create_game(name="resident evil (2002)", platforms=[platform])
+
+    def _import(self) -> str:
+        output = StringIO()
+        call_command("import_game_aliases", "--source={}".format(SOURCE_ID), stdout=output)
+        return output.getvalue()
+
+    def test_creates_aliases_of_existing_games_and_ignored_titles(self) -> None:
+        output = self._import()
+
+        self.assertIn("{} : RUINER -> Ruiner : game not found".format(SOURCE_ID), output)
+        aliases = GameAliasResolver(SOURCE_ID)
+        self.assertEqual(aliases.game_id("Resident Evil HD REMASTER"), self.game.id)
+        self.assertTrue(aliases.is_ignored("RetroArch"))
+        # Mapped to an empty name
+        self.assertTrue(aliases.is_ignored("BloodRealm: Battlegrounds"))
+        self.assertFalse(aliases.is_ignored("RUINER"))
+        self.assertEqual(
+            GameAlias.objects.filter(source_id=SOURCE_ID, ignored=True).count(),
+            len(GOG_IGNORED_TITLES) + list(GOG_CLEANED_TITLE_MAPPINGS.values()).count(""),
+        )
+        self.assertFalse(GameAlias.objects.exclude(source_id=SOURCE_ID).exists())
+
+    def test_updates_existing_aliases(self) -> None:
+        self._import()
+        alias = GameAlias.objects.get(source_id=SOURCE_ID, title="retroarch")
+        alias.ignored = False
+        alias.game = self.game
+        alias.save()
+        aliases_count = GameAlias.objects.count()
+
+        self._import()
+
+        alias.refresh_from_db()
+        self.assertTrue(alias.ignored)
+        self.assertIsNone(alias.game)
+        self.assertEqual(GameAlias.objects.count(), aliases_count)
+
+    def test_alias_titles_are_normalized_and_validated(self) -> None:
+        alias = GameAlias.objects.create(source_id=SOURCE_ID, title=" A Game™: ", game=self.game)
+        self.assertEqual(alias.title, "a game")
+
+        with self.assertRaises(ValidationError):
+            GameAlias(source_id=SOURCE_ID, title="a title").full_clean()
+        with self.assertRaises(ValidationError):
+            GameAlias(source_id=SOURCE_ID, title="a title", game=self.game, ignored=True).full_clean()
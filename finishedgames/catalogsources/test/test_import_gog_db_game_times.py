@@ -0,0 +1,201 @@
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+from contextlib import closing
+from io import StringIO
+
+from catalogsources.management.commands.import_gog_db_game_times import PLATFORM_PC, SOURCE_ID
+from catalogsources.management.commands.import_gog_db_game_times import Command as ImportGogDbGameTimesCommand
+from catalogsources.management.commands.import_gog_db_game_times import GameTimeData
+from core.models import GameAlias, Platform, UserGame
+from core.test.tests_helpers import create_game, create_platform, create_user
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase, override_settings
+
+GOG_USER_ID = 1234
+TITLE_GAME_PIECE_ID = 5
+
+
+class ImportGogDbGameTimesTests(TestCase):
+    def setUp(self) -> None:
+        self.platform = create_platform()
+        self.another_platform = create_platform()
+        self.game = create_game(name="A Game", platforms=[self.platform])
+        self.another_game = create_game(platforms=[self.platform])
+        self.other_platform_game = create_game(platforms=[self.another_platform])
+        self.user = create_user()
+        self.user_game = UserGame.objects.create(
+            user=self.user, game=self.another_game, platform=self.platform, minutes_played=100
+        )
+        self.output = StringIO()
+        self.command = ImportGogDbGameTimesCommand(stdout=self.output)
+
+    def _process(self, *game_times: GameTimeData) -> str:
+        self.command.process_game_times(game_times, self.user.id)
+        return self.output.getvalue()
+
+    def test_updates_and_creates_user_games_in_bulk(self) -> None:
+        # Loading the aliases, platform, games and user games, then the bulk update and create (each followed by the
+        # playtime history insert) within a transaction
+        with self.assertNumQueries(10):
+            output = self._process(
+                GameTimeData("a game", self.platform.id, 30),
+                GameTimeData(self.another_game.name, self.platform.id, 50),
+                GameTimeData(self.another_game.name, self.platform.id, 150),
+                GameTimeData(self.other_platform_game.name, self.platform.id, 10),
+                GameTimeData("a game without playtime", self.platform.id, 0),
+            )
+
+        self.assertEqual(
+            output.splitlines(),
+            [
+                "a game : created, 30 minutes",
+                "{} : updated, 100 -> 150 minutes".format(self.another_game.name),
+                "{} : Game title not found for platform ID {}".format(self.other_platform_game.name, self.platform.id),
+            ],
+        )
+        self.user_game.refresh_from_db()
+        self.assertEqual(self.user_game.minutes_played, 150)
+        created_user_game = UserGame.objects.get(user=self.user, game=self.game, platform=self.platform)
+        self.assertEqual(created_user_game.minutes_played, 30)
+        self.assertEqual(created_user_game.game_sort_name, "a game")
+        self.assertEqual(created_user_game.platform_sort_name, self.platform.shortname.lower())
+
+    def test_updates_games_created_by_a_previous_title(self) -> None:
+        output = self._process(
+            GameTimeData("A Game", self.platform.id, 30), GameTimeData("A GAME", self.platform.id, 45)
+        )
+
+        self.assertEqual(output.splitlines(), ["A Game : created, 30 minutes", "A GAME : updated, 30 -> 45 minutes"])
+        self.assertEqual(UserGame.objects.get(user=self.user, game=self.game).minutes_played, 45)
+
+    def test_resolves_aliases(self) -> None:
+        GameAlias.objects.create(source_id=SOURCE_ID, title="A Game™: GOTY Edition", game=self.game)
+        GameAlias.objects.create(source_id=SOURCE_ID, title="A demo", ignored=True)
+        GameAlias.objects.create(source_id=SOURCE_ID, title="Another platform game", game=self.other_platform_game)
+        GameAlias.objects.create(source_id="another source", title="Another demo", ignored=True)
+
+        output = self._process(
+            GameTimeData("A Game: GOTY Edition", self.platform.id, 30),
+            GameTimeData("a demo", self.platform.id, 30),
+            GameTimeData("Another platform game", self.platform.id, 30),
+            GameTimeData("Another demo", self.platform.id, 30),
+        )
+
+        self.assertEqual(
+            output.splitlines(),
+            [
+                "A Game: GOTY Edition : created, 30 minutes",
+                "Another platform game : Game title not found for platform ID {}".format(self.platform.id),
+                "Another demo : Game title not found for platform ID {}".format(self.platform.id),
+            ],
+        )
+
+    def test_suggests_similar_games_of_the_platform(self) -> None:
+        create_game(name="A Games", platforms=[self.another_platform])
+
+        self.command.process_game_times(
+            [
+                GameTimeData("A Games", self.platform.id, 30),
+                GameTimeData(self.other_platform_game.name, self.platform.id, 10),
+            ],
+            self.user.id,
+            suggest=True,
+        )
+
+        self.assertEqual(
+            self.output.getvalue().splitlines(),
+            [
+                "A Games : Game title not found for platform ID {}, did you mean: 'A Game' (0.80)?".format(
+                    self.platform.id
+                ),
+                "{} : Game title not found for platform ID {}".format(self.other_platform_game.name, self.platform.id),
+            ],
+        )
+
+
+class ImportGogDbGameTimesDatabaseTests(TestCase):
+    def setUp(self) -> None:
+        self.platform = Platform.objects.create(id=PLATFORM_PC, name="PC", shortname="PC", publish_date=1981)
+        self.game = create_game(name="A Game", platforms=[self.platform])
+        self.another_game = create_game(name="Another Game", platforms=[self.platform])
+        self.user = create_user()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.db_path = os.path.join(directory.name, "galaxy-2.0.db")
+        GameAlias.objects.create(source_id=SOURCE_ID, title="RetroArch", ignored=True)
+        self._create_gog_database()
+
+    def _create_gog_database(self) -> None:
+        with closing(sqlite3.connect(self.db_path)) as connection, connection:
+            connection.execute(
+                "CREATE TABLE GamePieces (releaseKey TEXT, gamePieceTypeId INTEGER, userId INTEGER, value TEXT)"
+            )
+            connection.execute("CREATE TABLE GameTimes (releaseKey TEXT, userId INTEGER, minutesInGame INTEGER)")
+            connection.executemany(
+                "INSERT INTO GamePieces VALUES (?, ?, ?, ?)",
+                [
+                    ("gog_1", TITLE_GAME_PIECE_ID, GOG_USER_ID, json.dumps({"title": "A Game™"})),
+                    ("gog_1", TITLE_GAME_PIECE_ID + 1, GOG_USER_ID, json.dumps({"title": "Not a title piece"})),
+                    ("gog_2", TITLE_GAME_PIECE_ID, GOG_USER_ID, json.dumps({"title": "Another Game"})),
+                    ("gog_3", TITLE_GAME_PIECE_ID, GOG_USER_ID, "not valid JSON"),
+                    ("gog_4", TITLE_GAME_PIECE_ID, GOG_USER_ID, json.dumps({"title": "RetroArch"})),
+                    ("gog_5", TITLE_GAME_PIECE_ID, GOG_USER_ID + 1, json.dumps({"title": "Another Game"})),
+                ],
+            )
+            connection.executemany(
+                "INSERT INTO GameTimes VALUES (?, ?, ?)",
+                [
+                    ("gog_1", GOG_USER_ID, 60),
+                    ("gog_2", GOG_USER_ID, 0),
+                    ("gog_3", GOG_USER_ID, 10),
+                    ("gog_4", GOG_USER_ID, 10),
+                    ("gog_5", GOG_USER_ID + 1, 10),
+                ],
+            )
+
+    def _import(self, *args: str) -> str:
+        output = StringIO()
+        call_command(
+            "import_gog_db_game_times",
+            "--gog-user-id={}".format(GOG_USER_ID),
+            "--fg-user-id={}".format(self.user.id),
+            "--title-game-piece-id={}".format(TITLE_GAME_PIECE_ID),
+            *args,
+            stdout=output,
+        )
+        return output.getvalue()
+
+    def _assert_imported(self, output: str) -> None:
+        self.assertEqual(
+            output.splitlines(),
+            ["Going to import GOG game times from {}".format(self.db_path), "A Game : created, 60 minutes"],
+        )
+        self.assertEqual(
+            list(UserGame.objects.filter(user=self.user).values_list("game_id", "platform_id", "minutes_played")),
+            [(self.game.id, PLATFORM_PC, 60)],
+        )
+
+    def test_reads_database_at_path(self) -> None:
+        self._assert_imported(self._import("--db-path={}".format(self.db_path)))
+
+    def test_reads_database_configured_for_os_from_snapshot(self) -> None:
+        with override_settings(GOG_GALAXY_DB_PATHS={sys.platform: self.db_path}):
+            self._assert_imported(self._import("--snapshot"))
+
+    def test_database_is_not_modified_nor_created(self) -> None:
+        modified_at = os.path.getmtime(self.db_path)
+        self._import("--db-path={}".format(self.db_path))
+        self.assertEqual(os.path.getmtime(self.db_path), modified_at)
+
+        with self.assertRaisesMessage(CommandError, "not found"):
+            self._import("--db-path={}".format(self.db_path + ".missing"))
+        self.assertFalse(os.path.exists(self.db_path + ".missing"))
+
+    def test_requires_database_path_for_os(self) -> None:
+        with override_settings(GOG_GALAXY_DB_PATHS={}):
+            with self.assertRaisesMessage(CommandError, "use --db-path"):
+                self._import()
@@ -0,0 +1,154 @@
+import tempfile
+from io import StringIO
+from typing import Any, Dict, Optional
+from unittest import mock
+
+from catalogsources.management.commands.import_steam_game_times import SOURCE_ID
+from catalogsources.management.commands.import_steam_game_times import Command as ImportSteamGameTimesCommand
+from catalogsources.management.commands.import_steam_game_times import GameTimeData
+from catalogsources.models import FetchedGame
+from core.models import GameAlias, UserGame
+from core.test.tests_helpers import create_game, create_platform, create_user
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase, override_settings
+
+from finishedgames import constants
+
+
+class ImportSteamGameTimesTests(TestCase):
+    def setUp(self) -> None:
+        self.platform = create_platform()
+        self.game = create_game(platforms=[self.platform])
+        self.another_game = create_game(platforms=[self.platform])
+        self.not_owned_game = create_game(platforms=[self.platform])
+        self.user = create_user()
+        self.user_game = UserGame.objects.create(
+            user=self.user, game=self.game, platform=self.platform, minutes_played=100
+        )
+        self.another_user_game = UserGame.objects.create(
+            user=self.user, game=self.another_game, platform=self.platform, minutes_played=100
+        )
+        for app_id, game in [(10, self.game), (20, self.another_game), (30, self.not_owned_game), (40, None)]:
+            self._create_fetched_game(app_id, game.id if game else None)
+        # Fetched again without being linked
+        self._create_fetched_game(10, None)
+        self.output = StringIO()
+
+    @staticmethod
+    def _create_fetched_game(app_id: int, fg_game_id: Optional[int]) -> None:
+        FetchedGame.objects.create(
+            name="Steam name {}".format(app_id),
+            publish_date=2000,
+            source_id=SOURCE_ID,
+            source_game_id=str(app_id),
+            source_url="https://store.steampowered.com/app/{}".format(app_id),
+            fg_game_id=fg_game_id,
+        )
+
+    def _process(self, *game_times: GameTimeData) -> str:
+        ImportSteamGameTimesCommand(stdout=self.output).process_game_times(list(game_times), self.user.id)
+        return self.output.getvalue()
+
+    def test_matches_by_app_id_with_bulk_queries(self) -> None:
+        # Aliases, fetched games, linked games and user games, then the bulk update and the playtime history insert
+        # within a transaction
+        with self.assertNumQueries(8):
+            output = self._process(
+                # Names don't matter
+                GameTimeData("A renamed game", self.platform.id, 150, app_id=10),
+                GameTimeData("Less played", self.platform.id, 50, app_id=20),
+                GameTimeData("Not owned", self.platform.id, 50, app_id=30),
+                GameTimeData("Not linked", self.platform.id, 50, app_id=40),
+                GameTimeData("Not fetched", self.platform.id, 50, app_id=50),
+            )
+
+        self.assertEqual(
+            output.splitlines(),
+            [
+                "A renamed game : updated, 100 -> 150",
+                "Not owned : UserGame entry not found for user ID {} and platform ID {}".format(
+                    self.user.id, self.platform.id
+                ),
+                "Not linked : Fetched game exists but linked Finished Games entry not found",
+                "Not fetched : Game title not found for platform ID {}".format(self.platform.id),
+            ],
+        )
+        self.assertEqual(
+            dict(UserGame.objects.filter(user=self.user).values_list("game_id", "minutes_played")),
+            {self.game.id: 150, self.another_game.id: 100},
+        )
+
+    def test_aliases_take_precedence(self) -> None:
+        GameAlias.objects.create(source_id=SOURCE_ID, title="Aliased", game=self.another_game)
+        GameAlias.objects.create(source_id=SOURCE_ID, title="A demo", ignored=True)
+
+        output = self._process(
+            GameTimeData("Aliased", self.platform.id, 150, app_id=10),
+            GameTimeData("A demo", self.platform.id, 150, app_id=10),
+        )
+
+        self.assertEqual(output.splitlines(), ["Aliased : updated, 100 -> 150"])
+        self.assertEqual(
+            dict(UserGame.objects.filter(user=self.user).values_list("game_id", "minutes_played")),
+            {self.game.id: 100, self.another_game.id: 150},
+        )
+
+    def test_aliases_of_removed_games_are_not_found(self) -> None:
+        removed_game_id = self.not_owned_game.id
+        GameAlias.objects.create(source_id=SOURCE_ID, title="Removed", game=self.not_owned_game)
+
+        # The game is removed after the aliases are loaded
+        with mock.patch(
+            "catalogsources.management.commands.import_steam_game_times.GameAliasResolver.game_id",
+            return_value=removed_game_id,
+        ):
+            self.not_owned_game.delete()
+            output = self._process(GameTimeData("Removed", self.platform.id, 150, app_id=10))
+
+        self.assertEqual(output.splitlines(), ["Removed : Game alias exists but linked Finished Games entry not found"])
+
+    def test_imports_game_times_of_all_configured_accounts_in_one_pass(self) -> None:
+        another_user = create_user()
+        UserGame.objects.create(user=another_user, game=self.game, platform=self.platform, minutes_played=10)
+        owned_games_by_steam_id = {
+            "1": [{"appid": 10, "name": "A Game", "playtime_forever": 150}],
+            "2": [
+                {"appid": 10, "name": "A Game", "playtime_forever": 20},
+                {"appid": 20, "name": "Another Game", "playtime_forever": 50},
+            ],
+        }
+
+        def get(url: str, params: Dict, **kwargs: Any) -> mock.Mock:
+            games = owned_games_by_steam_id[params["steamid"]]
+            response = mock.Mock(status_code=200, headers={})
+            response.json.return_value = {"response": {"game_count": len(games), "games": games}}
+            return response
+
+        cache_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(cache_dir.cleanup)
+        adapters_settings = {
+            SOURCE_ID: {
+                constants.ADAPTER_API_KEY: "a key",
+                constants.ADAPTER_USER_IDS: {self.user.id: "1", another_user.id: "2"},
+            }
+        }
+        with override_settings(CATALOG_SOURCES_ADAPTERS=adapters_settings), mock.patch(
+            "catalogsources.adapters.steam_client.OWNED_GAMES_CACHE_FOLDER_NAME", cache_dir.name
+        ), mock.patch(
+            "catalogsources.management.commands.import_steam_game_times.PLATFORM_PC", self.platform.id
+        ), mock.patch(
+            "catalogsources.adapters.steam_client.requests.get", side_effect=get
+        ) as requests_get:
+            call_command("import_steam_game_times", stdout=self.output)
+
+            with self.assertRaisesMessage(CommandError, "No Steam account configured"):
+                call_command("import_steam_game_times", "--fg-user-id=0", stdout=self.output)
+
+        self.assertEqual(requests_get.call_count, 2)
+        self.assertEqual(
+            list(UserGame.objects.filter(game=self.game).order_by("user_id").values_list("user_id", "minutes_played")),
+            [(self.user.id, 150), (another_user.id, 20)],
+        )
+        self.another_user_game.refresh_from_db()
+        self.assertEqual(self.another_user_game.minutes_played, 100)
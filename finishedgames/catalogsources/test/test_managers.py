@@ -0,0 +1,43 @@
+from catalogsources.managers import ImportManager
+from catalogsources.models import FetchedGame
+from core.test.tests_helpers import create_game, create_platform
+from django.test import TestCase, override_settings
+
+from finishedgames import constants
+
+
+@override_settings(CATALOG_SOURCES_ADAPTERS={"a_source": {constants.ADAPTER_DISPLAY_NAME: "A Source"}})
+class ImportManagerLinkOnlyIfExactMatchTests(TestCase):
+    def setUp(self) -> None:
+        self.platform = create_platform()
+        self.game = create_game(name="Grim Fandango", platforms=[self.platform])
+
+    def _fetched_game(self, name: str) -> FetchedGame:
+        return FetchedGame.objects.create(
+            name=name,
+            publish_date=1998,
+            source_id="a_source",
+            source_game_id=name,
+            source_url="https://a_source.test/games/{}".format(name),
+        )
+
+    def test_warnings_suggest_similar_games(self) -> None:
+        fetched_games = [self._fetched_game("Grim Fandango Remastered"), self._fetched_game("Zork")]
+        fetched_game_ids = [fetched_game.id for fetched_game in fetched_games]
+
+        self.assertEqual(
+            ImportManager.import_fetched_games_link_only_if_exact_match(fetched_game_ids, False),
+            [
+                "No exact match found for 'Grim Fandango Remastered' (1998), did you mean: 'Grim Fandango' (0.72)?",
+                "No exact match found for 'Zork' (1998)",
+            ],
+        )
+        self.assertEqual(
+            ImportManager.import_fetched_games_link_only_if_exact_match(fetched_game_ids, True),
+            [
+                "No matching game name found for 'Grim Fandango Remastered' (1998), did you mean: 'Grim Fandango' "
+                "(0.72)?",
+                "No matching game name found for 'Zork' (1998)",
+            ],
+        )
+        self.assertFalse(FetchedGame.objects.filter(fg_game__isnull=False).exists())
@@ -1,5 +1,5 @@
-from catalogsources.models import FetchedGame
-from core.models import Game
+from catalogsources.models import FetchedGame, FetchedPlatform
+from core.models import Game, Platform
 from django.test import TestCase
 
 AN_IRRELEVANT_YEAR = 2000
@@ -58,3 +58,27 @@ class ModelsTests(TestCase):
         fetched_game.publish_date = publish_date
         fetched_game.save()
         self.assertTrue(fetched_game.is_sync)
+
+    def test_unlinked_when_game_deleted(self):
+        game = Game(publish_date=AN_IRRELEVANT_YEAR, name="an_irrelevant_name")
+        game.save()
+        fetched_game = FetchedGame(publish_date=AN_IRRELEVANT_YEAR, name="an_irrelevant_name", fg_game=game)
+        fetched_game.save()
+
+        game.delete()
+
+        fetched_game.refresh_from_db()
+        self.assertIsNone(fetched_game.fg_game_id)
+
+    def test_unlinked_when_platform_deleted(self):
+        platform = Platform(publish_date=AN_IRRELEVANT_YEAR, name="an_irrelevant_name", shortname="an_irrelevant_name")
+        platform.save()
+        fetched_platform = FetchedPlatform(
+            publish_date=AN_IRRELEVANT_YEAR, name="an_irrelevant_name", fg_platform=platform
+        )
+        fetched_platform.save()
+
+        Platform.objects.filter(id=platform.id).delete()
+
+        fetched_platform.refresh_from_db()
+        self.assertIsNone(fetched_platform.fg_platform_id)
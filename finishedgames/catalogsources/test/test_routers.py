@@ -0,0 +1,37 @@
+from catalogsources.models import FetchedGame, FetchedPlatform
+from catalogsources.routers import CatalogSourcesRouter
+from core.models import Game, UserGame
+from django.test import SimpleTestCase, override_settings
+
+A_SOURCES_DATABASE = "catalogsources"
+
+
+@override_settings(CATALOG_SOURCES_DATABASE=A_SOURCES_DATABASE)
+class CatalogSourcesRouterTests(SimpleTestCase):
+    def setUp(self):
+        self.router = CatalogSourcesRouter()
+
+    def test_catalog_sources_models_use_their_database(self):
+        for model in (FetchedGame, FetchedPlatform, FetchedGame.platforms.through):
+            self.assertEqual(self.router.db_for_read(model), A_SOURCES_DATABASE)
+            self.assertEqual(self.router.db_for_write(model), A_SOURCES_DATABASE)
+
+    def test_other_models_are_not_routed(self):
+        self.assertIsNone(self.router.db_for_read(UserGame))
+        self.assertIsNone(self.router.db_for_write(Game, instance=Game()))
+
+    def test_linked_catalog_models_use_default_database(self):
+        fetched_game = FetchedGame()
+        fetched_game._state.db = A_SOURCES_DATABASE
+
+        self.assertEqual(self.router.db_for_read(Game, instance=fetched_game), "default")
+
+    def test_allows_links_across_databases(self):
+        self.assertTrue(self.router.allow_relation(FetchedGame(), Game()))
+        self.assertIsNone(self.router.allow_relation(UserGame(), Game()))
+
+    def test_migrates_apps_only_in_their_database(self):
+        self.assertTrue(self.router.allow_migrate(A_SOURCES_DATABASE, "catalogsources"))
+        self.assertFalse(self.router.allow_migrate("default", "catalogsources"))
+        self.assertFalse(self.router.allow_migrate(A_SOURCES_DATABASE, "core"))
+        self.assertIsNone(self.router.allow_migrate("default", "core"))
@@ -0,0 +1,66 @@
+from io import StringIO
+from typing import Any, Dict, List, Tuple
+from unittest import mock
+
+from catalogsources.adapters.steam_adapter import PC_PLATFORM_ID, SteamAdapter
+from catalogsources.adapters.steam_client import SteamClientError
+from catalogsources.models import FetchedPlatform
+from django.core.management.color import no_style
+from django.test import TestCase, override_settings
+
+from finishedgames import constants
+
+
+def _owned_games(*app_ids: int) -> Dict[str, Any]:
+    return {
+        "game_count": len(app_ids),
+        "games": [{"appid": app_id, "name": "Game {}".format(app_id)} for app_id in app_ids],
+    }
+
+
+@override_settings(
+    CATALOG_SOURCES_ADAPTERS={
+        SteamAdapter.SOURCE_ID: {
+            constants.ADAPTER_API_KEY: "a key",
+            constants.ADAPTER_REQUESTS_PER_HOUR: 1200,
+            constants.ADAPTER_WAIT_SECONDS_WHEN_RATE_LIMITED: 3,
+            constants.ADAPTER_USER_ID: "1",
+            constants.ADAPTER_USER_IDS: {10: "2", 20: "1"},
+        }
+    }
+)
+class SteamAdapterTests(TestCase):
+    def setUp(self) -> None:
+        FetchedPlatform.objects.create(
+            name="PC",
+            shortname="PC",
+            publish_date=2003,
+            source_platform_id=PC_PLATFORM_ID,
+            source_id=SteamAdapter.SOURCE_ID,
+        )
+        self.output = StringIO()
+
+    def _fetch(self, owned_games: Dict[str, Dict], errors: Dict[str, SteamClientError]) -> Tuple[List[str], bool]:
+        with SteamAdapter(stdout=self.output, stdout_color_style=no_style()) as adapter, mock.patch.object(
+            adapter.steam_client, "get_owned_games_of_accounts", return_value=(owned_games, errors)
+        ) as get_owned_games_of_accounts, mock.patch.object(
+            adapter, "_get_game_details", return_value={}
+        ) as get_game_details:
+            games = adapter.fetch_games_block(platform_id=PC_PLATFORM_ID)
+            errored = adapter.has_errored()
+
+        get_owned_games_of_accounts.assert_called_once_with(["1", "2"])
+        self.assertEqual(get_game_details.call_count, len(games))
+        return [fetched_game.source_game_id for fetched_game, _ in games], errored
+
+    def test_fetches_games_of_all_accounts_once(self) -> None:
+        app_ids, errored = self._fetch({"1": _owned_games(100, 200), "2": _owned_games(200, 300)}, {})
+
+        self.assertEqual(app_ids, ["100", "200", "300"])
+        self.assertFalse(errored)
+
+    def test_errors_only_if_no_account_is_fetched(self) -> None:
+        self.assertEqual(self._fetch({"1": _owned_games(100)}, {"2": SteamClientError("an error")}), (["100"], False))
+        self.assertIn("2: an error", self.output.getvalue())
+
+        self.assertEqual(self._fetch({}, {"1": SteamClientError("an error")}), ([], True))
@@ -0,0 +1,107 @@
+import tempfile
+from typing import Any, Dict, Optional
+from unittest import mock
+
+import requests
+from catalogsources.adapters.steam_client import REQUEST_TIMEOUT_SECONDS, SteamClient, SteamClientError
+from django.test import TestCase
+
+STEAM_ID = "76561197960287930"
+CACHE_SECONDS = 60
+OWNED_GAMES = {"game_count": 1, "games": [{"appid": 10, "name": "A Game", "playtime_forever": 30}]}
+
+
+def _response(status_code: int, data: Optional[Dict] = None, headers: Optional[Dict] = None) -> mock.Mock:
+    response = mock.Mock(status_code=status_code, headers=headers or {}, text="an error")
+    response.json.return_value = data
+    return response
+
+
+class SteamClientTests(TestCase):
+    def setUp(self) -> None:
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.cache_dir = directory.name
+        self.now = 1000.0
+        patcher = mock.patch("catalogsources.adapters.steam_client.requests.get")
+        self.addCleanup(patcher.stop)
+        self.get = patcher.start()
+
+    def _client(self) -> SteamClient:
+        return SteamClient(
+            api_key="a key", cache_dir=self.cache_dir, cache_seconds=CACHE_SECONDS, time=lambda: self.now
+        )
+
+    def _request_headers(self) -> Any:
+        return self.get.call_args.kwargs["headers"]
+
+    def test_owned_games_are_cached_by_steam_id(self) -> None:
+        self.get.return_value = _response(200, {"response": OWNED_GAMES})
+
+        self.assertEqual(self._client().get_owned_games(STEAM_ID), OWNED_GAMES)
+        # e.g. the adapter fetching the catalog, then the game times import
+        self.assertEqual(self._client().get_owned_games(STEAM_ID), OWNED_GAMES)
+
+        self.get.assert_called_once()
+        self.assertEqual(self.get.call_args.kwargs["params"]["steamid"], STEAM_ID)
+        self.assertEqual(self.get.call_args.kwargs["timeout"], REQUEST_TIMEOUT_SECONDS)
+
+        self._client().get_owned_games("another steam id")
+        self.assertEqual(self.get.call_count, 2)
+
+    def test_expired_cache_is_revalidated(self) -> None:
+        self.get.return_value = _response(
+            200, {"response": OWNED_GAMES}, {"ETag": '"v1"', "Last-Modified": "Mon, 19 Oct 2026 10:00:00 GMT"}
+        )
+        self._client().get_owned_games(STEAM_ID)
+
+        self.now += CACHE_SECONDS
+        self.get.return_value = _response(304)
+        self.assertEqual(self._client().get_owned_games(STEAM_ID), OWNED_GAMES)
+        self.assertEqual(self._request_headers()["If-None-Match"], '"v1"')
+        self.assertEqual(self._request_headers()["If-Modified-Since"], "Mon, 19 Oct 2026 10:00:00 GMT")
+
+        # Revalidating renews the cache
+        self.now += CACHE_SECONDS - 1
+        self._client().get_owned_games(STEAM_ID)
+        self.assertEqual(self.get.call_count, 2)
+
+        self.now += CACHE_SECONDS
+        updated_owned_games = dict(OWNED_GAMES, game_count=0, games=[])
+        self.get.return_value = _response(200, {"response": updated_owned_games})
+        self.assertEqual(self._client().get_owned_games(STEAM_ID), updated_owned_games)
+
+    def test_errors_are_not_cached(self) -> None:
+        for response in [_response(500), _response(200, {"unexpected": "structure"})]:
+            self.get.return_value = response
+            with self.assertRaises(SteamClientError):
+                self._client().get_owned_games(STEAM_ID)
+
+        self.get.side_effect = requests.Timeout("timed out")
+        with self.assertRaisesMessage(SteamClientError, "timed out"):
+            self._client().get_owned_games(STEAM_ID)
+
+        self.get.side_effect = None
+        self.get.return_value = _response(200, {"response": OWNED_GAMES})
+        self.assertEqual(self._client().get_owned_games(STEAM_ID), OWNED_GAMES)
+        self.assertNotIn("If-None-Match", self._request_headers())
+
+    def test_owned_games_of_accounts_are_fetched_once_per_steam_id(self) -> None:
+        def get(url: str, params: Dict, **kwargs: Any) -> mock.Mock:
+            if params["steamid"] == "failing":
+                return _response(500)
+            return _response(200, {"response": dict(OWNED_GAMES, steam_id=params["steamid"])})
+
+        self.get.side_effect = get
+
+        owned_games, errors = self._client().get_owned_games_of_accounts([STEAM_ID, "failing", "another", STEAM_ID])
+
+        self.assertEqual(self.get.call_count, 3)
+        self.assertEqual(
+            {steam_id: games["steam_id"] for steam_id, games in owned_games.items()},
+            {
+                STEAM_ID: STEAM_ID,
+                "another": "another",
+            },
+        )
+        self.assertEqual(list(errors.keys()), ["failing"])
@@ -0,0 +1,174 @@
+import json
+import os
+import sqlite3
+import tempfile
+from contextlib import closing
+from io import StringIO
+from typing import Any, Dict
+from unittest import mock
+
+from catalogsources.management.commands import import_gog_db_game_times, import_steam_game_times
+from catalogsources.models import FetchedGame
+from catalogsources.playtimes import MERGE_POLICY_LATEST, MERGE_POLICY_MAX, MERGE_POLICY_SUM, merge_playtimes
+from core.models import Platform, PlaytimeHistory, UserGame
+from core.playtime_history import SOURCE_SYNC
+from core.test.tests_helpers import create_game, create_user
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from finishedgames import constants
+
+GOG_USER_ID = 1234
+TITLE_GAME_PIECE_ID = 5
+STEAM_ID = "1"
+
+
+class MergePlaytimesTests(SimpleTestCase):
+    def test_merges_sources_with_policy(self) -> None:
+        current = {(1, 1, 1): 100, (1, 2, 1): 100}
+        sources = [{(1, 1, 1): 150, (1, 2, 1): 30}, {(1, 1, 1): 40, (1, 3, 1): 20}]
+
+        self.assertEqual(merge_playtimes(current, sources, MERGE_POLICY_MAX), {(1, 1, 1): 150, (1, 3, 1): 20})
+        self.assertEqual(merge_playtimes(current, sources, MERGE_POLICY_SUM), {(1, 1, 1): 190, (1, 3, 1): 20})
+        self.assertEqual(
+            merge_playtimes(current, sources, MERGE_POLICY_LATEST), {(1, 1, 1): 40, (1, 2, 1): 30, (1, 3, 1): 20}
+        )
+        self.assertEqual(merge_playtimes(current, [{(1, 1, 1): 100}], MERGE_POLICY_LATEST), {})
+
+        with self.assertRaises(ValueError):
+            merge_playtimes(current, sources, "an unknown policy")
+
+
+class SyncPlaytimesTests(TestCase):
+    def setUp(self) -> None:
+        # Both importers only handle PC games
+        self.platform = Platform.objects.create(
+            id=import_gog_db_game_times.PLATFORM_PC, name="PC", shortname="PC", publish_date=1981
+        )
+        self.game = create_game(name="A Game", platforms=[self.platform])
+        self.another_game = create_game(name="Another Game", platforms=[self.platform])
+        self.user = create_user()
+        self.user_game = UserGame.objects.create(
+            user=self.user, game=self.game, platform=self.platform, minutes_played=100
+        )
+        FetchedGame.objects.create(
+            name="A Game",
+            publish_date=2000,
+            source_id=import_steam_game_times.SOURCE_ID,
+            source_game_id="10",
+            source_url="https://store.steampowered.com/app/10",
+            fg_game_id=self.game.id,
+        )
+
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        self.db_path = os.path.join(self.directory, "galaxy-2.0.db")
+        with closing(sqlite3.connect(self.db_path)) as connection, connection:
+            connection.execute(
+                "CREATE TABLE GamePieces (releaseKey TEXT, gamePieceTypeId INTEGER, userId INTEGER, value TEXT)"
+            )
+            connection.execute("CREATE TABLE GameTimes (releaseKey TEXT, userId INTEGER, minutesInGame INTEGER)")
+            for release_key, title, minutes in [("gog_1", "A Game", 120), ("gog_2", "Another Game", 60)]:
+                connection.execute(
+                    "INSERT INTO GamePieces VALUES (?, ?, ?, ?)",
+                    (release_key, TITLE_GAME_PIECE_ID, GOG_USER_ID, json.dumps({"title": title})),
+                )
+                connection.execute("INSERT INTO GameTimes VALUES (?, ?, ?)", (release_key, GOG_USER_ID, minutes))
+        self.csv_file = os.path.join(self.directory, "playtimes.csv")
+        with open(self.csv_file, "w", encoding="utf-8") as file_handle:
+            file_handle.write("name,playtime\nA Game,3\nNot owned,1\n")
+
+        owned_games = [
+            {"appid": 10, "name": "A Game", "playtime_forever": 150},
+            {"appid": 20, "name": "Not fetched", "playtime_forever": 10},
+        ]
+
+        def get(url: str, params: Dict, **kwargs: Any) -> mock.Mock:
+            response = mock.Mock(status_code=200, headers={})
+            response.json.return_value = {"response": {"game_count": len(owned_games), "games": owned_games}}
+            return response
+
+        self.enterContext(
+            override_settings(
+                CATALOG_SOURCES_ADAPTERS={
+                    import_steam_game_times.SOURCE_ID: {
+                        constants.ADAPTER_API_KEY: "a key",
+                        constants.ADAPTER_USER_IDS: {self.user.id: STEAM_ID},
+                    }
+                }
+            )
+        )
+        self.enterContext(
+            mock.patch("catalogsources.adapters.steam_client.OWNED_GAMES_CACHE_FOLDER_NAME", self.directory)
+        )
+        self.enterContext(mock.patch("catalogsources.adapters.steam_client.requests.get", side_effect=get))
+
+    def _sync(self, *args: str) -> str:
+        output = StringIO()
+        call_command(
+            "sync_playtimes",
+            *args,
+            "--fg-user-id={}".format(self.user.id),
+            "--gog-user-id={}".format(GOG_USER_ID),
+            "--title-game-piece-id={}".format(TITLE_GAME_PIECE_ID),
+            "--db-path={}".format(self.db_path),
+            "--files",
+            self.csv_file,
+            stdout=output,
+        )
+        return output.getvalue()
+
+    def _minutes_played(self) -> Dict[int, int]:
+        return dict(UserGame.objects.filter(user=self.user).values_list("game_id", "minutes_played"))
+
+    def test_merges_all_sources_in_a_single_report(self) -> None:
+        output = self._sync("steam", "gog", "files", "--verbose")
+
+        self.assertEqual(
+            output.splitlines(),
+            [
+                "A Game : updated, 100 -> 180 minutes (steam: 150, gog: 120, files: 180)",
+                "Another Game : created, 60 minutes (gog: 60)",
+                "steam : Not fetched : Game title not found for platform ID {}".format(self.platform.id),
+                "files : Not owned : game not found for user",
+                "> 1 updated, 1 created, 2 not matched",
+            ],
+        )
+        self.assertEqual(self._minutes_played(), {self.game.id: 180, self.another_game.id: 60})
+        created_user_game = UserGame.objects.get(user=self.user, game=self.another_game)
+        self.assertEqual(created_user_game.game_sort_name, "another game")
+        self.assertEqual(created_user_game.platform_sort_name, "pc")
+        # Recorded with the source of each new value
+        self.assertEqual(
+            set(PlaytimeHistory.objects.values_list("user_game_id", "minutes_played", "minutes_delta", "source")),
+            {(self.user_game.id, 180, 80, "files"), (created_user_game.id, 60, 60, "gog")},
+        )
+
+    def test_sums_sources(self) -> None:
+        self._sync("steam", "gog", "--policy=sum")
+
+        self.assertEqual(self._minutes_played(), {self.game.id: 270, self.another_game.id: 60})
+        self.assertEqual(PlaytimeHistory.objects.get(user_game=self.user_game).source, SOURCE_SYNC)
+
+    def test_latest_source_wins(self) -> None:
+        self.user_game.minutes_played = 500
+        self.user_game.save()
+
+        self._sync("files", "steam", "--policy=latest")
+
+        self.assertEqual(self._minutes_played(), {self.game.id: 150})
+
+    def test_dry_run_does_not_save_changes(self) -> None:
+        output = self._sync("gog", "--dry-run")
+
+        self.assertIn("> 1 updated, 1 created, 0 not matched", output)
+        self.assertEqual(self._minutes_played(), {self.game.id: 100})
+        self.assertFalse(PlaytimeHistory.objects.exists())
+
+    def test_requires_source_arguments(self) -> None:
+        with self.assertRaisesMessage(CommandError, "gog requires"):
+            call_command("sync_playtimes", "gog", "--fg-user-id={}".format(self.user.id), stdout=StringIO())
+        with self.assertRaisesMessage(CommandError, "files requires"):
+            call_command("sync_playtimes", "files", stdout=StringIO())
@@ -0,0 +1,153 @@
+"""
+Minimal columnar container: a JSON header followed by one typed array per column, each aligned so it can be used
+straight from a memory mapped file.
+
+    MAGIC | header length (uint64 little-endian) | header (JSON) | padding | column data (aligned) ...
+
+Dictionary-encoded columns store integer codes, their values are in the header `dictionaries`.
+"""
+
+import json
+import mmap
+import struct
+import sys
+from array import array
+from typing import Any, Dict, List, Optional, Sequence  # NOQA: F401
+
+MAGIC = b"FGCOLS01"
+HEADER_LENGTH_FORMAT = "<Q"
+ALIGNMENT = 8
+
+# `array` typecodes of the same size on all supported platforms (1, 2 and 4 bytes)
+TYPECODE_BOOL = "B"
+TYPECODE_INT16 = "h"
+TYPECODE_UINT16 = "H"
+TYPECODE_INT32 = "i"
+TYPECODE_UINT32 = "I"
+
+
+class ColumnarWriter:
+    """Accumulates columns as compact typed arrays and writes them to a file with `write()`."""
+
+    def __init__(self) -> None:
+        self.columns = {}  # type: Dict[str, array]
+        self.dictionary_columns = {}  # type: Dict[str, str]
+        self.dictionaries = {}  # type: Dict[str, List[str]]
+        self._dictionary_codes = {}  # type: Dict[str, Dict[str, int]]
+
+    def add_column(self, name: str, typecode: str, dictionary: Optional[str] = None) -> None:
+        self.columns[name] = array(typecode)
+        if dictionary is not None:
+            self.dictionary_columns[name] = dictionary
+            self.dictionaries.setdefault(dictionary, [])
+            self._dictionary_codes.setdefault(dictionary, {})
+
+    def append(self, row: Sequence[Any]) -> None:
+        """Appends a row, with its values in the order the columns were added. `None` values are stored as 0."""
+        for (name, values), value in zip(self.columns.items(), row):
+            if value is None:
+                value = 0
+            elif name in self.dictionary_columns:
+                value = self._code(self.dictionary_columns[name], value)
+            values.append(value)
+
+    def write(self, filename: str) -> None:
+        rows = len(next(iter(self.columns.values()))) if self.columns else 0
+        header = {
+            "byteorder": sys.byteorder,
+            "rows": rows,
+            "columns": [],
+            "dictionaries": self.dictionaries,
+        }  # type: Dict[str, Any]
+
+        # Offsets are relative to the data start, which is only known after encoding the header
+        offset = 0
+        for name, values in self.columns.items():
+            header["columns"].append(
+                {
+                    "name": name,
+                    "typecode": values.typecode,
+                    "itemsize": values.itemsize,
+                    "offset": offset,
+                    "dictionary": self.dictionary_columns.get(name),
+                }
+            )
+            offset = _aligned(offset + len(values) * values.itemsize)
+
+        encoded_header = json.dumps(header, separators=(",", ":")).encode("utf-8")
+        data_start = _aligned(len(MAGIC) + struct.calcsize(HEADER_LENGTH_FORMAT) + len(encoded_header))
+
+        with open(filename, "wb") as file_handle:
+            file_handle.write(MAGIC)
+            file_handle.write(struct.pack(HEADER_LENGTH_FORMAT, len(encoded_header)))
+            file_handle.write(encoded_header)
+            for column, values in zip(header["columns"], self.columns.values()):
+                file_handle.write(b"\0" * (data_start + column["offset"] - file_handle.tell()))
+                values.tofile(file_handle)
+
+    def _code(self, dictionary: str, value: str) -> int:
+        codes = self._dictionary_codes[dictionary]
+        if value not in codes:
+            codes[value] = len(codes)
+            self.dictionaries[dictionary].append(value)
+        return codes[value]
+
+
+class ColumnarFile:
+    """
+    Memory maps a file written by `ColumnarWriter`. `columns` are read-only `memoryview`s over the mapped file (no copies
+    nor parsing), usable as arrays (e.g. `sum()`, slicing) or wrapped without copying with `numpy.frombuffer()`.
+    Views must not be used after closing the file.
+    """
+
+    def __init__(self, filename: str) -> None:
+        with open(filename, "rb") as file_handle:
+            self._mmap = mmap.mmap(file_handle.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if self._mmap[: len(MAGIC)] != MAGIC:
+            self._mmap.close()
+            raise ValueError("'{}' is not a columnar export".format(filename))
+
+        header_start = len(MAGIC) + struct.calcsize(HEADER_LENGTH_FORMAT)
+        (header_length,) = struct.unpack(HEADER_LENGTH_FORMAT, self._mmap[len(MAGIC) : header_start])
+        header = json.loads(self._mmap[header_start : header_start + header_length].decode("utf-8"))
+        if header["byteorder"] != sys.byteorder:
+            self._mmap.close()
+            raise ValueError("'{}' was written on a {} endian machine".format(filename, header["byteorder"]))
+
+        self.rows = header["rows"]  # type: int
+        self.dictionaries = header["dictionaries"]  # type: Dict[str, List[str]]
+        self.dictionary_columns = {
+            column["name"]: column["dictionary"] for column in header["columns"] if column["dictionary"]
+        }  # type: Dict[str, str]
+
+        data_start = _aligned(header_start + header_length)
+        self._buffer = memoryview(self._mmap)
+        self.columns = {}  # type: Dict[str, memoryview]
+        for column in header["columns"]:
+            start = data_start + column["offset"]
+            self.columns[column["name"]] = self._buffer[start : start + self.rows * column["itemsize"]].cast(
+                column["typecode"]
+            )
+
+    def decode(self, name: str) -> List[str]:
+        """Values of a dictionary-encoded column."""
+        dictionary = self.dictionaries[self.dictionary_columns[name]]
+        return [dictionary[code] for code in self.columns[name]]
+
+    def close(self) -> None:
+        # The mapping can't be closed while there are views over it
+        for column in self.columns.values():
+            column.release()
+        self._buffer.release()
+        self._mmap.close()
+
+    def __enter__(self) -> "ColumnarFile":
+        return self
+
+    def __exit__(self, *_: Any) -> None:
+        self.close()
+
+
+def _aligned(offset: int) -> int:
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
@@ -0,0 +1,327 @@
+import gzip
+import json
+import os
+import re
+from datetime import datetime
+from typing import IO, Any, Dict, Iterator, List, Optional, Sequence, Tuple, Type, Union, cast
+
+from core.models import Game, Platform, Tombstone, UserGame, WishlistedUserGame
+from django.db import connections, models
+from django.db.models import Q, QuerySet
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+try:
+    # Python >= 3.14
+    from compression import zstd
+
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
+
+FORMAT_JSON = "json"
+FORMAT_NDJSON = "ndjson"
+FORMATS = [FORMAT_JSON, FORMAT_NDJSON]
+# Not written item by item, see `SqliteSnapshotWriter`
+FORMAT_SQLITE = "sqlite"
+
+COMPRESSION_NONE = "none"
+COMPRESSION_GZIP = "gzip"
+COMPRESSION_ZSTD = "zstd"
+COMPRESSIONS = [COMPRESSION_NONE, COMPRESSION_GZIP, COMPRESSION_ZSTD]
+
+FILE_EXTENSIONS = {
+    FORMAT_JSON: ".json",
+    FORMAT_NDJSON: ".ndjson",
+    FORMAT_SQLITE: ".sqlite3",
+    COMPRESSION_NONE: "",
+    COMPRESSION_GZIP: ".gz",
+    COMPRESSION_ZSTD: ".zst",
+}
+
+# Favours speed, the size difference with the maximum level is small for JSON
+GZIP_COMPRESSION_LEVEL = 6
+
+# Characters read at a time when parsing JSON arrays, big enough to hold many items
+JSON_READ_SIZE = 65536
+
+# Fields read from each exported game, `parent_game_id` avoids loading the parent just to get its id
+GAME_FIELDS = ["id", "name", "publish_date", "dlc_or_expansion", "parent_game_id", "urls", "name_for_search"]
+
+
+def game_data(game: Game, platform_ids: List[int]) -> Dict[str, Any]:
+    return {
+        "id": game.id,
+        "name": game.name,
+        "publish_date": game.publish_date,
+        "dlc_or_expansion": game.dlc_or_expansion,
+        "platforms": platform_ids,
+        "parent_game": game.parent_game_id,
+        "urls": game.urls_dict,
+        "name_for_search": game.name_for_search,
+    }
+
+
+def platform_data(platform: Platform) -> Dict[str, Any]:
+    return {
+        "id": platform.id,
+        "name": platform.name,
+        "shortname": platform.shortname,
+        "publish_date": platform.publish_date,
+    }
+
+
+def parse_since(value: str) -> datetime:
+    """Start of a delta export, a date or date and time in ISO 8601 format. Naive ones use the current timezone."""
+    since = parse_datetime(value)
+    if since is None:
+        raise ValueError("'{}' is not a date nor a date and time".format(value))
+    if timezone.is_naive(since):
+        since = timezone.make_aware(since)
+    return cast(datetime, since)
+
+
+def deleted_items(
+    model: Union[Type[Game], Type[Platform]], since: datetime, object_ids: Optional[QuerySet] = None
+) -> List[Dict[str, Any]]:
+    """Tombstones of the games or platforms deleted since the given moment, identified by id."""
+    tombstones = Tombstone.objects.filter(model_name=model._meta.model_name, deleted_at__gte=since)
+    if object_ids is not None:
+        tombstones = tombstones.filter(object_id__in=object_ids)
+    deleted_ids = tombstones.order_by("object_id").values_list("object_id", flat=True).distinct()
+    return [{"id": object_id, "deleted": True} for object_id in deleted_ids]
+
+
+def deleted_user_games(
+    model: Union[Type[UserGame], Type[WishlistedUserGame]], user_id: int, since: datetime
+) -> List[Dict[str, Any]]:
+    """Tombstones of the user games deleted since the given moment, identified (as exported) by game and platform."""
+    rows = (
+        Tombstone.objects.filter(model_name=model._meta.model_name, user_id=user_id, deleted_at__gte=since)
+        .order_by("game_id", "platform_id")
+        .values_list("game_id", "platform_id")
+        .distinct()
+    )
+    return [{"game_id": game_id, "platform_id": platform_id, "deleted": True} for game_id, platform_id in rows]
+
+
+def platform_ids_by_game_id(game_ids: Union[List[int], QuerySet]) -> Dict[int, List[int]]:
+    """Platform ids of each game in a single query. `game_ids` can be a list or a subquery."""
+    platform_ids = {}  # type: Dict[int, List[int]]
+    relations = Game.platforms.through.objects.filter(game_id__in=game_ids).order_by("game_id", "platform_id")
+    for game_id, platform_id in relations.values_list("game_id", "platform_id"):
+        platform_ids.setdefault(game_id, []).append(platform_id)
+    return platform_ids
+
+
+def user_catalog_games_filter(user_id: int) -> Q:
+    """Catalog and wishlisted games of the user, plus the parent games of the DLCs among them, all as subqueries."""
+    catalog_games_filter = Q(id__in=UserGame.objects.filter(user_id=user_id).values("game_id")) | Q(
+        id__in=WishlistedUserGame.objects.filter(user_id=user_id).values("game_id")
+    )
+    parent_game_ids = Game.objects.filter(catalog_games_filter, parent_game__isnull=False).values("parent_game_id")
+    return catalog_games_filter | Q(id__in=parent_game_ids)
+
+
+class ExportFileWriter:
+    """
+    Writes items to a file as they come instead of accumulating them, so memory stays flat no matter how many.
+    `json` writes a JSON array (one key per line, as exports always did), `ndjson` one JSON item per line.
+    """
+
+    def __init__(self, path: str, file_format: str = FORMAT_JSON, compression: str = COMPRESSION_NONE) -> None:
+        if compression == COMPRESSION_ZSTD and not ZSTD_AVAILABLE:
+            raise ValueError("zstd compression requires Python 3.14 or newer")
+
+        self.filename = "{}{}{}".format(path, FILE_EXTENSIONS[file_format], FILE_EXTENSIONS[compression])
+        self.file_format = file_format
+        self.compression = compression
+        self.items_count = 0
+        self.file_size = 0
+        self._file_handle = None  # type: Optional[IO[str]]
+
+    def __enter__(self) -> "ExportFileWriter":
+        self._file_handle = self._open()
+        if self.file_format == FORMAT_JSON:
+            self._write("[")
+        return self
+
+    def write(self, item: Dict[str, Any]) -> None:
+        if self.file_format == FORMAT_JSON:
+            separator = ",\n" if self.items_count else ""
+            self._write(separator + json.dumps(item, separators=(",\n", ":")))
+        else:
+            self._write(json.dumps(item, separators=(",", ":")) + "\n")
+        self.items_count += 1
+
+    def __exit__(self, *_: Any) -> None:
+        if self.file_format == FORMAT_JSON:
+            self._write("]")
+        cast(IO[str], self._file_handle).close()
+        self.file_size = os.path.getsize(self.filename)
+
+    def _write(self, text: str) -> None:
+        cast(IO[str], self._file_handle).write(text)
+
+    def _open(self) -> IO[str]:
+        if self.compression == COMPRESSION_GZIP:
+            return gzip.open(self.filename, "wt", encoding="utf-8", compresslevel=GZIP_COMPRESSION_LEVEL)
+        if self.compression == COMPRESSION_ZSTD:
+            return cast(IO[str], zstd.open(self.filename, "wt", encoding="utf-8"))
+        return open(self.filename, "w", encoding="utf-8")
+
+
+class SqliteSnapshotWriter:
+    """
+    Writes tables (with their indexes) to a new SQLite database file, copying the rows with `INSERT ... SELECT` into it
+    attached to the database connection, so they never go through Python.
+    All copies happen in a single transaction, so they are consistent among them. As SQLite can't attach databases
+    inside transactions, it can't be used inside `transaction.atomic()` blocks.
+    """
+
+    SCHEMA = "snapshot"
+
+    def __init__(self, filename: str, using: str) -> None:
+        self.filename = filename
+        self.file_size = 0
+        self.connection = connections[using]
+        if self.connection.vendor != "sqlite":
+            raise ValueError("SQLite snapshots require a SQLite database")
+        if self.connection.in_atomic_block:
+            raise ValueError("SQLite snapshots can't be written inside a transaction")
+
+    def __enter__(self) -> "SqliteSnapshotWriter":
+        if os.path.exists(self.filename):
+            os.remove(self.filename)
+
+        self.cursor = self.connection.cursor()
+        self.cursor.execute("ATTACH DATABASE %s AS {}".format(self.SCHEMA), [self.filename])
+        # A new file, if anything fails it is deleted
+        self.cursor.execute("PRAGMA {}.journal_mode = OFF".format(self.SCHEMA))
+        self.cursor.execute("PRAGMA {}.synchronous = OFF".format(self.SCHEMA))
+        # Not `BEGIN IMMEDIATE` (as Django transactions are configured), the main database is only read
+        self.cursor.execute("BEGIN")
+        return self
+
+    def copy(self, model: Type[models.Model], where: str = "", params: Sequence[Any] = ()) -> int:
+        """Creates the table of the model and copies the rows matching `where`. Indexes are created afterwards."""
+        table_sql, indexes_sql = self._schema(model)
+        self.cursor.execute(table_sql)
+        count = self.insert(model, where, params)
+        for index_sql in indexes_sql:
+            self.cursor.execute(index_sql)
+        return count
+
+    def insert(self, model: Type[models.Model], where: str = "", params: Sequence[Any] = ()) -> int:
+        """Copies more rows into an already copied table. Unqualified table names in `where` are the source ones."""
+        table = self.connection.ops.quote_name(model._meta.db_table)
+        sql = "INSERT INTO {schema}.{table} SELECT * FROM main.{table}".format(schema=self.SCHEMA, table=table)
+        if where:
+            sql = "{} WHERE {}".format(sql, where)
+        self.cursor.execute(sql, params)
+        return cast(int, self.cursor.rowcount)
+
+    def reset(self, model: Type[models.Model], field_names: Sequence[str]) -> None:
+        """Sets the fields of the copied rows to null if allowed, else to their default or empty value (not exported)."""
+        assignments = []  # type: List[str]
+        params = []  # type: List[Any]
+        for field_name in field_names:
+            field = model._meta.get_field(field_name)
+            value = None if field.null else field.get_default()
+            assignments.append("{} = %s".format(self.connection.ops.quote_name(field.column)))
+            params.append(field.get_db_prep_save(value, self.connection))
+        self.cursor.execute(
+            "UPDATE {}.{} SET {}".format(
+                self.SCHEMA, self.connection.ops.quote_name(model._meta.db_table), ", ".join(assignments)
+            ),
+            params,
+        )
+
+    def __exit__(self, exception_type: Any, *_: Any) -> None:
+        self.cursor.execute("ROLLBACK" if exception_type else "COMMIT")
+        self.cursor.execute("DETACH DATABASE {}".format(self.SCHEMA))
+        self.cursor.close()
+        if exception_type:
+            os.remove(self.filename)
+        else:
+            self.file_size = os.path.getsize(self.filename)
+
+    def _schema(self, model: Type[models.Model]) -> Tuple[str, List[str]]:
+        # Same statements that created the source table and its indexes, only targeting the snapshot database
+        self.cursor.execute(
+            "SELECT type, sql FROM main.sqlite_master WHERE tbl_name = %s AND sql IS NOT NULL", [model._meta.db_table]
+        )
+        table_sql = ""
+        indexes_sql = []  # type: List[str]
+        for statement_type, sql in self.cursor.fetchall():
+            sql = re.sub(r"^(CREATE (?:UNIQUE )?(?:TABLE|INDEX) )", r"\1{}.".format(self.SCHEMA), sql)
+            if statement_type == "table":
+                table_sql = sql
+            else:
+                indexes_sql.append(sql)
+        return table_sql, indexes_sql
+
+
+def find_export_file(directory: str, name: str) -> Optional[str]:
+    """Path of the `name` export in any format and compression, if present."""
+    for file_format in FORMATS:
+        for compression in COMPRESSIONS:
+            filename = os.path.join(
+                directory, "{}{}{}".format(name, FILE_EXTENSIONS[file_format], FILE_EXTENSIONS[compression])
+            )
+            if os.path.isfile(filename):
+                return filename
+    return None
+
+
+def read_export_file(filename: str, read_size: int = JSON_READ_SIZE) -> Iterator[Dict[str, Any]]:
+    """
+    Yields the items of an exported file one by one instead of loading it whole, so memory stays flat.
+    Format and compression are deduced from the file extensions, as `ExportFileWriter` names the files.
+    """
+    with _open_for_reading(filename) as file_handle:
+        name, extension = os.path.splitext(filename)
+        if extension in (FILE_EXTENSIONS[COMPRESSION_GZIP], FILE_EXTENSIONS[COMPRESSION_ZSTD]):
+            name, extension = os.path.splitext(name)
+        if extension == FILE_EXTENSIONS[FORMAT_NDJSON]:
+            for line in file_handle:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            yield from _read_json_array(file_handle, read_size)
+
+
+def _open_for_reading(filename: str) -> IO[str]:
+    if filename.endswith(FILE_EXTENSIONS[COMPRESSION_GZIP]):
+        return gzip.open(filename, "rt", encoding="utf-8")
+    if filename.endswith(FILE_EXTENSIONS[COMPRESSION_ZSTD]):
+        if not ZSTD_AVAILABLE:
+            raise ValueError("zstd compression requires Python 3.14 or newer")
+        return cast(IO[str], zstd.open(filename, "rt", encoding="utf-8"))
+    return open(filename, "r", encoding="utf-8")
+
+
+def _read_json_array(file_handle: IO[str], read_size: int) -> Iterator[Dict[str, Any]]:
+    # Decodes items as soon as they are fully buffered, reading more when one is cut
+    decoder = json.JSONDecoder()
+    buffer = file_handle.read(read_size).lstrip()
+    if not buffer.startswith("["):
+        raise ValueError("'{}' is not a JSON array".format(file_handle.name))
+    buffer = buffer[1:]
+    end_of_file = False
+
+    while True:
+        buffer = buffer.lstrip().lstrip(",").lstrip()
+        if buffer.startswith("]"):
+            return
+        try:
+            item, position = decoder.raw_decode(buffer)
+        except json.JSONDecodeError:
+            if end_of_file:
+                raise
+            more_data = file_handle.read(read_size)
+            end_of_file = not more_data
+            buffer += more_data
+            continue
+        yield item
+        buffer = buffer[position:]
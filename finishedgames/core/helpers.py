@@ -1,2 +1,28 @@
+import unicodedata
+from typing import Optional, cast
+
+
+def clean_string_field(field: Optional[str]) -> Optional[str]:
+    if field is None:
+        return None
+    else:
+        cleaned = field.replace("®", "").replace("™", "")
+        return unicodedata.normalize("NFC", cleaned.strip(" _!-:"))
+
+
 def generic_id(game_id: int, platform_id: int) -> str:
     return "{}_{}".format(game_id, platform_id)
+
+
+def sort_name(name: str) -> str:
+    """
+    Case-insensitive key used to persist denormalized sort columns (so listings can order through an index).
+    """
+    return name.lower()
+
+
+def alias_title(title: str) -> str:
+    """
+    Key of external titles in `GameAlias`: case-insensitive, and without trademark symbols nor surrounding punctuation.
+    """
+    return cast(str, clean_string_field(title)).lower()
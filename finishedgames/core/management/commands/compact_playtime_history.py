@@ -0,0 +1,58 @@
+from datetime import datetime, timedelta  # NOQA: F401
+from typing import Any, Dict, Optional, cast
+
+from core.models import PlaytimeHistory
+from core.playtime_history import RESOLUTION_DAY, RESOLUTION_MONTH, bucket_start, compact_playtime_history
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+from django.utils import timezone
+
+
+class Command(BaseCommand):
+    help = (
+        "Downsamples the playtime history: merges old points of each user game into one per day, older ones into one "
+        "per month, and optionally deletes the oldest ones"
+    )
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "--daily-after-days", type=int, default=30, help="Keep a single point per day for older points"
+        )
+        parser.add_argument(
+            "--monthly-after-days", type=int, default=365, help="Keep a single point per month for older points"
+        )
+        parser.add_argument(
+            "--delete-after-days", type=int, default=None, help="Delete older points. By default they are kept forever"
+        )
+
+    def handle(self, *args: Any, **options: Dict) -> None:
+        daily_after_days = cast(int, options["daily_after_days"])
+        monthly_after_days = cast(int, options["monthly_after_days"])
+        delete_after_days = cast(Optional[int], options["delete_after_days"])
+
+        if not 0 <= daily_after_days <= monthly_after_days:
+            raise CommandError("--monthly-after-days must be greater or equal than --daily-after-days")
+        if delete_after_days is not None and delete_after_days < monthly_after_days:
+            raise CommandError("--delete-after-days must be greater or equal than --monthly-after-days")
+
+        now = timezone.now()
+        # Aligned to whole days and months, so that no day or month is only partially merged
+        daily_before = bucket_start(now - timedelta(days=daily_after_days), RESOLUTION_DAY)
+        monthly_before = bucket_start(now - timedelta(days=monthly_after_days), RESOLUTION_MONTH)
+
+        deleted = 0
+        delete_before = None  # type: Optional[datetime]
+        if delete_after_days is not None:
+            delete_before = bucket_start(now - timedelta(days=delete_after_days), RESOLUTION_MONTH)
+            deleted, _ = PlaytimeHistory.objects.filter(observed_at__lt=delete_before).delete()
+
+        monthly_merged, monthly_deleted = compact_playtime_history(
+            RESOLUTION_MONTH, before=monthly_before, after=delete_before
+        )
+        daily_merged, daily_deleted = compact_playtime_history(
+            RESOLUTION_DAY, before=daily_before, after=monthly_before
+        )
+
+        self.stdout.write(
+            f"> {monthly_deleted + monthly_merged} points merged into {monthly_merged} monthly ones, "
+            f"{daily_deleted + daily_merged} into {daily_merged} daily ones, {deleted} older deleted"
+        )
@@ -1,80 +1,153 @@
-import json
-from typing import Any, Dict, List
-
+import os
+from datetime import datetime  # NOQA: F401
+from typing import Any, Dict, Iterator, List, Optional, cast
+
+from catalogsources.management.helpers import TimeProfiler
+from core.exporters import (
+    COMPRESSION_NONE,
+    COMPRESSIONS,
+    FILE_EXTENSIONS,
+    FORMAT_JSON,
+    FORMAT_SQLITE,
+    FORMATS,
+    GAME_FIELDS,
+    ExportFileWriter,
+    SqliteSnapshotWriter,
+    deleted_items,
+    game_data,
+    parse_since,
+    platform_data,
+    platform_ids_by_game_id,
+)
 from core.models import Game, Platform
-from django.core.management.base import BaseCommand, CommandParser
+from core.routers import replica_reads
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+from django.db import router
+from django.db.models import Q
+from django.utils import timezone
 
 
 class Command(BaseCommand):
-    help = "Exports all Games and Platforms"
+    help = "Exports all Games and Platforms, streaming them to the files so memory usage stays flat"
 
     def add_arguments(self, parser: CommandParser) -> None:
-        pass
+        parser.add_argument(
+            "--format",
+            choices=FORMATS + [FORMAT_SQLITE],
+            default=FORMAT_JSON,
+            help="'ndjson' writes one item per line, 'sqlite' a database file with the catalog tables and indexes",
+        )
+        parser.add_argument("--compress", choices=COMPRESSIONS, default=COMPRESSION_NONE)
+        parser.add_argument("--output-dir", type=str, default=".")
+        parser.add_argument("--chunk-size", type=int, default=2000, help="Games read (and their platforms) per query")
+        parser.add_argument(
+            "--since",
+            type=str,
+            default=None,
+            help="Only items changed since this date or date and time (ISO 8601), plus tombstones of the deleted ones",
+        )
 
     def handle(self, *args: Any, **options: Dict) -> None:
-        self._export_games()
-        self._export_platforms()
+        self.file_format = cast(str, options["format"])
+        self.compression = cast(str, options["compress"])
+        self.output_dir = cast(str, options["output_dir"])
+        self.chunk_size = max(cast(int, options["chunk_size"]), 1)
+        since = cast(Optional[str], options["since"])
+        # Taken before reading, so changes done meanwhile are also in the next delta
+        export_start = timezone.now()
+
+        if self.file_format == FORMAT_SQLITE and (since or self.compression != COMPRESSION_NONE):
+            raise CommandError("SQLite snapshots are always full and uncompressed")
+
+        try:
+            self.since = parse_since(since) if since else None  # type: Optional[datetime]
+            with replica_reads():
+                if self.file_format == FORMAT_SQLITE:
+                    self._export_snapshot()
+                else:
+                    self._export_games()
+                    self._export_platforms()
+        except ValueError as error:
+            raise CommandError(str(error))
+
+        self.stdout.write("\nTo export later changes use --since {}".format(export_start.isoformat()))
+
+    def _changed_filter(self) -> Q:
+        return Q(modified_at__gte=self.since) if self.since else Q()
 
     def _export_games(self) -> None:
-        filename = "games.json"
-        counter = 0
-        games: List[Dict] = []
-
         self.stdout.write("> Exporting Games")
 
-        for game in Game.objects.all():
-            counter += 1
-
-            games.append(
-                {
-                    "id": game.id,
-                    "name": game.name,
-                    "publish_date": game.publish_date,
-                    "dlc_or_expansion": game.dlc_or_expansion,
-                    "platforms": [platform.id for platform in game.platforms.only("id")],
-                    "parent_game": game.parent_game.id if game.parent_game else None,
-                    "urls": game.urls_dict,
-                    "name_for_search": game.name_for_search,
-                }
+        with TimeProfiler(use_performance_counter=True) as profiler, self._writer("games") as writer:
+            # Deletions first, as a deleted game might have been imported again
+            if self.since:
+                for item in deleted_items(Game, self.since):
+                    writer.write(item)
+            for games in self._games_chunks():
+                platform_ids = platform_ids_by_game_id([game.id for game in games])
+                for game in games:
+                    writer.write(game_data(game, platform_ids.get(game.id, [])))
+                self.stdout.write(" {}".format(writer.items_count))
+
+        self._write_summary("Games", writer, profiler)
+
+    def _games_chunks(self) -> Iterator[List[Game]]:
+        # Paginating by id instead of with offsets, so every chunk is an index range scan
+        last_id = 0
+        while True:
+            games = list(
+                Game.objects.only(*GAME_FIELDS)
+                .filter(self._changed_filter(), id__gt=last_id)
+                .order_by("id")[: self.chunk_size]
             )
-
-            self.stdout.write(".", ending="")
-            if counter % 50 == 0:
-                self.stdout.write(" {}".format(counter))
-
-        print("\nRead {} Games".format(counter))
-
-        with open(filename, "w") as file_handle:
-            json.dump(games, file_handle, separators=(",\n", ":"))
-
-        print("Written Games to {}", filename)
+            if not games:
+                return
+            yield games
+            if len(games) < self.chunk_size:
+                return
+            last_id = games[-1].id
 
     def _export_platforms(self) -> None:
-        filename = "platforms.json"
-        counter = 0
-        platforms: List[Dict] = []
-
-        self.stdout.write("> Reading Platforms")
-
-        for platform in Platform.objects.all():
-            counter += 1
-
-            platforms.append(
-                {
-                    "id": platform.id,
-                    "name": platform.name,
-                    "shortname": platform.shortname,
-                    "publish_date": platform.publish_date,
-                }
+        self.stdout.write("> Exporting Platforms")
+
+        with TimeProfiler(use_performance_counter=True) as profiler, self._writer("platforms") as writer:
+            if self.since:
+                for item in deleted_items(Platform, self.since):
+                    writer.write(item)
+            platforms = Platform.objects.filter(self._changed_filter()).order_by("id")
+            for platform in platforms.iterator(chunk_size=self.chunk_size):
+                writer.write(platform_data(platform))
+
+        self._write_summary("Platforms", writer, profiler)
+
+    def _export_snapshot(self) -> None:
+        self.stdout.write("> Exporting Games and Platforms")
+
+        filename = os.path.join(self.output_dir, "catalog{}".format(FILE_EXTENSIONS[FORMAT_SQLITE]))
+        with TimeProfiler(use_performance_counter=True) as profiler:
+            with SqliteSnapshotWriter(filename, using=router.db_for_read(Game)) as snapshot:
+                platforms_count = snapshot.copy(Platform)
+                games_count = snapshot.copy(Game)
+                snapshot.copy(Game.platforms.through)
+
+        self.stdout.write(
+            "\nWritten {} Games and {} Platforms to {} ({:.1f} KB) in {:.2f}s".format(
+                games_count, platforms_count, filename, snapshot.file_size / 1024, profiler.duration
             )
-
-            self.stdout.write(".", ending="")
-            if counter % 50 == 0:
-                self.stdout.write(" {}".format(counter))
-
-        print("\nRead {} Platforms".format(counter))
-
-        with open(filename, "w") as file_handle:
-            json.dump(platforms, file_handle, separators=(",\n", ":"))
-
-        print("Written Platforms to {}", filename)
+        )
+
+    def _writer(self, name: str) -> ExportFileWriter:
+        return ExportFileWriter(os.path.join(self.output_dir, name), self.file_format, self.compression)
+
+    def _write_summary(self, name: str, writer: ExportFileWriter, profiler: TimeProfiler) -> None:
+        duration = max(profiler.duration, 0.001)
+        self.stdout.write(
+            "\nWritten {} {} to {} ({:.1f} KB) in {:.2f}s: {:.0f} items/s".format(
+                writer.items_count,
+                name,
+                writer.filename,
+                writer.file_size / 1024,
+                profiler.duration,
+                writer.items_count / duration,
+            )
+        )
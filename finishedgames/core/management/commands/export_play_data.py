@@ -0,0 +1,75 @@
+import os
+from typing import Any, Dict, cast
+
+from catalogsources.management.helpers import TimeProfiler
+from core.columnar import (
+    TYPECODE_BOOL,
+    TYPECODE_INT16,
+    TYPECODE_INT32,
+    TYPECODE_UINT16,
+    TYPECODE_UINT32,
+    ColumnarWriter,
+)
+from core.models import UserGame
+from core.routers import replica_reads
+from django.core.management.base import BaseCommand, CommandParser
+
+FILENAME = "play_data.columns"
+
+# Source field and column type. Null values are written as 0.
+COLUMNS = {
+    "user_id": ("user_id", TYPECODE_INT32),
+    "game_id": ("game_id", TYPECODE_INT32),
+    "year_finished": ("year_finished", TYPECODE_INT16),
+    "currently_playing": ("currently_playing", TYPECODE_BOOL),
+    "abandoned": ("abandoned", TYPECODE_BOOL),
+    "no_longer_owned": ("no_longer_owned", TYPECODE_BOOL),
+    "minutes_played": ("minutes_played", TYPECODE_INT32),
+    "game_publish_date": ("game__publish_date", TYPECODE_INT16),
+    "game_dlc_or_expansion": ("game__dlc_or_expansion", TYPECODE_BOOL),
+}
+# Dictionary-encoded columns: source field, codes type and dictionary name
+DICTIONARY_COLUMNS = {
+    "platform": ("platform__shortname", TYPECODE_UINT16, "platforms"),
+}
+NAME_COLUMNS = {
+    "game_name": ("game__name", TYPECODE_UINT32, "games"),
+}
+
+
+class Command(BaseCommand):
+    help = "Exports the play data of all users to a columnar file, to load it memory mapped for analysis"
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument("--output-dir", type=str, default=".")
+        parser.add_argument("--names", action="store_true", help="Also export the (dictionary-encoded) game names")
+        parser.add_argument("--chunk-size", type=int, default=5000, help="Rows fetched from the database at a time")
+
+    def handle(self, *args: Any, **options: Dict) -> None:
+        filename = os.path.join(cast(str, options["output_dir"]), FILENAME)
+        dictionary_columns = dict(DICTIONARY_COLUMNS)
+        if options["names"]:
+            dictionary_columns.update(NAME_COLUMNS)
+
+        writer = ColumnarWriter()
+        for name, (_, typecode) in COLUMNS.items():
+            writer.add_column(name, typecode)
+        for name, (_, typecode, dictionary) in dictionary_columns.items():
+            writer.add_column(name, typecode, dictionary=dictionary)
+        fields = [field for field, _ in COLUMNS.values()] + [field for field, _, _ in dictionary_columns.values()]
+
+        self.stdout.write("> Exporting play data")
+        with TimeProfiler(use_performance_counter=True) as profiler:
+            with replica_reads():
+                # Plain tuples, model instances would be most of the time and memory spent
+                rows = UserGame.objects.order_by("user_id", "id").values_list(*fields)
+                for row in rows.iterator(chunk_size=max(cast(int, options["chunk_size"]), 1)):
+                    writer.append(row)
+            writer.write(filename)
+
+        rows_count = len(writer.columns["user_id"])
+        self.stdout.write(
+            "Written {} rows ({} columns) to {} ({:.1f} KB) in {:.2f}s".format(
+                rows_count, len(fields), filename, os.path.getsize(filename) / 1024, profiler.duration
+            )
+        )
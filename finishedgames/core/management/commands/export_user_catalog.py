@@ -1,12 +1,31 @@
 import json
-from typing import Any, Dict, List, Set, Union, cast
-
-from core.models import Game, Platform, UserGame, WishlistedUserGame
+from datetime import datetime  # NOQA: F401
+from typing import Any, Dict, List, Optional, Set, Union, cast
+
+from core.exporters import (
+    FILE_EXTENSIONS,
+    FORMAT_JSON,
+    FORMAT_SQLITE,
+    GAME_FIELDS,
+    SqliteSnapshotWriter,
+    deleted_items,
+    deleted_user_games,
+    game_data,
+    parse_since,
+    platform_data,
+    platform_ids_by_game_id,
+    user_catalog_games_filter,
+)
+from core.models import Game, Platform, Tombstone, UserGame, WishlistedUserGame
+from core.routers import replica_reads
 from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.core.management.base import BaseCommand, CommandParser
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+from django.db import router
+from django.db.models import Q
+from django.utils import timezone
 
-COUNTER_NEWLINE_AFTER_AMOUNT = 250
+USER_GAME_FIELDS = ["game", "platform", "currently_playing", "year_finished", "abandoned", "minutes_played"]
 
 
 class Command(BaseCommand):
@@ -14,9 +33,45 @@ class Command(BaseCommand):
 
     def add_arguments(self, parser: CommandParser) -> None:
         parser.add_argument("username", type=str)
+        parser.add_argument(
+            "--format",
+            choices=[FORMAT_JSON, FORMAT_SQLITE],
+            default=FORMAT_JSON,
+            help="'sqlite' writes a single database file with the user data tables and indexes",
+        )
+        parser.add_argument(
+            "--since",
+            type=str,
+            default=None,
+            help="Only items changed since this date or date and time (ISO 8601), plus tombstones of the deleted ones",
+        )
 
     def handle(self, *args: Any, **options: Dict) -> None:
-        username = cast(str, options["username"])
+        since = cast(Optional[str], options["since"])
+        # Taken before reading, so changes done meanwhile are also in the next delta
+        export_start = timezone.now()
+
+        try:
+            self.since = parse_since(since) if since else None  # type: Optional[datetime]
+        except ValueError as error:
+            raise CommandError(str(error))
+
+        if options["format"] == FORMAT_SQLITE:
+            if since:
+                raise CommandError("SQLite snapshots are always full")
+            with replica_reads():
+                self._export_snapshot(cast(str, options["username"]))
+            return
+
+        with replica_reads():
+            self._export(cast(str, options["username"]))
+
+        print("To export later changes use --since {}".format(export_start.isoformat()))
+
+    def _changed_filter(self) -> Q:
+        return Q(modified_at__gte=self.since) if self.since else Q()
+
+    def _export(self, username: str) -> None:
         user = get_user_model().objects.get(username=username)
 
         self._export_user_data(user)
@@ -32,6 +87,45 @@ class Command(BaseCommand):
 
         print("\n> Export finished")
 
+    def _export_snapshot(self, username: str) -> None:
+        user_model = get_user_model()
+        user = user_model.objects.get(username=username)
+        self.stdout.write("> Exporting data from '{}'".format(user.username))
+
+        filename = "user_{}{}".format(user.id, FILE_EXTENSIONS[FORMAT_SQLITE])
+        games_sql, games_params = (
+            Game.objects.filter(user_catalog_games_filter(user.id)).values("id").query.sql_with_params()
+        )
+        games_table = "{}.{}".format(SqliteSnapshotWriter.SCHEMA, Game._meta.db_table)
+
+        with SqliteSnapshotWriter(filename, using=router.db_for_read(UserGame)) as snapshot:
+            snapshot.copy(user_model, "id = %s", [user.id])
+            # Same user data as the JSON export: only the id and username
+            snapshot.reset(
+                user_model,
+                [
+                    field.name
+                    for field in user_model._meta.concrete_fields
+                    if not field.primary_key and field.name != user_model.USERNAME_FIELD
+                ],
+            )
+            # Referenced tables first, as foreign keys need them to exist
+            snapshot.copy(Platform)
+            # Same games as the JSON export: catalog and wishlisted ones and their parents (which can be DLCs too)
+            games_count = snapshot.copy(Game, "id IN ({})".format(games_sql), games_params)
+            missing_parents_filter = "id IN (SELECT parent_game_id FROM {table}) AND id NOT IN (SELECT id FROM {table})"
+            while True:
+                parents_count = snapshot.insert(Game, missing_parents_filter.format(table=games_table))
+                if not parents_count:
+                    break
+                games_count += parents_count
+            snapshot.copy(Game.platforms.through, "game_id IN (SELECT id FROM {})".format(games_table))
+            snapshot.copy(UserGame, "user_id = %s", [user.id])
+            snapshot.reset(UserGame, ["no_longer_owned"])
+            snapshot.copy(WishlistedUserGame, "user_id = %s", [user.id])
+
+        print("\n> Exported {} Games to '{}' ({:.1f} KB)".format(games_count, filename, snapshot.file_size / 1024))
+
     def _export_user_data(self, user: settings.AUTH_USER_MODEL) -> None:
         self.stdout.write("> Exporting User data from '{}'".format(user.username))
 
@@ -43,135 +137,102 @@ class Command(BaseCommand):
         self._write_to_file(filename="user.json", data=user_data)
 
     def _export_user_games(self, user: settings.AUTH_USER_MODEL) -> None:
-        counter = 0
-        user_games: List[Dict] = []
-
         self.stdout.write("> Exporting User Games")
 
-        for user_game in UserGame.objects.filter(user=user):
-            counter += 1
-
-            user_games.append(
-                {
-                    "game_id": user_game.game.id,
-                    "platform_id": user_game.platform.id,
-                    "currently_playing": user_game.currently_playing,
-                    "finished": user_game.finished,
-                    # Not exporting: `no_longer_owned`
-                    "year_finished": user_game.year_finished,
-                    "abandoned": user_game.abandoned,
-                    "minutes_played": user_game.minutes_played,
-                }
-            )
-
-            if counter % COUNTER_NEWLINE_AFTER_AMOUNT == 0:
-                self.stdout.write("{}".format(counter))
-
-        print("\nRead {} User Games".format(counter))
+        user_games: List[Dict] = deleted_user_games(UserGame, user.id, self.since) if self.since else []
+        user_games += [
+            {
+                "game_id": user_game.game_id,
+                "platform_id": user_game.platform_id,
+                "currently_playing": user_game.currently_playing,
+                "finished": user_game.finished,
+                # Not exporting: `no_longer_owned`
+                "year_finished": user_game.year_finished,
+                "abandoned": user_game.abandoned,
+                "minutes_played": user_game.minutes_played,
+            }
+            for user_game in UserGame.objects.filter(self._changed_filter(), user=user)
+            .only(*USER_GAME_FIELDS)
+            .order_by("id")
+        ]
+
+        print("\nRead {} User Games".format(len(user_games)))
 
         self._write_to_file(filename="user_{}_games.json".format(user.id), data=user_games)
 
     def _export_user_wishlisted_games(self, user: settings.AUTH_USER_MODEL) -> None:
-        counter = 0
-        user_games: List[Dict] = []
-
         self.stdout.write("> Exporting User Wishlisted Games")
 
-        for user_game in WishlistedUserGame.objects.filter(user=user):
-            counter += 1
+        user_games: List[Dict] = deleted_user_games(WishlistedUserGame, user.id, self.since) if self.since else []
+        user_games += [
+            {
+                "game_id": game_id,
+                "platform_id": platform_id,
+            }
+            for game_id, platform_id in WishlistedUserGame.objects.filter(self._changed_filter(), user=user)
+            .order_by("id")
+            .values_list("game_id", "platform_id")
+        ]
 
-            user_games.append(
-                {
-                    "game_id": user_game.game.id,
-                    "platform_id": user_game.platform.id,
-                }
-            )
-
-            if counter % COUNTER_NEWLINE_AFTER_AMOUNT == 0:
-                self.stdout.write("{}".format(counter))
-
-        print("\nRead {} User Wishlisted Games".format(counter))
+        print("\nRead {} User Wishlisted Games".format(len(user_games)))
 
         self._write_to_file(filename="user_{}_wishlisted_games.json".format(user.id), data=user_games)
 
     # We could want to export every game in the future (using `Game.objects.all()`)
     def _export_filtered_games(self, user: settings.AUTH_USER_MODEL) -> None:
-        counter = 0
-        games: Dict[str, Dict] = {}
-        parent_game_ids: Set[int] = set()
-
         self.stdout.write("> Exporting Games filtered to '{}'".format(user.username))
 
-        for user_game in UserGame.objects.filter(user=user):
-            counter = self._add_user_game(user_game.game, games, counter, parent_game_ids)
+        # Resolved by the database
+        games_filter = user_catalog_games_filter(user.id)
 
-        for wishlisted_user_game in WishlistedUserGame.objects.filter(user=user):
-            counter = self._add_user_game(wishlisted_user_game.game, games, counter, parent_game_ids)
+        if self.since:
+            # Changed games, plus the ones of changed user games (e.g. just added) as they might be new to the export
+            changed_catalog_games_filter = Q(
+                id__in=UserGame.objects.filter(self._changed_filter(), user=user).values("game_id")
+            ) | Q(id__in=WishlistedUserGame.objects.filter(self._changed_filter(), user=user).values("game_id"))
+            games_filter = (games_filter & self._changed_filter()) | changed_catalog_games_filter
 
-        old_parent_game_ids_length = len(parent_game_ids)
+        games: Dict[int, Game] = {game.id: game for game in Game.objects.filter(games_filter).only(*GAME_FIELDS)}
 
-        for game in Game.objects.filter(id__in=parent_game_ids):
-            counter = self._add_user_game(game, games, counter, parent_game_ids)
+        # A parent game being itself a DLC is rare, so usually no extra queries (nor for deltas, parents of changed
+        # games are usually also in the user catalog)
+        missing_game_ids = self._missing_parent_game_ids(games)
+        while missing_game_ids:
+            games.update({game.id: game for game in Game.objects.filter(id__in=missing_game_ids).only(*GAME_FIELDS)})
+            games_filter |= Q(id__in=missing_game_ids)
+            missing_game_ids = self._missing_parent_game_ids(games)
 
-        # hierarchy is only DLC -> parent game, so only need to do this once
-        if len(parent_game_ids) > old_parent_game_ids_length:
-            for game in Game.objects.filter(id__in=parent_game_ids):
-                counter = self._add_user_game(game, games, counter, parent_game_ids)
+        platform_ids = platform_ids_by_game_id(Game.objects.filter(games_filter).values("id"))
 
         print("\nRead {} Games".format(len(games)))
 
-        self._write_to_file(filename="games.json", data=list(games.values()))
+        games_data: List[Dict] = []
+        if self.since:
+            # Deleting a game also deletes the user games, so their tombstones tell which ones were from the user
+            user_game_ids = Tombstone.objects.filter(user_id=user.id, deleted_at__gte=self.since).values("game_id")
+            games_data = deleted_items(Game, self.since, object_ids=user_game_ids)
+        games_data += [game_data(games[game_id], platform_ids.get(game_id, [])) for game_id in sorted(games.keys())]
 
-    def _export_platforms(self) -> None:
-        counter = 0
-        platforms: List[Dict] = []
+        self._write_to_file(filename="games.json", data=games_data)
 
+    def _export_platforms(self) -> None:
         self.stdout.write("> Reading Platforms")
 
-        for platform in Platform.objects.all():
-            counter += 1
+        platforms: List[Dict] = deleted_items(Platform, self.since) if self.since else []
+        platforms += [
+            platform_data(platform) for platform in Platform.objects.filter(self._changed_filter()).order_by("id")
+        ]
 
-            platforms.append(
-                {
-                    "id": platform.id,
-                    "name": platform.name,
-                    "shortname": platform.shortname,
-                    "publish_date": platform.publish_date,
-                }
-            )
-
-            if counter % 50 == 0:
-                self.stdout.write("{}".format(counter))
-
-        print("\nRead {} Platforms".format(counter))
+        print("\nRead {} Platforms".format(len(platforms)))
 
         self._write_to_file(filename="platforms.json", data=platforms)
 
-    def _add_user_game(self, game: Game, games_list: Dict[str, Dict], counter: int, parent_game_ids: Set[int]) -> int:
-        if game.id in games_list:
-            return counter
-
-        counter += 1
-
-        games_list[game.id] = {
-            "id": game.id,
-            "name": game.name,
-            "publish_date": game.publish_date,
-            "dlc_or_expansion": game.dlc_or_expansion,
-            "platforms": [platform.id for platform in game.platforms.only("id")],
-            "parent_game": game.parent_game.id if game.parent_game else None,
-            "urls": game.urls_dict,
-            "name_for_search": game.name_for_search,
+    @staticmethod
+    def _missing_parent_game_ids(games: Dict[int, Game]) -> Set[int]:
+        return {
+            game.parent_game_id for game in games.values() if game.parent_game_id and game.parent_game_id not in games
         }
 
-        if game.parent_game:
-            parent_game_ids.add(game.parent_game.id)
-
-        if counter % COUNTER_NEWLINE_AFTER_AMOUNT == 0:
-            self.stdout.write("{}".format(counter))
-
-        return counter
-
     @staticmethod
     def _write_to_file(filename: str, data: Union[Dict, List, Set]) -> None:
         with open(filename, "w") as file_handle:
@@ -0,0 +1,356 @@
+import json
+import os
+from typing import Any, Dict, Iterable, Iterator, List, Set, Type, Union, cast
+
+from catalogsources.management.helpers import TimeProfiler
+from core.exporters import find_export_file, read_export_file
+from core.helpers import sort_name
+from core.models import Game, Platform, UserGame, WishlistedUserGame
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+from django.core.management.color import no_style
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Q
+
+PLATFORM_UPDATE_FIELDS = ["name", "shortname", "publish_date", "modified_at"]
+# `cover` is not exported, so existing covers are kept
+GAME_UPDATE_FIELDS = [
+    "name",
+    "publish_date",
+    "dlc_or_expansion",
+    "parent_game",
+    "urls",
+    "name_for_search",
+    "modified_at",
+]
+USER_GAME_FIELDS = ["currently_playing", "year_finished", "abandoned", "minutes_played"]
+USER_GAME_UPDATE_FIELDS = ["game_sort_name", "platform_sort_name", "modified_at"]
+
+
+class Command(BaseCommand):
+    help = (
+        "Imports Games and Platforms exported by `export_catalog` or `export_user_catalog` (plus the User catalog if "
+        "present), keeping their ids. Deletions of delta exports are applied too."
+    )
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument("directory", type=str, nargs="?", default=".", help="Where the exported files are")
+        parser.add_argument(
+            "--upsert",
+            action="store_true",
+            help="Merge into a non-empty catalog, updating the items with the same id",
+        )
+        parser.add_argument("--chunk-size", type=int, default=1000, help="Items inserted per transaction")
+
+    def handle(self, *args: Any, **options: Dict) -> None:
+        directory = cast(str, options["directory"])
+        self.upsert = cast(bool, options["upsert"])
+        self.chunk_size = max(cast(int, options["chunk_size"]), 1)
+        self.skipped_game_ids = set()  # type: Set[int]
+        self.orphan_game_ids = []  # type: List[int]
+
+        platforms_filename = find_export_file(directory, "platforms")
+        games_filename = find_export_file(directory, "games")
+        if platforms_filename is None or games_filename is None:
+            raise CommandError("No exported games and platforms found at '{}'".format(directory))
+
+        if not self.upsert and (Platform.objects.exists() or Game.objects.exists()):
+            raise CommandError("The catalog is not empty, use --upsert to merge into it")
+
+        try:
+            self._import_platforms(platforms_filename)
+            self._import_games(games_filename)
+            if os.path.isfile(os.path.join(directory, "user.json")):
+                self._import_user_catalog(directory)
+        except (ValueError, IntegrityError) as error:
+            raise CommandError(str(error))
+
+        self._reset_sequences()
+
+    def _import_platforms(self, filename: str) -> None:
+        self.stdout.write("> Importing Platforms from '{}'".format(filename))
+
+        with TimeProfiler(use_performance_counter=True) as profiler:
+            items = list(read_export_file(filename))
+            deleted_ids = [item["id"] for item in items if item.get("deleted")]
+            platforms = [
+                Platform(
+                    id=item["id"], name=item["name"], shortname=item["shortname"], publish_date=item["publish_date"]
+                )
+                for item in items
+                if not item.get("deleted")
+            ]
+            with transaction.atomic():
+                # Tombstones of delta exports
+                if deleted_ids:
+                    Platform.objects.filter(id__in=deleted_ids).delete()
+                if self.upsert:
+                    skipped_ids = self._conflicting_ids(Platform, platforms, ["name", "shortname"])
+                    platforms = [platform for platform in platforms if platform.id not in skipped_ids]
+                    self._upsert(Platform, platforms, PLATFORM_UPDATE_FIELDS, "shortname", "platform_sort_name")
+                    if skipped_ids:
+                        self.stdout.write(
+                            self.style.WARNING(
+                                "Skipped {} Platforms whose name or shortname exists with another id, their games "
+                                "won't be linked to them".format(len(skipped_ids))
+                            )
+                        )
+                else:
+                    Platform.objects.bulk_create(platforms, batch_size=self.chunk_size)
+
+        # Also used to ignore relations to platforms not imported
+        self.platform_sort_names = {
+            platform_id: sort_name(shortname)
+            for platform_id, shortname in Platform.objects.values_list("id", "shortname")
+        }
+
+        self._write_summary("Platforms", len(platforms), profiler, len(deleted_ids))
+
+    def _import_games(self, filename: str) -> None:
+        self.stdout.write("> Importing Games from '{}'".format(filename))
+
+        existing_ids = set(Game.objects.values_list("id", flat=True)) if self.upsert else set()
+        imported_count = 0
+        deleted_count = 0
+
+        with TimeProfiler(use_performance_counter=True) as profiler:
+            for items in self._chunks(self._parents_first(read_export_file(filename), existing_ids)):
+                deleted_ids = [item["id"] for item in items if item.get("deleted")]
+                with transaction.atomic():
+                    if deleted_ids:
+                        Game.objects.filter(id__in=deleted_ids).delete()
+                    imported_count += self._import_games_chunk([item for item in items if not item.get("deleted")])
+                deleted_count += len(deleted_ids)
+                self.stdout.write(" {}".format(imported_count))
+
+        if self.skipped_game_ids:
+            self.stdout.write(
+                self.style.WARNING(
+                    "Skipped {} Games whose name exists with another id (or DLCs of them)".format(
+                        len(self.skipped_game_ids)
+                    )
+                )
+            )
+        if self.orphan_game_ids:
+            self.stdout.write(
+                self.style.WARNING(
+                    "Skipped {} DLCs whose parent game is missing: {}".format(
+                        len(self.orphan_game_ids), self.orphan_game_ids
+                    )
+                )
+            )
+
+        self._write_summary("Games", imported_count, profiler, deleted_count)
+
+    def _parents_first(self, items: Iterable[Dict[str, Any]], existing_ids: Set[int]) -> Iterator[Dict[str, Any]]:
+        # DLCs coming before their parent game wait for it, so every chunk only references already imported games
+        seen_ids = existing_ids
+        waiting_dlcs = {}  # type: Dict[int, List[Dict[str, Any]]]
+
+        for item in items:
+            parent_id = item.get("parent_game")
+            if parent_id is not None and parent_id not in seen_ids:
+                waiting_dlcs.setdefault(parent_id, []).append(item)
+                continue
+
+            ready = [item]
+            while ready:
+                game_item = ready.pop()
+                seen_ids.add(game_item["id"])
+                yield game_item
+                ready.extend(waiting_dlcs.pop(game_item["id"], []))
+
+        self.orphan_game_ids = sorted(item["id"] for dlcs in waiting_dlcs.values() for item in dlcs)
+
+    def _import_games_chunk(self, items: List[Dict[str, Any]]) -> int:
+        games = [self._build_game(item) for item in items]
+
+        skipped_ids = self._conflicting_ids(Game, games, ["name"]) if self.upsert else set()
+        # Parents always come first, so their DLCs are skipped too
+        for game in games:
+            if game.id in skipped_ids or game.parent_game_id in self.skipped_game_ids:
+                self.skipped_game_ids.add(game.id)
+
+        platform_ids = {
+            item["id"]: [platform_id for platform_id in item["platforms"] if platform_id in self.platform_sort_names]
+            for item in items
+            if item["id"] not in self.skipped_game_ids
+        }
+        games = [game for game in games if game.id in platform_ids]
+
+        if self.upsert:
+            self._upsert(Game, games, GAME_UPDATE_FIELDS, "name", "game_sort_name")
+            # Like the game fields, platforms are replaced
+            Game.platforms.through.objects.filter(game_id__in=platform_ids.keys()).delete()
+        else:
+            Game.objects.bulk_create(games)
+
+        Game.platforms.through.objects.bulk_create(
+            [
+                Game.platforms.through(game_id=game_id, platform_id=platform_id)
+                for game_id, game_platform_ids in platform_ids.items()
+                for platform_id in game_platform_ids
+            ]
+        )
+
+        return len(games)
+
+    @staticmethod
+    def _build_game(item: Dict[str, Any]) -> Game:
+        game = Game(
+            id=item["id"],
+            name=item["name"],
+            publish_date=item["publish_date"],
+            dlc_or_expansion=item["dlc_or_expansion"],
+            parent_game_id=item["parent_game"],
+            name_for_search=item.get("name_for_search") or Game.clean_name_for_search(item["name"]),
+        )
+        for display_name, url in item.get("urls", {}).items():
+            game.upsert_url(display_name, url)
+        return game
+
+    @staticmethod
+    def _conflicting_ids(
+        model: Union[Type[Game], Type[Platform]], instances: List[Any], unique_fields: List[str]
+    ) -> Set[int]:
+        """Ids of the instances with a unique field value already taken by another item."""
+        ids = [instance.id for instance in instances]
+        taken_values_filter = Q()
+        for field in unique_fields:
+            taken_values_filter |= Q(**{"{}__in".format(field): [getattr(instance, field) for instance in instances]})
+        taken_values = {
+            value
+            for row in model.objects.filter(taken_values_filter).exclude(id__in=ids).values_list(*unique_fields)
+            for value in row
+        }
+
+        return {
+            instance.id
+            for instance in instances
+            if any(getattr(instance, field) in taken_values for field in unique_fields)
+        }
+
+    @staticmethod
+    def _upsert(
+        model: Union[Type[Game], Type[Platform]],
+        instances: List[Any],
+        update_fields: List[str],
+        sort_field: str,
+        user_games_sort_field: str,
+    ) -> None:
+        ids = [instance.id for instance in instances]
+        loaded_values = dict(model.objects.filter(id__in=ids).values_list("id", sort_field))
+
+        model.objects.bulk_create(instances, update_conflicts=True, unique_fields=["id"], update_fields=update_fields)
+
+        # As `save()` does upon renames, which `bulk_create` skips. Renames are rare, so one update each is fine.
+        for instance in instances:
+            value = getattr(instance, sort_field)
+            if instance.id in loaded_values and loaded_values[instance.id] != value:
+                for user_games_model in (UserGame, WishlistedUserGame):
+                    user_games_model.objects.filter(**{"{}_id".format(model._meta.model_name): instance.id}).update(
+                        **{user_games_sort_field: sort_name(value)}
+                    )
+
+    def _import_user_catalog(self, directory: str) -> None:
+        with open(os.path.join(directory, "user.json"), "r", encoding="utf-8") as file_handle:
+            user_data = json.load(file_handle)
+
+        self.stdout.write("> Importing User catalog of '{}'".format(user_data["username"]))
+
+        user_model = get_user_model()
+        user = user_model.objects.filter(username=user_data["username"]).first()
+        if user is None:
+            # Without password, it can be set from the admin
+            user = user_model.objects.create_user(username=user_data["username"])
+
+        for model, name, label, fields in (
+            (UserGame, "games", "User Games", USER_GAME_FIELDS),
+            (WishlistedUserGame, "wishlisted_games", "User Wishlisted Games", []),
+        ):
+            filename = find_export_file(directory, "user_{}_{}".format(user_data["id"], name))
+            if filename is not None:
+                self._import_user_games(model, user, filename, label, fields)
+
+    def _import_user_games(
+        self,
+        model: Type[Union[UserGame, WishlistedUserGame]],
+        user: settings.AUTH_USER_MODEL,
+        filename: str,
+        label: str,
+        fields: List[str],
+    ) -> None:
+        self.stdout.write("> Importing {} from '{}'".format(label, filename))
+
+        imported_count = 0
+        deleted_count = 0
+        with TimeProfiler(use_performance_counter=True) as profiler:
+            for items in self._chunks(read_export_file(filename)):
+                deleted_filter = Q()
+                for item in items:
+                    if item.get("deleted"):
+                        deleted_filter |= Q(game_id=item["game_id"], platform_id=item["platform_id"])
+                        deleted_count += 1
+                items = [item for item in items if not item.get("deleted")]
+
+                game_sort_names = {
+                    game_id: sort_name(name)
+                    for game_id, name in Game.objects.filter(id__in=[item["game_id"] for item in items]).values_list(
+                        "id", "name"
+                    )
+                }
+                user_games = [
+                    model(
+                        user=user,
+                        game_id=item["game_id"],
+                        platform_id=item["platform_id"],
+                        game_sort_name=game_sort_names[item["game_id"]],
+                        platform_sort_name=self.platform_sort_names[item["platform_id"]],
+                        **{field: item[field] for field in fields},
+                    )
+                    for item in items
+                    if item["game_id"] in game_sort_names and item["platform_id"] in self.platform_sort_names
+                ]
+
+                with transaction.atomic():
+                    if deleted_filter:
+                        model.objects.filter(deleted_filter, user=user).delete()
+                    if self.upsert:
+                        model.objects.bulk_create(
+                            user_games,
+                            update_conflicts=True,
+                            unique_fields=["user", "game", "platform"],
+                            update_fields=fields + USER_GAME_UPDATE_FIELDS,
+                        )
+                    else:
+                        model.objects.bulk_create(user_games)
+                imported_count += len(user_games)
+
+        self._write_summary(label, imported_count, profiler, deleted_count)
+
+    def _chunks(self, items: Iterable[Dict[str, Any]]) -> Iterator[List[Dict[str, Any]]]:
+        chunk = []  # type: List[Dict[str, Any]]
+        for item in items:
+            chunk.append(item)
+            if len(chunk) == self.chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+    @staticmethod
+    def _reset_sequences() -> None:
+        # Inserting explicit ids doesn't advance the id sequences of databases that have them (SQLite doesn't)
+        sequence_reset_sql = connection.ops.sequence_reset_sql(no_style(), [Platform, Game])
+        with connection.cursor() as cursor:
+            for sql in sequence_reset_sql:
+                cursor.execute(sql)
+
+    def _write_summary(self, name: str, count: int, profiler: TimeProfiler, deleted_count: int) -> None:
+        duration = max(profiler.duration, 0.001)
+        self.stdout.write(
+            "\nImported {} {} (and deleted {}) in {:.2f}s: {:.0f} items/s".format(
+                count, name, deleted_count, profiler.duration, (count + deleted_count) / duration
+            )
+        )
@@ -1,87 +1,174 @@
+import csv
 import os
-from typing import Any, cast, Dict
+from typing import Any, Dict, Iterator, List, Optional, Tuple, cast
 
+from core.helpers import sort_name
 from core.models import UserGame
-from django.core.management.base import BaseCommand, CommandParser
+from core.playtime_history import SOURCE_FILES, PlaytimeChange, record_playtime_changes  # NOQA: F401
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+# First columns of the optional header row of CSV/TSV files
+CSV_HEADER = ["name", "playtime"]
+
+# (id, platform sort name, minutes played) of the user games with a given game sort name
+UserGameIndex = Dict[str, List[Tuple[int, str, int]]]
 
 
 class Command(BaseCommand):
     help = "Imports playtime from files for specified user"
 
     def add_arguments(self, parser: CommandParser) -> None:
-        parser.add_argument("names_file", type=str, help="File with game names (one per line)")
-        parser.add_argument("times_file", type=str, help="File with playtimes in hours (one per line)")
+        parser.add_argument(
+            "files",
+            type=str,
+            nargs="+",
+            help=(
+                "Either a file with game names (one per line) and a file with playtimes in hours (one per line), "
+                "or a single CSV (TSV if the extension is .tsv) file with name, playtime and optionally platform "
+                "shortname columns, to disambiguate games owned on several platforms"
+            ),
+        )
         parser.add_argument("user_id", type=int, help="Finished Games user ID")
-        parser.add_argument("--additive", action="store_true", default=False, help="Add playtime (in minutes) to existing value instead of replacing")
+        parser.add_argument(
+            "--additive",
+            action="store_true",
+            default=False,
+            help="Add playtime (in minutes) to existing value instead of replacing",
+        )
 
     def handle(self, *args: Any, **options: Dict) -> None:
-        names_file = cast(str, options["names_file"])
-        times_file = cast(str, options["times_file"])
+        files = cast(List[str], options["files"])
         user_id = cast(int, options["user_id"])
         additive = cast(bool, options["additive"])
 
-        playtime_dict = self._load_playtime_data(names_file, times_file, additive)
-        self._update_user_games(user_id, playtime_dict, additive)
-
-    def _load_playtime_data(self, names_file: str, times_file: str, additive: bool = False) -> Dict[str, int]:
-        """Load game names and playtimes from files and return a dictionary."""
-        game_names = []
-        playtimes = []
-
-        if not os.path.isfile(names_file):
-            self.stderr.write(f"Names file '{names_file}' not found.")
-            return {}
-        if not os.path.isfile(times_file):
-            self.stderr.write(f"Times file '{times_file}' not found.")
-            return {}
-
-        with open(names_file, "r", encoding="utf-8") as f:
-            game_names = [line.strip() for line in f.readlines()]
-
-        with open(times_file, "r", encoding="utf-8") as f:
-            playtimes = [line.strip() for line in f.readlines()]
-
-        playtime_dict: Dict[str, int] = {}
-        for name, time_str in zip(game_names, playtimes):
+        if len(files) > 2:
+            raise CommandError("Expected either a names file and a times file, or a single CSV/TSV file")
+        for filename in files:
+            if not os.path.isfile(filename):
+                self.stderr.write(f"File '{filename}' not found.")
+                return
+
+        user_games_index = self.load_user_games_index(user_id)
+        playtimes = self.resolve_playtimes(self.read_files(files), user_games_index, additive)
+        self._update_user_games(user_id, playtimes, additive)
+
+    @staticmethod
+    def load_user_games_index(user_id: int) -> UserGameIndex:
+        """Whole catalog of the user by lowercased name, from the denormalized sort columns (so without joins)."""
+        user_games_index = {}  # type: UserGameIndex
+        user_games = UserGame.objects.filter(user_id=user_id).values_list(
+            "id", "game_sort_name", "platform_sort_name", "minutes_played"
+        )
+        for user_game_id, game_sort_name, platform_sort_name, minutes_played in user_games.iterator():
+            user_games_index.setdefault(game_sort_name, []).append((user_game_id, platform_sort_name, minutes_played))
+        return user_games_index
+
+    @classmethod
+    def read_files(cls, files: List[str]) -> Iterator[Tuple[str, str, Optional[str]]]:
+        """(name, playtime, optional platform) rows of either the names and times files or the CSV/TSV file."""
+        return cls._read_csv_file(files[0]) if len(files) == 1 else cls._read_names_and_times_files(*files)
+
+    @staticmethod
+    def _read_names_and_times_files(names_file: str, times_file: str) -> Iterator[Tuple[str, str, Optional[str]]]:
+        with open(names_file, "r", encoding="utf-8") as names, open(times_file, "r", encoding="utf-8") as times:
+            for name, time_str in zip(names, times):
+                yield name.strip(), time_str.strip(), None
+
+    @staticmethod
+    def _read_csv_file(filename: str) -> Iterator[Tuple[str, str, Optional[str]]]:
+        delimiter = "\t" if filename.lower().endswith(".tsv") else ","
+        with open(filename, "r", encoding="utf-8", newline="") as file_handle:
+            for line_number, row in enumerate(csv.reader(file_handle, delimiter=delimiter)):
+                if not row or (line_number == 0 and [value.strip().lower() for value in row[:2]] == CSV_HEADER):
+                    continue
+                name = row[0].strip()
+                time_str = row[1].strip() if len(row) > 1 else ""
+                platform = row[2].strip() if len(row) > 2 and row[2].strip() else None
+                yield name, time_str, platform
+
+    def resolve_playtimes(
+        self, rows: Iterator[Tuple[str, str, Optional[str]]], user_games_index: UserGameIndex, additive: bool = False
+    ) -> Dict[int, Tuple[str, int, int]]:
+        """
+        Matches each row against the user games index, returning (name, new minutes, current minutes) by user game id.
+        """
+        playtimes = {}  # type: Dict[int, Tuple[str, int, int]]
+
+        for name, time_str, platform in rows:
             if not time_str:
                 self.stdout.write(f"{name} : empty playtime value, skipping")
                 continue
             if not name:
-                self.stdout.write(self.style.WARNING(f"Empty game name, skipping"))
+                self.stdout.write(self.style.WARNING("Empty game name, skipping"))
                 continue
 
             try:
                 value = float(time_str)
-                if additive:
-                    # directly comes in minutes
-                    playtime_dict[name] = int(value)
-                else:
-                    # comes in hours and we want minutes
-                    playtime_dict[name] = int(value * 60)
             except ValueError:
                 self.stdout.write(self.style.WARNING(f"{name} : invalid playtime value '{time_str}', skipping"))
+                continue
+            # Additive values directly come in minutes, otherwise in hours
+            minutes = int(value) if additive else int(value * 60)
+
+            candidates = user_games_index.get(sort_name(name), [])
+            if platform is not None:
+                candidates = [candidate for candidate in candidates if candidate[1] == sort_name(platform)]
+            if not candidates:
+                platform_fragment = f" on {platform}" if platform is not None else ""
+                self.stdout.write(self.style.WARNING(f"{name} : game not found for user{platform_fragment}"))
+                continue
+            if len(candidates) > 1:
+                platforms = ", ".join(candidate[1] for candidate in candidates)
+                self.stdout.write(
+                    self.style.WARNING(
+                        f"{name} : ambiguous, owned on several platforms ({platforms}), specify one to update it"
+                    )
+                )
+                continue
 
-        return playtime_dict
+            # As with a single file, the last value of a repeated game wins
+            user_game_id, _, current_minutes = candidates[0]
+            playtimes[user_game_id] = (name, minutes, current_minutes)
 
-    def _update_user_games(self, user_id: int, playtime_dict: Dict[str, int], additive: bool = False) -> None:
-        """Update UserGame records with playtime data."""
-        for game_name, minutes in playtime_dict.items():
-            user_game = UserGame.objects.filter(user_id=user_id, game__name__iexact=game_name).first()
+        return playtimes
 
-            if not user_game:
-                self.stdout.write(self.style.WARNING(f"{game_name} : game not found for user"))
-                continue
+    def _update_user_games(
+        self, user_id: int, playtimes: Dict[int, Tuple[str, int, int]], additive: bool = False
+    ) -> None:
+        """Update UserGame records with playtime data, with a single bulk update (and one of the playtime history)."""
+        now = timezone.now()
+        user_games = []  # type: List[UserGame]
+        # For the playtime history
+        changes = []  # type: List[PlaytimeChange]
 
+        for user_game_id, (game_name, minutes, current_minutes) in playtimes.items():
             if additive:
-                new_minutes = user_game.minutes_played + minutes
-                user_game.minutes_played = new_minutes
-                user_game.save()
-                self.stdout.write(self.style.SUCCESS(f"{game_name} : minutes updated from {user_game.minutes_played - minutes} to {new_minutes}"))
+                # Relative to the stored value, so concurrent changes are not lost
+                user_games.append(
+                    UserGame(id=user_game_id, minutes_played=F("minutes_played") + minutes, modified_at=now)
+                )
+                changes.append((user_id, user_game_id, current_minutes, current_minutes + minutes))
+                self.stdout.write(
+                    self.style.SUCCESS(
+                        f"{game_name} : minutes updated from {current_minutes} to {current_minutes + minutes}"
+                    )
+                )
             else:
-                if user_game.minutes_played >= minutes:
-                    self.stdout.write(f"{game_name} : existing playtime ({user_game.minutes_played}) is greater or equal than {minutes}, skipped")
+                if current_minutes >= minutes:
+                    self.stdout.write(
+                        f"{game_name} : existing playtime ({current_minutes}) is greater or equal than {minutes}, "
+                        "skipped"
+                    )
                     continue
 
-                user_game.minutes_played = minutes
-                user_game.save()
+                user_games.append(UserGame(id=user_game_id, minutes_played=minutes, modified_at=now))
+                changes.append((user_id, user_game_id, current_minutes, minutes))
                 self.stdout.write(self.style.SUCCESS(f"{game_name} : minutes updated to {minutes}"))
+
+        # `auto_now` is not applied by bulk updates, hence setting `modified_at`
+        with transaction.atomic():
+            UserGame.objects.bulk_update(user_games, ["minutes_played", "modified_at"])
+            record_playtime_changes(changes, SOURCE_FILES, observed_at=now)
@@ -0,0 +1,44 @@
+import sqlite3
+import time
+from typing import Any, Dict, cast
+
+from catalogsources.management.helpers import TimeProfiler
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+class Command(BaseCommand):
+    help = "Copies the default SQLite database into the READ_REPLICA_DATABASE one, using the SQLite backup API"
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument("--every", type=int, default=0, help="Keep refreshing every given seconds, 0 to run once")
+
+    def handle(self, *args: Any, **options: Dict) -> None:
+        replica_alias = settings.READ_REPLICA_DATABASE
+        if not replica_alias:
+            raise CommandError("No READ_REPLICA_DATABASE configured")
+
+        source = connections[DEFAULT_DB_ALIAS]
+        if source.vendor != "sqlite" or connections[replica_alias].vendor != "sqlite":
+            raise CommandError("Only SQLite databases can be copied, other databases have their own replication")
+
+        every = cast(int, options["every"])
+        while True:
+            self._refresh(source, settings.DATABASES[replica_alias]["NAME"])
+            if every < 1:
+                break
+            time.sleep(every)
+
+    def _refresh(self, source: Any, replica_filename: str) -> None:
+        source.ensure_connection()
+        with TimeProfiler(use_performance_counter=True) as profiler:
+            # Readers of the replica wait (up to their busy timeout) while pages are copied, but always see a consistent
+            # snapshot of the primary
+            destination = sqlite3.connect(replica_filename)
+            try:
+                source.connection.backup(destination)
+            finally:
+                destination.close()
+
+        self.stdout.write("> Read replica refreshed in {:.2f}s".format(profiler.duration))
@@ -1,5 +1,6 @@
 from core.constants import DLC_DEFAULT_MINUTES_PLAYED
 from core.models import UserGame, WishlistedUserGame
+from core.playtime_history import SOURCE_WEB, record_playtime_changes
 from django.conf import settings
 
 
@@ -31,6 +32,8 @@ class CatalogManager:
             user_game.minutes_played = DLC_DEFAULT_MINUTES_PLAYED
             update_fields.append("minutes_played")
         user_game.save(update_fields=update_fields)
+        if "minutes_played" in update_fields:
+            record_playtime_changes([(user_game.user_id, user_game.id, 0, user_game.minutes_played)], SOURCE_WEB)
 
 
     @staticmethod
@@ -101,5 +104,9 @@ class CatalogManager:
     @staticmethod
     def update_minutes_played(user: settings.AUTH_USER_MODEL, user_game_id: int, minutes_played: int) -> None:
         user_game = UserGame.objects.get(user=user, id=user_game_id)
+        previous_minutes_played = user_game.minutes_played
         user_game.minutes_played = minutes_played
         user_game.save(update_fields=["minutes_played"])
+        record_playtime_changes(
+            [(user_game.user_id, user_game.id, previous_minutes_played, minutes_played)], SOURCE_WEB
+        )
@@ -0,0 +1,28 @@
+# Generated by Django 6.0.7 on 2026-10-19 18:21
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0009_usergame_minutes_played"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="game",
+            index=models.Index(django.db.models.functions.text.Lower("name"), name="core_game_lower_name_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="platform",
+            index=models.Index(django.db.models.functions.text.Lower("name"), name="core_platform_lower_name_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="platform",
+            index=models.Index(
+                django.db.models.functions.text.Lower("shortname"), name="core_platform_lower_short_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,95 @@
+# Generated by Django 6.0.7 on 2026-10-19 18:24
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def populate_sort_names(apps, _):
+    Game = apps.get_model("core", "Game")
+    Platform = apps.get_model("core", "Platform")
+
+    # Same normalization as `core.helpers.sort_name()`
+    game_sort_names = {game_id: name.lower() for game_id, name in Game.objects.values_list("id", "name")}
+    platform_sort_names = {
+        platform_id: shortname.lower() for platform_id, shortname in Platform.objects.values_list("id", "shortname")
+    }
+
+    for model_name in ("UserGame", "WishlistedUserGame"):
+        model = apps.get_model("core", model_name)
+        user_games = list(model.objects.only("id", "game_id", "platform_id"))
+        for user_game in user_games:
+            user_game.game_sort_name = game_sort_names[user_game.game_id]
+            user_game.platform_sort_name = platform_sort_names[user_game.platform_id]
+        model.objects.bulk_update(user_games, ["game_sort_name", "platform_sort_name"], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0010_lower_name_indexes"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="usergame",
+            name="game_sort_name",
+            field=models.CharField(default="", editable=False, max_length=200, verbose_name="Game name for sorting"),
+        ),
+        migrations.AddField(
+            model_name="usergame",
+            name="platform_sort_name",
+            field=models.CharField(
+                default="", editable=False, max_length=40, verbose_name="Platform shortname for sorting"
+            ),
+        ),
+        migrations.AddField(
+            model_name="wishlistedusergame",
+            name="game_sort_name",
+            field=models.CharField(default="", editable=False, max_length=200, verbose_name="Game name for sorting"),
+        ),
+        migrations.AddField(
+            model_name="wishlistedusergame",
+            name="platform_sort_name",
+            field=models.CharField(
+                default="", editable=False, max_length=40, verbose_name="Platform shortname for sorting"
+            ),
+        ),
+        migrations.RunPython(populate_sort_names, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name="usergame",
+            index=models.Index(fields=["user", "game_sort_name"], name="core_ug_user_sort_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="usergame",
+            index=models.Index(fields=["user", "platform", "game_sort_name"], name="core_ug_user_plat_sort_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="usergame",
+            index=models.Index(
+                fields=["user", "platform_sort_name", "game_sort_name"], name="core_ug_user_platsort_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="usergame",
+            index=models.Index(
+                fields=["user", "currently_playing", "game_sort_name"], name="core_ug_user_playing_sort_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="usergame",
+            index=models.Index(fields=["user", "abandoned", "game_sort_name"], name="core_ug_user_aband_sort_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="usergame",
+            index=models.Index(fields=["user", "year_finished", "game_sort_name"], name="core_ug_user_year_sort_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="wishlistedusergame",
+            index=models.Index(fields=["user", "game_sort_name"], name="core_wug_user_sort_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="wishlistedusergame",
+            index=models.Index(fields=["user", "platform", "game_sort_name"], name="core_wug_user_plat_sort_idx"),
+        ),
+    ]
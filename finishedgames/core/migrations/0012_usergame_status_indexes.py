@@ -0,0 +1,65 @@
+# Generated by Django 6.0.7 on 2026-10-19 18:26
+
+import django.core.validators
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0011_usergame_sort_names"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="usergame",
+            name="core_ug_user_year_sort_idx",
+        ),
+        migrations.AlterField(
+            model_name="usergame",
+            name="abandoned",
+            field=models.BooleanField(default=False, verbose_name="Abandoned"),
+        ),
+        migrations.AlterField(
+            model_name="usergame",
+            name="currently_playing",
+            field=models.BooleanField(default=False, verbose_name="Currently playing"),
+        ),
+        migrations.AlterField(
+            model_name="usergame",
+            name="no_longer_owned",
+            field=models.BooleanField(default=False, verbose_name="No longer owned"),
+        ),
+        migrations.AlterField(
+            model_name="usergame",
+            name="year_finished",
+            field=models.IntegerField(
+                blank=True,
+                default=None,
+                null=True,
+                validators=[
+                    django.core.validators.MinValueValidator(1970),
+                    django.core.validators.MaxValueValidator(3000),
+                ],
+                verbose_name="Year finished",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="usergame",
+            index=models.Index(
+                condition=models.Q(("year_finished__isnull", False)),
+                fields=["user", "game_sort_name"],
+                name="core_ug_finished_sort_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="usergame",
+            index=models.Index(
+                condition=models.Q(("abandoned", False), ("year_finished__isnull", True)),
+                fields=["user", "game_sort_name"],
+                name="core_ug_pending_sort_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,72 @@
+# Generated by Django 6.0.7 on 2026-10-19 19:03
+
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0012_usergame_status_indexes"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Tombstone",
+            fields=[
+                ("id", models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("model_name", models.CharField(max_length=40, verbose_name="Model name")),
+                ("object_id", models.IntegerField(verbose_name="Object id")),
+                ("user_id", models.IntegerField(default=None, null=True, verbose_name="User id")),
+                ("game_id", models.IntegerField(default=None, null=True, verbose_name="Game id")),
+                ("platform_id", models.IntegerField(default=None, null=True, verbose_name="Platform id")),
+                ("deleted_at", models.DateTimeField(default=django.utils.timezone.now, verbose_name="Deleted at")),
+            ],
+        ),
+        migrations.AddField(
+            model_name="game",
+            name="modified_at",
+            field=models.DateTimeField(auto_now=True, verbose_name="Modified at"),
+        ),
+        migrations.AddField(
+            model_name="platform",
+            name="modified_at",
+            field=models.DateTimeField(auto_now=True, verbose_name="Modified at"),
+        ),
+        migrations.AddField(
+            model_name="usergame",
+            name="modified_at",
+            field=models.DateTimeField(auto_now=True, verbose_name="Modified at"),
+        ),
+        migrations.AddField(
+            model_name="wishlistedusergame",
+            name="modified_at",
+            field=models.DateTimeField(auto_now=True, verbose_name="Modified at"),
+        ),
+        migrations.AddIndex(
+            model_name="game",
+            index=models.Index(fields=["modified_at"], name="core_game_modified_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="platform",
+            index=models.Index(fields=["modified_at"], name="core_platform_modified_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="usergame",
+            index=models.Index(fields=["user", "modified_at"], name="core_ug_user_modified_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="wishlistedusergame",
+            index=models.Index(fields=["user", "modified_at"], name="core_wug_user_modified_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="tombstone",
+            index=models.Index(fields=["model_name", "deleted_at"], name="core_tombstone_model_del_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="tombstone",
+            index=models.Index(fields=["user_id", "model_name", "deleted_at"], name="core_tombstone_user_del_idx"),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 6.0.7 on 2026-10-19 19:23
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0013_modified_at_and_tombstones"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="GameAlias",
+            fields=[
+                ("id", models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("source_id", models.CharField(max_length=50, verbose_name="Source identifier")),
+                ("title", models.CharField(max_length=255, verbose_name="Title at the source")),
+                ("ignored", models.BooleanField(default=False, verbose_name="Ignored")),
+                (
+                    "game",
+                    models.ForeignKey(
+                        blank=True, default=None, null=True, on_delete=django.db.models.deletion.CASCADE, to="core.game"
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name_plural": "Game aliases",
+                "unique_together": {("source_id", "title")},
+            },
+        ),
+    ]
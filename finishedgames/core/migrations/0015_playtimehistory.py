@@ -0,0 +1,44 @@
+# Generated by Django 6.0.7 on 2026-10-19 20:10
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("core", "0014_gamealias"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PlaytimeHistory",
+            fields=[
+                ("id", models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("observed_at", models.DateTimeField(default=django.utils.timezone.now, verbose_name="Observed at")),
+                ("minutes_played", models.IntegerField(verbose_name="Minutes played")),
+                ("minutes_delta", models.IntegerField(verbose_name="Minutes played since the previous point")),
+                ("source", models.CharField(max_length=20, verbose_name="Source identifier")),
+                (
+                    "user",
+                    models.ForeignKey(
+                        db_index=False, on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL
+                    ),
+                ),
+                (
+                    "user_game",
+                    models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to="core.usergame"),
+                ),
+            ],
+            options={
+                "verbose_name_plural": "Playtime history",
+                "indexes": [
+                    models.Index(fields=["user", "observed_at", "minutes_delta"], name="core_pth_user_observed_idx"),
+                    models.Index(fields=["user_game", "observed_at"], name="core_pth_usergame_observed_idx"),
+                ],
+            },
+        ),
+    ]
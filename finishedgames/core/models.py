@@ -1,12 +1,30 @@
-from typing import Any, Dict, cast
+from typing import Any, Dict, Iterable, Optional, cast  # NOQA: F401
 
 from core.constants import UNKNOWN_PUBLISH_DATE, URLS_ITEMS_GLUE, URLS_KEY_VALUE_GLUE
+from core.helpers import alias_title
 from core.helpers import generic_id as generic_id_helper
+from core.helpers import sort_name
 from django.conf import settings
 from django.core.exceptions import ValidationError
 from django.core.validators import MaxValueValidator, MinValueValidator
 from django.db import models
 from django.db.models.functions import Lower
+from django.utils import timezone
+
+
+class ModifiedAtModel(models.Model):
+    # Kept up to date by `save()` (also when saving only some fields) and `bulk_create()`, and for the platforms of a
+    # game by a `m2m_changed` receiver. `QuerySet.update()` calls must set it.
+    modified_at = models.DateTimeField("Modified at", auto_now=True)
+
+    class Meta:
+        abstract = True
+
+    def save(self, *args: Any, **kwargs: Any) -> None:
+        update_fields = kwargs.get("update_fields")  # type: Optional[Iterable[str]]
+        if update_fields is not None:
+            kwargs["update_fields"] = set(update_fields) | {"modified_at"}
+        super().save(*args, **kwargs)
 
 
 class BasePlatform(models.Model):
@@ -20,7 +38,33 @@ class BasePlatform(models.Model):
         abstract = True
 
 
-class Platform(BasePlatform):
+class Platform(BasePlatform, ModifiedAtModel):
+    class Meta:
+        # Listings and autocompletes sort case-insensitively, so index the same expressions to avoid full sorts
+        indexes = [
+            models.Index(Lower("name"), name="core_platform_lower_name_idx"),
+            models.Index(Lower("shortname"), name="core_platform_lower_short_idx"),
+            models.Index(fields=["modified_at"], name="core_platform_modified_idx"),
+        ]
+
+    @classmethod
+    def from_db(cls, db: str, field_names: Iterable[str], values: Iterable[Any]) -> "Platform":
+        instance = super().from_db(db, field_names, values)
+        # Remember loaded value to detect renames upon saving
+        instance._loaded_shortname = instance.__dict__.get("shortname")
+        return cast(Platform, instance)
+
+    def save(self, *args: Any, **kwargs: Any) -> None:
+        renamed = not self._state.adding and getattr(self, "_loaded_shortname", None) != self.shortname
+        super().save(*args, **kwargs)
+        if renamed:
+            new_sort_name = sort_name(self.shortname)
+            for model in (UserGame, WishlistedUserGame):
+                model.objects.filter(platform_id=self.id).exclude(platform_sort_name=new_sort_name).update(
+                    platform_sort_name=new_sort_name
+                )
+        self._loaded_shortname = self.shortname
+
     def __str__(self) -> str:
         return cast(str, self.name)
 
@@ -39,13 +83,20 @@ class BaseGame(models.Model):
         abstract = True
 
 
-class Game(BaseGame):
+class Game(BaseGame, ModifiedAtModel):
     urls = models.CharField("URLs", max_length=2000, blank=True, default="")
     name_for_search = models.CharField(
         "Simplified name for searches", max_length=200, blank=True, default="", db_index=True
     )
     cover = models.CharField("Cover filename", max_length=100, null=True, default=None, blank=True)
 
+    class Meta:
+        # Listings sort by `Lower("name")`, so index the same expression to avoid full sorts
+        indexes = [
+            models.Index(Lower("name"), name="core_game_lower_name_idx"),
+            models.Index(fields=["modified_at"], name="core_game_modified_idx"),
+        ]
+
     @property
     def platforms_list(self) -> str:
         return ", ".join((platform.shortname for platform in self.platforms.order_by(Lower("shortname"))))
@@ -69,9 +120,24 @@ class Game(BaseGame):
             ("{}{}{}".format(key, URLS_KEY_VALUE_GLUE, _urls_dict[key]) for key in _urls_dict.keys())
         )
 
+    @classmethod
+    def from_db(cls, db: str, field_names: Iterable[str], values: Iterable[Any]) -> "Game":
+        instance = super().from_db(db, field_names, values)
+        # Remember loaded value to detect renames upon saving
+        instance._loaded_name = instance.__dict__.get("name")
+        return cast(Game, instance)
+
     def save(self, *args: Any, **kwargs: Any) -> None:
         self.name_for_search = self.clean_name_for_search(self.name)
+        renamed = not self._state.adding and getattr(self, "_loaded_name", None) != self.name
         super().save(*args, **kwargs)
+        if renamed:
+            new_sort_name = sort_name(self.name)
+            for model in (UserGame, WishlistedUserGame):
+                model.objects.filter(game_id=self.id).exclude(game_sort_name=new_sort_name).update(
+                    game_sort_name=new_sort_name
+                )
+        self._loaded_name = self.name
 
     @staticmethod
     def clean_name_for_search(name: str) -> str:
@@ -89,34 +155,81 @@ class Game(BaseGame):
         return "{}{}".format(self.name, dlc_fragment)
 
 
-class BaseUserGame(models.Model):
+class BaseUserGame(ModifiedAtModel):
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, db_index=True)
     game = models.ForeignKey(Game, on_delete=models.CASCADE, db_index=True)
     platform = models.ForeignKey(Platform, on_delete=models.CASCADE, db_index=True)
+    # Denormalized from `game.name` and `platform.shortname`, so listings can sort (and paginate) through an index
+    # instead of joining and sorting all user rows. Kept up to date on insert and upon Game/Platform renames.
+    game_sort_name = models.CharField("Game name for sorting", max_length=200, default="", editable=False)
+    platform_sort_name = models.CharField("Platform shortname for sorting", max_length=40, default="", editable=False)
 
     class Meta:
         abstract = True
         unique_together = (("user", "game", "platform"),)
 
+    @classmethod
+    def from_db(cls, db: str, field_names: Iterable[str], values: Iterable[Any]) -> "BaseUserGame":
+        instance = super().from_db(db, field_names, values)
+        # Remember loaded values to detect game/platform changes upon saving
+        instance._loaded_relation_ids = (instance.__dict__.get("game_id"), instance.__dict__.get("platform_id"))
+        return cast(BaseUserGame, instance)
+
     @property
     def generic_id(self) -> str:
         return generic_id_helper(self.game.id, self.platform.id)
 
+    def save(self, *args: Any, **kwargs: Any) -> None:
+        update_fields = kwargs.get("update_fields")  # type: Optional[Iterable[str]]
+        relation_changed = getattr(self, "_loaded_relation_ids", None) != (self.game_id, self.platform_id)
+
+        if self._state.adding or relation_changed:
+            self.game_sort_name = sort_name(self.game.name)
+            self.platform_sort_name = sort_name(self.platform.shortname)
+            if update_fields is not None:
+                kwargs["update_fields"] = set(update_fields) | {"game_sort_name", "platform_sort_name"}
+
+        super().save(*args, **kwargs)
+        self._loaded_relation_ids = (self.game_id, self.platform_id)
+
 
 class UserGame(BaseUserGame):
-    currently_playing = models.BooleanField("Currently playing", default=False, db_index=True)
+    # Status fields are not indexed on their own (low cardinality), see `Meta.indexes` for the composite ones
+    currently_playing = models.BooleanField("Currently playing", default=False)
     year_finished = models.IntegerField(
         "Year finished",
         null=True,
         default=None,
         blank=True,
         validators=[MinValueValidator(UNKNOWN_PUBLISH_DATE), MaxValueValidator(3000)],
-        db_index=True,
     )
-    no_longer_owned = models.BooleanField("No longer owned", default=False, db_index=True)
-    abandoned = models.BooleanField("Abandoned", default=False, db_index=True)
+    no_longer_owned = models.BooleanField("No longer owned", default=False)
+    abandoned = models.BooleanField("Abandoned", default=False)
     minutes_played = models.IntegerField("Minutes played", default=0, validators=[MinValueValidator(0)])
 
+    class Meta(BaseUserGame.Meta):
+        # Each one matches the filter of a user list view, followed by its default sort key
+        indexes = [
+            models.Index(fields=["user", "game_sort_name"], name="core_ug_user_sort_idx"),
+            models.Index(fields=["user", "platform", "game_sort_name"], name="core_ug_user_plat_sort_idx"),
+            models.Index(fields=["user", "platform_sort_name", "game_sort_name"], name="core_ug_user_platsort_idx"),
+            models.Index(fields=["user", "currently_playing", "game_sort_name"], name="core_ug_user_playing_sort_idx"),
+            models.Index(fields=["user", "abandoned", "game_sort_name"], name="core_ug_user_aband_sort_idx"),
+            models.Index(fields=["user", "modified_at"], name="core_ug_user_modified_idx"),
+            # Partial indexes for the finished and pending lists. Queries must use the same `filter()` conditions (and not
+            # equivalent `exclude()` ones) for SQLite to pick them.
+            models.Index(
+                fields=["user", "game_sort_name"],
+                condition=models.Q(year_finished__isnull=False),
+                name="core_ug_finished_sort_idx",
+            ),
+            models.Index(
+                fields=["user", "game_sort_name"],
+                condition=models.Q(year_finished__isnull=True, abandoned=False),
+                name="core_ug_pending_sort_idx",
+            ),
+        ]
+
     @property
     def finished(self) -> bool:
         return self.year_finished is not None and not self.abandoned
@@ -137,6 +250,13 @@ class UserGame(BaseUserGame):
 
 
 class WishlistedUserGame(BaseUserGame):
+    class Meta(BaseUserGame.Meta):
+        indexes = [
+            models.Index(fields=["user", "game_sort_name"], name="core_wug_user_sort_idx"),
+            models.Index(fields=["user", "platform", "game_sort_name"], name="core_wug_user_plat_sort_idx"),
+            models.Index(fields=["user", "modified_at"], name="core_wug_user_modified_idx"),
+        ]
+
     def __str__(self) -> str:
         return "{}: {} ({})".format(self.user.get_username(), self.game.name, self.platform.shortname)
 
@@ -150,3 +270,82 @@ class WishlistedUserGame(BaseUserGame):
                     )
                 }
             )
+
+
+class Tombstone(models.Model):
+    """
+    Records a deleted `Game`, `Platform`, `UserGame` or `WishlistedUserGame`, so delta exports can report deletions.
+    Not foreign keys, as the referenced rows are usually gone too.
+    """
+
+    model_name = models.CharField("Model name", max_length=40)
+    object_id = models.IntegerField("Object id")
+    user_id = models.IntegerField("User id", null=True, default=None)
+    game_id = models.IntegerField("Game id", null=True, default=None)
+    platform_id = models.IntegerField("Platform id", null=True, default=None)
+    deleted_at = models.DateTimeField("Deleted at", default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["model_name", "deleted_at"], name="core_tombstone_model_del_idx"),
+            models.Index(fields=["user_id", "model_name", "deleted_at"], name="core_tombstone_user_del_idx"),
+        ]
+
+    def __str__(self) -> str:
+        return "{} {} deleted at {}".format(self.model_name, self.object_id, self.deleted_at)
+
+
+class PlaytimeHistory(models.Model):
+    """
+    Minutes played of a user game at a given moment, recorded (in bulk) by the playtime importers and the website only
+    when they change. `minutes_delta` is the change since the previous point, so the playtime of a period is their sum.
+    Old points are merged into daily or monthly ones by `compact_playtime_history`.
+    """
+
+    # Denormalized from the user game, so that aggregations of a user are served by an index without joins
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, db_index=False)
+    user_game = models.ForeignKey(UserGame, on_delete=models.CASCADE, db_index=False)
+    observed_at = models.DateTimeField("Observed at", default=timezone.now)
+    minutes_played = models.IntegerField("Minutes played")
+    minutes_delta = models.IntegerField("Minutes played since the previous point")
+    # e.g. the `SOURCE_ID` of the importer
+    source = models.CharField("Source identifier", max_length=20)
+
+    class Meta:
+        indexes = [
+            # Covering for aggregations of a user by period
+            models.Index(fields=["user", "observed_at", "minutes_delta"], name="core_pth_user_observed_idx"),
+            models.Index(fields=["user_game", "observed_at"], name="core_pth_usergame_observed_idx"),
+        ]
+        verbose_name_plural = "Playtime history"
+
+    def __str__(self) -> str:
+        return "{}: {} minutes at {} ({})".format(self.user_game_id, self.minutes_played, self.observed_at, self.source)
+
+
+class GameAlias(models.Model):
+    """
+    How an external source (e.g. a playtime importer) names a catalog game, or a title of it to ignore. Titles are stored
+    normalized with `alias_title()`.
+    """
+
+    source_id = models.CharField("Source identifier", max_length=50)
+    title = models.CharField("Title at the source", max_length=255)
+    game = models.ForeignKey(Game, on_delete=models.CASCADE, null=True, default=None, blank=True)
+    ignored = models.BooleanField("Ignored", default=False)
+
+    class Meta:
+        unique_together = (("source_id", "title"),)
+        verbose_name_plural = "Game aliases"
+
+    def __str__(self) -> str:
+        target = "ignored" if self.ignored else self.game.name if self.game else ""
+        return "{}: {} -> {}".format(self.source_id, self.title, target)
+
+    def clean(self) -> None:
+        if self.ignored == (self.game_id is not None):
+            raise ValidationError("An alias must either have a game or be ignored")
+
+    def save(self, *args: Any, **kwargs: Any) -> None:
+        self.title = alias_title(self.title)
+        super().save(*args, **kwargs)
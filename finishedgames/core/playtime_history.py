@@ -0,0 +1,128 @@
+from datetime import date, datetime, timedelta
+from typing import Callable, Dict, Iterable, List, Optional, Tuple, cast  # NOQA: F401
+
+from core.models import PlaytimeHistory
+from django.db import transaction
+from django.db.models import Max, Min, Sum
+from django.utils import timezone
+
+# Sources of the changes not coming from an importer (which use their `SOURCE_ID`)
+SOURCE_WEB = "web"
+SOURCE_FILES = "files"
+# Merged from several sources
+SOURCE_SYNC = "sync"
+
+RESOLUTION_DAY = "day"
+RESOLUTION_MONTH = "month"
+
+# Points updated or deleted per query when compacting
+BATCH_SIZE = 500
+
+# (user id, user game id, previous minutes played, new minutes played)
+PlaytimeChange = Tuple[int, int, int, int]
+
+# Day (or first day of the month) of a point, in the current timezone
+_BUCKETS = {
+    RESOLUTION_DAY: lambda observed_at: timezone.localtime(observed_at).date(),
+    RESOLUTION_MONTH: lambda observed_at: timezone.localtime(observed_at).date().replace(day=1),
+}  # type: Dict[str, Callable[[datetime], date]]
+
+
+def record_playtime_changes(
+    changes: Iterable[PlaytimeChange], source: str, observed_at: Optional[datetime] = None
+) -> List[PlaytimeHistory]:
+    """Bulk creates a point for each change of minutes played, skipping those keeping the same value."""
+    observed_at = observed_at or timezone.now()
+    points = [
+        PlaytimeHistory(
+            user_id=user_id,
+            user_game_id=user_game_id,
+            observed_at=observed_at,
+            minutes_played=minutes_played,
+            minutes_delta=minutes_played - previous_minutes_played,
+            source=source,
+        )
+        for user_id, user_game_id, previous_minutes_played, minutes_played in changes
+        if minutes_played != previous_minutes_played
+    ]
+    if points:
+        PlaytimeHistory.objects.bulk_create(points)
+    return points
+
+
+def monthly_minutes_played(
+    user_id: int, since: Optional[datetime] = None, until: Optional[datetime] = None
+) -> List[Tuple[date, int]]:
+    """
+    Minutes played by a user each month (in the current timezone) with any change, oldest first. The deltas of the
+    points are already the minutes played since the previous one, so each month is a sum over a range of the user
+    index. Grouping by the truncated date would instead convert every point, which is much slower on SQLite.
+    """
+    points = PlaytimeHistory.objects.filter(user_id=user_id)
+    if since is not None:
+        points = points.filter(observed_at__gte=since)
+    if until is not None:
+        points = points.filter(observed_at__lt=until)
+
+    bounds = points.aggregate(first=Min("observed_at"), last=Max("observed_at"))
+    if bounds["first"] is None:
+        return []
+
+    months = []  # type: List[Tuple[date, int]]
+    month_start = bucket_start(bounds["first"], RESOLUTION_MONTH)
+    while month_start <= bounds["last"]:
+        next_month_start = bucket_start(month_start + timedelta(days=32), RESOLUTION_MONTH)
+        minutes = points.filter(observed_at__gte=month_start, observed_at__lt=next_month_start).aggregate(
+            minutes=Sum("minutes_delta")
+        )["minutes"]
+        if minutes is not None:
+            months.append((timezone.localtime(month_start).date(), minutes))
+        month_start = next_month_start
+    return months
+
+
+def bucket_start(observed_at: datetime, resolution: str) -> datetime:
+    """Start of the day or month of a moment, in the current timezone."""
+    start = _BUCKETS[resolution](observed_at)
+    return cast(datetime, timezone.make_aware(datetime(start.year, start.month, start.day)))
+
+
+def compact_playtime_history(resolution: str, before: datetime, after: Optional[datetime] = None) -> Tuple[int, int]:
+    """
+    Merges the points of each user game observed the same day or month (between `after` and `before`) into the last
+    one, which keeps the sum of their deltas, so aggregations give the same totals. Returns the number of merged points
+    and of deleted ones.
+    """
+    bucket = _BUCKETS[resolution]
+    points = PlaytimeHistory.objects.filter(observed_at__lt=before)
+    if after is not None:
+        points = points.filter(observed_at__gte=after)
+
+    # Read fully before writing, as SQLite cursors are not isolated from changes to the table being read
+    merged_points = []  # type: List[PlaytimeHistory]
+    deleted_ids = []  # type: List[int]
+    group_key = None  # type: Optional[Tuple[int, date]]
+    group = []  # type: List[Tuple[int, int]]
+
+    def merge_group() -> None:
+        if len(group) > 1:
+            merged_points.append(PlaytimeHistory(id=group[-1][0], minutes_delta=sum(delta for _, delta in group)))
+            deleted_ids.extend(point_id for point_id, _ in group[:-1])
+
+    rows = points.order_by("user_game_id", "observed_at", "id").values_list(
+        "id", "user_game_id", "observed_at", "minutes_delta"
+    )
+    for point_id, user_game_id, observed_at, minutes_delta in rows.iterator():
+        key = (user_game_id, bucket(observed_at))
+        if key != group_key:
+            merge_group()
+            group_key, group = key, []
+        group.append((point_id, minutes_delta))
+    merge_group()
+
+    with transaction.atomic():
+        PlaytimeHistory.objects.bulk_update(merged_points, ["minutes_delta"], batch_size=BATCH_SIZE)
+        for index in range(0, len(deleted_ids), BATCH_SIZE):
+            PlaytimeHistory.objects.filter(id__in=deleted_ids[index : index + BATCH_SIZE]).delete()
+
+    return len(merged_points), len(deleted_ids)
@@ -0,0 +1,53 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Iterator, Optional, Type, cast
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models import Model
+
+_replica_reads = ContextVar("replica_reads", default=False)  # type: ContextVar[bool]
+
+
+@contextmanager
+def replica_reads() -> Iterator[None]:
+    """Reads of the wrapped code go to the `READ_REPLICA_DATABASE` (if any), until something gets written."""
+    token = _replica_reads.set(True)
+    try:
+        yield
+    finally:
+        _replica_reads.reset(token)
+
+
+class ReadReplicaRouter:
+    """
+    Sends reads inside `replica_reads()` to the `READ_REPLICA_DATABASE`, and everything else (including all writes) to
+    the primary one. Does nothing if there is no replica configured.
+    """
+
+    def db_for_read(self, model: Type[Model], **hints: Any) -> Optional[str]:
+        if settings.READ_REPLICA_DATABASE and _replica_reads.get():
+            return cast(str, settings.READ_REPLICA_DATABASE)
+        return None
+
+    def db_for_write(self, model: Type[Model], **hints: Any) -> Optional[str]:
+        if not settings.READ_REPLICA_DATABASE:
+            return None
+
+        # Read your writes: anything read afterwards in the same context comes from the primary
+        _replica_reads.set(False)
+        # Else Django would write to the database the instance was read from
+        return cast(str, DEFAULT_DB_ALIAS)
+
+    def allow_relation(self, obj1: Model, obj2: Model, **hints: Any) -> Optional[bool]:
+        # Both contain the same data
+        databases = {DEFAULT_DB_ALIAS, settings.READ_REPLICA_DATABASE}
+        if settings.READ_REPLICA_DATABASE and {obj1._state.db, obj2._state.db} <= databases:
+            return True
+        return None
+
+    def allow_migrate(self, db: str, app_label: str, model_name: Optional[str] = None, **hints: Any) -> Optional[bool]:
+        # A copy of the primary, gets migrated when refreshed
+        if settings.READ_REPLICA_DATABASE and db == settings.READ_REPLICA_DATABASE:
+            return False
+        return None
@@ -0,0 +1,40 @@
+from typing import Any, Optional, Set, Union
+
+from core.models import Game, Platform, Tombstone, UserGame, WishlistedUserGame
+from django.db.models.signals import m2m_changed, post_delete
+from django.dispatch import receiver
+from django.utils import timezone
+
+
+@receiver(post_delete, sender=Game)
+@receiver(post_delete, sender=Platform)
+def record_catalog_deletion(sender: Any, instance: Union[Game, Platform], **kwargs: Any) -> None:
+    Tombstone.objects.create(model_name=sender._meta.model_name, object_id=instance.id)
+
+
+@receiver(post_delete, sender=UserGame)
+@receiver(post_delete, sender=WishlistedUserGame)
+def record_user_game_deletion(sender: Any, instance: Union[UserGame, WishlistedUserGame], **kwargs: Any) -> None:
+    # Exports identify user games by their game and platform
+    Tombstone.objects.create(
+        model_name=sender._meta.model_name,
+        object_id=instance.id,
+        user_id=instance.user_id,
+        game_id=instance.game_id,
+        platform_id=instance.platform_id,
+    )
+
+
+# Platforms are part of the exported games, but changing them doesn't save the game
+@receiver(m2m_changed, sender=Game.platforms.through)
+def touch_games_with_changed_platforms(
+    sender: Any, instance: Union[Game, Platform], action: str, reverse: bool, pk_set: Optional[Set[int]], **kwargs: Any
+) -> None:
+    if action in ("post_add", "post_remove") and pk_set:
+        game_ids = pk_set if reverse else {instance.id}
+    elif action == "pre_clear":
+        game_ids = set(instance.game_set.values_list("id", flat=True)) if reverse else {instance.id}
+    else:
+        return
+
+    Game.objects.filter(id__in=game_ids).update(modified_at=timezone.now())
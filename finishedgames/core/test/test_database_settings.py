@@ -0,0 +1,47 @@
+import os
+import tempfile
+
+from django.conf import settings
+from django.db import connection
+from django.db.backends.sqlite3.base import DatabaseWrapper
+from django.test import TestCase
+
+from finishedgames.settings.base import sqlite_options
+
+
+class SQLitePragmasTests(TestCase):
+    def test_pragmas_applied_on_connection(self) -> None:
+        # In-memory test databases support neither WAL nor memory mapping
+        expected_values = {"synchronous": 1, "cache_size": -64000, "temp_store": 2, "busy_timeout": 20000}
+
+        with connection.cursor() as cursor:
+            for name, value in expected_values.items():
+                cursor.execute("PRAGMA {}".format(name))
+                self.assertEqual(cursor.fetchone()[0], value, name)
+                self.assertIn(name, settings.SQLITE_PRAGMAS)
+
+        self.assertEqual(connection.transaction_mode, "IMMEDIATE")
+
+    def test_file_databases_use_wal_memory_mapping_and_overridden_pragmas(self) -> None:
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        settings_dict = dict(
+            connection.settings_dict,
+            NAME=os.path.join(directory.name, "test.sqlite3"),
+            # As settings would override them
+            OPTIONS=sqlite_options({**settings.SQLITE_PRAGMAS, "cache_size": -1000}),
+        )
+        file_connection = DatabaseWrapper(settings_dict, alias="file_test")
+        self.addCleanup(file_connection.close)
+
+        with file_connection.cursor() as cursor:
+            cursor.execute("PRAGMA journal_mode")
+            self.assertEqual(cursor.fetchone()[0], "wal")
+            cursor.execute("PRAGMA mmap_size")
+            self.assertEqual(cursor.fetchone()[0], settings.SQLITE_PRAGMAS["mmap_size"])
+            cursor.execute("PRAGMA cache_size")
+            self.assertEqual(cursor.fetchone()[0], -1000)
+
+    def test_connections_are_persistent(self) -> None:
+        self.assertGreater(settings.DATABASES["default"]["CONN_MAX_AGE"], 0)
+        self.assertTrue(settings.DATABASES["default"]["CONN_HEALTH_CHECKS"])
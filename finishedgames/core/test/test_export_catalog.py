@@ -0,0 +1,131 @@
+import gzip
+import json
+import os
+import sqlite3
+import tempfile
+from datetime import timedelta
+from io import StringIO
+from typing import Any, List
+from unittest import skipUnless
+
+from core.exporters import ZSTD_AVAILABLE
+from core.models import Game, Platform
+from core.test.tests_helpers import create_game, create_platform
+from django.core.management import call_command
+from django.test import TestCase, TransactionTestCase
+from django.utils import timezone
+
+
+class ExportCatalogTests(TestCase):
+    def setUp(self) -> None:
+        self.platform_1 = create_platform()
+        self.platform_2 = create_platform()
+        self.game = create_game(platforms=[self.platform_2, self.platform_1])
+        self.game.upsert_url(display_name="a source", url="https://a.source/game")
+        self.game.save()
+        self.dlc = create_game(platforms=[self.platform_1], dlc_or_expansion=True, parent_game=self.game.id)
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def _export(self, *args: str) -> None:
+        call_command("export_catalog", "--output-dir={}".format(self.directory.name), *args, stdout=StringIO())
+
+    def _path(self, filename: str) -> str:
+        return os.path.join(self.directory.name, filename)
+
+    def _assert_exported_games(self, games: List[Any]) -> None:
+        self.assertEqual(
+            games,
+            [
+                {
+                    "id": self.game.id,
+                    "name": self.game.name,
+                    "publish_date": self.game.publish_date,
+                    "dlc_or_expansion": False,
+                    "platforms": [self.platform_1.id, self.platform_2.id],
+                    "parent_game": None,
+                    "urls": {"a source": "https://a.source/game"},
+                    "name_for_search": self.game.name_for_search,
+                },
+                {
+                    "id": self.dlc.id,
+                    "name": self.dlc.name,
+                    "publish_date": self.dlc.publish_date,
+                    "dlc_or_expansion": True,
+                    "platforms": [self.platform_1.id],
+                    "parent_game": self.game.id,
+                    "urls": {},
+                    "name_for_search": self.dlc.name_for_search,
+                },
+            ],
+        )
+
+    def test_exports_json_arrays_in_chunks(self) -> None:
+        # Each chunk of games and its platforms, the last (empty) chunk and the platforms
+        with self.assertNumQueries(6):
+            self._export("--chunk-size=1")
+
+        with open(self._path("games.json"), "r") as file_handle:
+            self._assert_exported_games(json.load(file_handle))
+        with open(self._path("platforms.json"), "r") as file_handle:
+            self.assertEqual(
+                [platform["id"] for platform in json.load(file_handle)], [self.platform_1.id, self.platform_2.id]
+            )
+
+    def test_exports_compressed_ndjson(self) -> None:
+        self._export("--format=ndjson", "--compress=gzip")
+
+        with gzip.open(self._path("games.ndjson.gz"), "rt") as file_handle:
+            self._assert_exported_games([json.loads(line) for line in file_handle])
+
+    @skipUnless(ZSTD_AVAILABLE, "zstd requires Python 3.14")
+    def test_exports_zstd_compressed(self) -> None:
+        from compression import zstd
+
+        self._export("--compress=zstd")
+
+        with zstd.open(self._path("games.json.zst"), "rt") as file_handle:
+            self._assert_exported_games(json.load(file_handle))
+
+    def test_exports_changes_since_given_time(self) -> None:
+        an_hour_ago = timezone.now() - timedelta(hours=1)
+        Game.objects.update(modified_at=an_hour_ago - timedelta(hours=1))
+        Platform.objects.update(modified_at=an_hour_ago - timedelta(hours=1))
+        deleted_game = create_game(platforms=[self.platform_1])
+        deleted_game_id = deleted_game.id
+        deleted_game.delete()
+        self.game.save()
+
+        self._export("--since={}".format(an_hour_ago.isoformat()))
+
+        with open(self._path("games.json"), "r") as file_handle:
+            self.assertEqual(
+                [(game["id"], game.get("deleted", False)) for game in json.load(file_handle)],
+                [(deleted_game_id, True), (self.game.id, False)],
+            )
+        with open(self._path("platforms.json"), "r") as file_handle:
+            self.assertEqual(json.load(file_handle), [])
+
+
+# SQLite can't attach databases inside transactions
+class ExportCatalogSnapshotTests(TransactionTestCase):
+    def test_exports_sqlite_snapshot_with_indexes(self) -> None:
+        platform = create_platform()
+        game = create_game(platforms=[platform])
+        dlc = create_game(platforms=[platform], dlc_or_expansion=True, parent_game=game.id)
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+
+        call_command("export_catalog", "--format=sqlite", "--output-dir={}".format(directory.name), stdout=StringIO())
+
+        snapshot = sqlite3.connect(os.path.join(directory.name, "catalog.sqlite3"))
+        self.addCleanup(snapshot.close)
+        self.assertEqual(
+            snapshot.execute("SELECT id, name, parent_game_id FROM core_game ORDER BY id").fetchall(),
+            [(game.id, game.name, None), (dlc.id, dlc.name, game.id)],
+        )
+        self.assertEqual(snapshot.execute("SELECT id FROM core_platform").fetchall(), [(platform.id,)])
+        self.assertEqual(snapshot.execute("SELECT COUNT(*) FROM core_game_platforms").fetchone(), (2,))
+        indexes = {row[0] for row in snapshot.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+        self.assertIn("core_game_lower_name_idx", indexes)
+        self.assertEqual(snapshot.execute("SELECT name FROM sqlite_master WHERE name = 'auth_user'").fetchall(), [])
@@ -0,0 +1,73 @@
+import os
+import tempfile
+from io import StringIO
+
+from core.columnar import ColumnarFile
+from core.management.commands.export_play_data import FILENAME
+from core.models import Game, UserGame
+from core.test.tests_helpers import create_game, create_platform, create_user
+from django.core.management import call_command
+from django.test import TestCase
+
+
+class ExportPlayDataTests(TestCase):
+    def setUp(self) -> None:
+        self.platform_1 = create_platform()
+        self.platform_2 = create_platform()
+        self.game = create_game(platforms=[self.platform_1, self.platform_2])
+        self.dlc = create_game(platforms=[self.platform_1])
+        Game.objects.filter(id=self.dlc.id).update(dlc_or_expansion=True, parent_game=self.game, publish_date=2001)
+        self.user_1 = create_user()
+        self.user_2 = create_user()
+        UserGame.objects.create(
+            user=self.user_1, game=self.game, platform=self.platform_1, year_finished=2020, minutes_played=90
+        )
+        UserGame.objects.create(user=self.user_1, game=self.dlc, platform=self.platform_1, currently_playing=True)
+        UserGame.objects.create(
+            user=self.user_2, game=self.game, platform=self.platform_2, abandoned=True, minutes_played=15
+        )
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.filename = os.path.join(self.directory.name, FILENAME)
+
+    def _export(self, *args: str) -> None:
+        call_command("export_play_data", "--output-dir={}".format(self.directory.name), *args, stdout=StringIO())
+
+    def test_exports_columns_of_all_users(self) -> None:
+        self._export("--chunk-size=1")
+
+        with ColumnarFile(self.filename) as play_data:
+            self.assertEqual(play_data.rows, 3)
+            self.assertEqual(play_data.columns["user_id"].tolist(), [self.user_1.id, self.user_1.id, self.user_2.id])
+            self.assertEqual(play_data.columns["game_id"].tolist(), [self.game.id, self.dlc.id, self.game.id])
+            # Unfinished games have a 0 year
+            self.assertEqual(play_data.columns["year_finished"].tolist(), [2020, 0, 0])
+            self.assertEqual(play_data.columns["currently_playing"].tolist(), [0, 1, 0])
+            self.assertEqual(play_data.columns["abandoned"].tolist(), [0, 0, 1])
+            self.assertEqual(sum(play_data.columns["minutes_played"]), 105)
+            self.assertEqual(
+                play_data.columns["game_publish_date"].tolist(), [self.game.publish_date, 2001, self.game.publish_date]
+            )
+            self.assertEqual(play_data.columns["game_dlc_or_expansion"].tolist(), [0, 1, 0])
+            self.assertEqual(
+                play_data.decode("platform"),
+                [self.platform_1.shortname, self.platform_1.shortname, self.platform_2.shortname],
+            )
+            self.assertEqual(
+                play_data.dictionaries["platforms"], [self.platform_1.shortname, self.platform_2.shortname]
+            )
+            self.assertNotIn("game_name", play_data.columns)
+
+    def test_exports_dictionary_encoded_game_names(self) -> None:
+        self._export("--names")
+
+        with ColumnarFile(self.filename) as play_data:
+            self.assertEqual(play_data.columns["game_name"].tolist(), [0, 1, 0])
+            self.assertEqual(play_data.dictionaries["games"], [self.game.name, self.dlc.name])
+
+    def test_rejects_other_files(self) -> None:
+        with open(self.filename, "wb") as file_handle:
+            file_handle.write(b"not columnar data")
+
+        with self.assertRaisesMessage(ValueError, "is not a columnar export"):
+            ColumnarFile(self.filename)
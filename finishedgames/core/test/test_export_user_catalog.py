@@ -0,0 +1,153 @@
+import json
+import os
+import sqlite3
+import tempfile
+from datetime import timedelta
+from io import StringIO
+from typing import Any
+
+from core.managers import CatalogManager
+from core.models import Game, Platform, UserGame, WishlistedUserGame
+from core.test.tests_helpers import create_game, create_platform, create_user
+from django.core.management import call_command
+from django.test import TestCase, TransactionTestCase
+from django.utils import timezone
+
+
+class ExportUserCatalogTests(TestCase):
+    def setUp(self) -> None:
+        self.platform = create_platform()
+        self.user = create_user()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        # The command writes to the current directory
+        self.addCleanup(os.chdir, os.getcwd())
+        os.chdir(directory.name)
+
+    def _read(self, filename: str) -> Any:
+        with open(filename, "r") as file_handle:
+            return json.load(file_handle)
+
+    def test_exports_catalog_games_and_their_parents(self) -> None:
+        base_game = create_game(platforms=[self.platform])
+        expansion = create_game(platforms=[self.platform], dlc_or_expansion=True, parent_game=base_game.id)
+        # Not allowed by the admin form, but imported data can have it
+        expansion_dlc = Game.objects.create(
+            name="an expansion DLC", publish_date=2000, dlc_or_expansion=True, parent_game=expansion
+        )
+        expansion_dlc.platforms.add(self.platform)
+        wishlisted_game = create_game(platforms=[self.platform])
+        create_game(platforms=[self.platform])
+        UserGame.objects.create(user=self.user, game=expansion_dlc, platform=self.platform, year_finished=2020)
+        WishlistedUserGame.objects.create(user=self.user, game=wishlisted_game, platform=self.platform)
+
+        # user, user games, wishlisted games, games (with parents), parents of parents, platforms of games, platforms
+        with self.assertNumQueries(7):
+            call_command("export_user_catalog", self.user.username, stdout=StringIO())
+
+        self.assertEqual(self._read("user.json"), {"id": self.user.id, "username": self.user.username})
+        self.assertEqual(
+            self._read("user_{}_games.json".format(self.user.id)),
+            [
+                {
+                    "game_id": expansion_dlc.id,
+                    "platform_id": self.platform.id,
+                    "currently_playing": False,
+                    "finished": True,
+                    "year_finished": 2020,
+                    "abandoned": False,
+                    "minutes_played": 0,
+                }
+            ],
+        )
+        self.assertEqual(
+            self._read("user_{}_wishlisted_games.json".format(self.user.id)),
+            [{"game_id": wishlisted_game.id, "platform_id": self.platform.id}],
+        )
+        games = self._read("games.json")
+        self.assertEqual(
+            [game["id"] for game in games], [base_game.id, expansion.id, expansion_dlc.id, wishlisted_game.id]
+        )
+        self.assertEqual(games[2]["parent_game"], expansion.id)
+        self.assertEqual(games[2]["platforms"], [self.platform.id])
+        self.assertEqual([platform["id"] for platform in self._read("platforms.json")], [self.platform.id])
+
+    def test_exports_changes_since_given_time(self) -> None:
+        changed_game = create_game(platforms=[self.platform])
+        deleted_game = create_game(platforms=[self.platform])
+        for game in (changed_game, deleted_game):
+            UserGame.objects.create(user=self.user, game=game, platform=self.platform)
+        an_hour_ago = timezone.now() - timedelta(hours=1)
+        for model in (Game, Platform, UserGame):
+            model.objects.update(modified_at=an_hour_ago - timedelta(hours=1))
+        CatalogManager.mark_as_currently_playing(self.user, changed_game.id, self.platform.id)
+        CatalogManager.remove_from_catalog(self.user, deleted_game.id, self.platform.id)
+
+        call_command("export_user_catalog", self.user.username, "--since={}".format(an_hour_ago.isoformat()))
+
+        self.assertEqual(
+            [
+                (user_game["game_id"], user_game.get("deleted", False), user_game.get("currently_playing"))
+                for user_game in self._read("user_{}_games.json".format(self.user.id))
+            ],
+            [(deleted_game.id, True, None), (changed_game.id, False, True)],
+        )
+        self.assertEqual(self._read("user_{}_wishlisted_games.json".format(self.user.id)), [])
+        # The game didn't change, but its user game did
+        self.assertEqual([game["id"] for game in self._read("games.json")], [changed_game.id])
+        self.assertEqual(self._read("platforms.json"), [])
+
+
+# SQLite can't attach databases inside transactions
+class ExportUserCatalogSnapshotTests(TransactionTestCase):
+    def test_exports_sqlite_snapshot_of_user_data(self) -> None:
+        platform = create_platform()
+        user = create_user()
+        user.first_name, user.last_name = "A", "User"
+        user.is_staff = user.is_superuser = True
+        user.last_login = timezone.now()
+        user.save()
+        other_user = create_user()
+        base_game = create_game(platforms=[platform])
+        expansion = create_game(platforms=[platform], dlc_or_expansion=True, parent_game=base_game.id)
+        expansion_dlc = Game.objects.create(
+            name="an expansion DLC", publish_date=2000, dlc_or_expansion=True, parent_game=expansion
+        )
+        expansion_dlc.platforms.add(platform)
+        wishlisted_game = create_game(platforms=[platform])
+        other_game = create_game(platforms=[platform])
+        UserGame.objects.create(
+            user=user, game=expansion_dlc, platform=platform, year_finished=2020, no_longer_owned=True
+        )
+        WishlistedUserGame.objects.create(user=user, game=wishlisted_game, platform=platform)
+        UserGame.objects.create(user=other_user, game=other_game, platform=platform)
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.addCleanup(os.chdir, os.getcwd())
+        os.chdir(directory.name)
+
+        call_command("export_user_catalog", user.username, "--format=sqlite", stdout=StringIO())
+
+        snapshot = sqlite3.connect("user_{}.sqlite3".format(user.id))
+        self.addCleanup(snapshot.close)
+        # Only the id and username, as in the JSON export
+        self.assertEqual(
+            snapshot.execute(
+                "SELECT id, username, password, email, first_name, last_name, is_staff, is_superuser, last_login "
+                "FROM auth_user"
+            ).fetchall(),
+            [(user.id, user.username, "", "", "", "", 0, 0, None)],
+        )
+        self.assertEqual(
+            snapshot.execute("SELECT game_id, year_finished, no_longer_owned FROM core_usergame").fetchall(),
+            [(expansion_dlc.id, 2020, 0)],
+        )
+        self.assertEqual(
+            snapshot.execute("SELECT game_id FROM core_wishlistedusergame").fetchall(), [(wishlisted_game.id,)]
+        )
+        self.assertEqual(
+            snapshot.execute("SELECT id FROM core_game ORDER BY id").fetchall(),
+            [(base_game.id,), (expansion.id,), (expansion_dlc.id,), (wishlisted_game.id,)],
+        )
+        self.assertEqual(snapshot.execute("SELECT COUNT(*) FROM core_game_platforms").fetchone(), (4,))
+        self.assertEqual(snapshot.execute("PRAGMA foreign_key_check").fetchall(), [])
@@ -1,5 +1,11 @@
-from core.models import Game
+from datetime import timedelta
+
+from core.models import Game, Tombstone, UserGame
+from core.test.tests_helpers import create_game, create_platform, create_user
+from django.db import connection
+from django.db.models.functions import Lower
 from django.test import TestCase
+from django.utils import timezone
 
 
 class GameTests(TestCase):
@@ -60,3 +66,43 @@ class GameTests(TestCase):
         game.save()
 
         self.assertEqual(game.name_for_search, expected_searchable_name)
+
+    def test_ordering_by_lowercase_name_uses_index(self) -> None:
+        sql, params = Game.objects.only("id", "name").order_by(Lower("name"))[:10].query.sql_with_params()
+
+        with connection.cursor() as cursor:
+            cursor.execute("EXPLAIN QUERY PLAN {}".format(sql), params)
+            query_plan = " ".join(str(row[-1]) for row in cursor.fetchall())
+
+        self.assertIn("core_game_lower_name_idx", query_plan)
+        self.assertNotIn("TEMP B-TREE", query_plan)
+
+    def test_platform_changes_update_modified_at(self) -> None:
+        platform = create_platform()
+        game = create_game(platforms=[platform])
+        an_hour_ago = timezone.now() - timedelta(hours=1)
+
+        for change_platforms in (lambda: create_platform().game_set.add(game), lambda: game.platforms.clear()):
+            Game.objects.update(modified_at=an_hour_ago)
+
+            change_platforms()
+
+            game.refresh_from_db()
+            self.assertGreater(game.modified_at, an_hour_ago)
+
+    def test_deletions_leave_tombstones(self) -> None:
+        platform = create_platform()
+        game = create_game(platforms=[platform])
+        user = create_user()
+        user_game = UserGame.objects.create(user=user, game=game, platform=platform)
+        game_id = game.id
+
+        game.delete()
+
+        self.assertEqual(
+            set(Tombstone.objects.values_list("model_name", "object_id", "user_id", "game_id", "platform_id")),
+            {
+                ("game", game_id, None, None, None),
+                ("usergame", user_game.id, user.id, game_id, platform.id),
+            },
+        )
@@ -0,0 +1,160 @@
+import json
+import os
+import tempfile
+from io import StringIO
+from typing import Any, List, Tuple
+
+from core.exporters import read_export_file
+from core.models import Game, Platform, UserGame, WishlistedUserGame
+from core.test.tests_helpers import create_game, create_platform, create_user
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+from django.utils import timezone
+
+
+class ImportCatalogTests(TestCase):
+    def setUp(self) -> None:
+        self.platform_1 = create_platform()
+        self.platform_2 = create_platform()
+        # A DLC exported before its parent game
+        self.dlc = create_game(platforms=[self.platform_1])
+        self.game = create_game(platforms=[self.platform_1, self.platform_2])
+        self.game.upsert_url(display_name="a source", url="https://a.source/game")
+        self.game.save()
+        Game.objects.filter(id=self.dlc.id).update(dlc_or_expansion=True, parent_game=self.game)
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def _export(self, *args: str) -> None:
+        call_command("export_catalog", "--output-dir={}".format(self.directory.name), *args, stdout=StringIO())
+
+    def _import(self, *args: str) -> str:
+        output = StringIO()
+        call_command("import_catalog", self.directory.name, *args, stdout=output)
+        return output.getvalue()
+
+    @staticmethod
+    def _catalog() -> Tuple[List[Any], List[Any], List[Any]]:
+        return (
+            list(Platform.objects.order_by("id").values_list("id", "name", "shortname", "publish_date")),
+            list(
+                Game.objects.order_by("id").values_list(
+                    "id", "name", "publish_date", "dlc_or_expansion", "parent_game_id", "urls", "name_for_search"
+                )
+            ),
+            list(
+                Game.platforms.through.objects.order_by("game_id", "platform_id").values_list("game_id", "platform_id")
+            ),
+        )
+
+    def test_restores_export_into_empty_catalog(self) -> None:
+        self._export("--format=ndjson", "--compress=gzip")
+        catalog = self._catalog()
+        Game.objects.all().delete()
+        Platform.objects.all().delete()
+
+        self._import("--chunk-size=1")
+
+        self.assertEqual(self._catalog(), catalog)
+        # New games don't collide with the imported ids
+        self.assertGreater(create_game(platforms=[Platform.objects.first()]).id, self.game.id)
+
+    def test_reads_json_arrays_in_small_reads(self) -> None:
+        self._export()
+        filename = os.path.join(self.directory.name, "games.json")
+        with open(filename, "r") as file_handle:
+            games = json.load(file_handle)
+
+        self.assertEqual(list(read_export_file(filename, read_size=7)), games)
+
+    def test_requires_upsert_if_catalog_not_empty(self) -> None:
+        self._export()
+
+        with self.assertRaisesMessage(CommandError, "use --upsert"):
+            self._import()
+
+    def test_upsert_updates_existing_items_and_sort_names(self) -> None:
+        self._export()
+        catalog = self._catalog()
+        user = create_user()
+        user_game = UserGame.objects.create(user=user, game=self.game, platform=self.platform_1)
+        self.game.name = "a renamed game"
+        self.game.save()
+        self.game.platforms.remove(self.platform_2)
+        self.platform_1.shortname = "a renamed platform"
+        self.platform_1.save()
+        new_game = create_game(platforms=[self.platform_2])
+
+        self._import("--upsert")
+
+        self.assertEqual(self._catalog()[0], catalog[0])
+        self.assertEqual(
+            list(Game.objects.exclude(id=new_game.id).values_list("name", flat=True).order_by("id")),
+            [self.dlc.name, catalog[1][1][1]],
+        )
+        self.assertEqual(set(self.game.platforms.all()), {self.platform_1, self.platform_2})
+        user_game.refresh_from_db()
+        self.assertEqual(user_game.game_sort_name, catalog[1][1][1].lower())
+        self.assertEqual(user_game.platform_sort_name, catalog[0][0][2].lower())
+
+    def test_upsert_skips_games_named_as_another_game(self) -> None:
+        self._export()
+        self.game.delete()
+        create_game(name=self.game.name, platforms=[self.platform_1])
+
+        output = self._import("--upsert")
+
+        self.assertIn("Skipped 2 Games", output)
+        self.assertFalse(Game.objects.filter(id__in=[self.game.id, self.dlc.id]).exists())
+
+    def test_imports_user_catalog(self) -> None:
+        user = create_user()
+        UserGame.objects.create(
+            user=user, game=self.dlc, platform=self.platform_1, year_finished=2020, minutes_played=30
+        )
+        WishlistedUserGame.objects.create(user=user, game=self.game, platform=self.platform_2)
+        # The command writes to the current directory
+        self.addCleanup(os.chdir, os.getcwd())
+        os.chdir(self.directory.name)
+        call_command("export_user_catalog", user.username, stdout=StringIO())
+        Game.objects.all().delete()
+        Platform.objects.all().delete()
+        user.delete()
+
+        self._import()
+
+        user = get_user_model().objects.get(username=user.username)
+        self.assertFalse(user.has_usable_password())
+        self.assertEqual(
+            list(
+                UserGame.objects.filter(user=user).values_list(
+                    "game_id", "platform_id", "year_finished", "minutes_played", "game_sort_name", "platform_sort_name"
+                )
+            ),
+            [(self.dlc.id, self.platform_1.id, 2020, 30, self.dlc.name.lower(), self.platform_1.shortname.lower())],
+        )
+        self.assertEqual(
+            list(WishlistedUserGame.objects.filter(user=user).values_list("game_id", "platform_id")),
+            [(self.game.id, self.platform_2.id)],
+        )
+
+    def test_upsert_applies_delta_exports(self) -> None:
+        since = timezone.now()
+        catalog = self._catalog()
+        self.dlc.delete()
+        self.game.name = "a renamed game"
+        self.game.save()
+        self._export("--since={}".format(since.isoformat()))
+        # Back to the state of the mirror before the changes
+        self.game.name = catalog[1][1][1]
+        self.game.save()
+        Game.objects.create(
+            **dict(zip(["id", "name", "publish_date", "dlc_or_expansion", "parent_game_id"], catalog[1][0]))
+        )
+
+        output = self._import("--upsert")
+
+        self.assertIn("Imported 1 Games (and deleted 1)", output)
+        self.assertEqual(list(Game.objects.values_list("id", "name")), [(self.game.id, "a renamed game")])
@@ -0,0 +1,98 @@
+import os
+import tempfile
+from io import StringIO
+from typing import Dict
+
+from core.models import UserGame
+from core.test.tests_helpers import create_game, create_platform, create_user
+from django.core.management import call_command
+from django.test import TestCase
+
+
+class ImportGamesPlaytimeTests(TestCase):
+    def setUp(self) -> None:
+        self.platform_1 = create_platform()
+        self.platform_2 = create_platform()
+        self.game = create_game(platforms=[self.platform_1, self.platform_2])
+        self.another_game = create_game(platforms=[self.platform_1])
+        self.user = create_user()
+        self.user_game = UserGame.objects.create(
+            user=self.user, game=self.another_game, platform=self.platform_1, minutes_played=30
+        )
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def _write_file(self, filename: str, content: str) -> str:
+        path = os.path.join(self.directory.name, filename)
+        with open(path, "w", encoding="utf-8") as file_handle:
+            file_handle.write(content)
+        return path
+
+    def _import(self, *files: str, additive: bool = False) -> str:
+        output = StringIO()
+        call_command("import_games_playtime", *files, str(self.user.id), additive=additive, stdout=output)
+        return output.getvalue()
+
+    def _minutes_played(self) -> Dict[int, int]:
+        return dict(UserGame.objects.filter(user=self.user).values_list("id", "minutes_played"))
+
+    def test_imports_names_and_times_files(self) -> None:
+        names_file = self._write_file("names.txt", "{}\nunknown game\n".format(self.another_game.name.upper()))
+        times_file = self._write_file("times.txt", "1.5\n2\n")
+        modified_at = self.user_game.modified_at
+
+        output = self._import(names_file, times_file)
+
+        self.assertIn("unknown game : game not found for user", output)
+        self.user_game.refresh_from_db()
+        self.assertEqual(self.user_game.minutes_played, 90)
+        self.assertGreater(self.user_game.modified_at, modified_at)
+
+    def test_does_not_lower_playtime_unless_additive(self) -> None:
+        names_file = self._write_file("names.txt", self.another_game.name)
+        times_file = self._write_file("times.txt", "0.25")
+
+        output = self._import(names_file, times_file)
+        self.assertIn("is greater or equal than 15, skipped", output)
+        self.assertEqual(self._minutes_played(), {self.user_game.id: 30})
+
+        self._import(names_file, times_file, additive=True)
+        self.assertEqual(self._minutes_played(), {self.user_game.id: 30})
+
+        times_file = self._write_file("times.txt", "20")
+        self._import(names_file, times_file, additive=True)
+        self.assertEqual(self._minutes_played(), {self.user_game.id: 50})
+
+    def test_reports_ambiguous_games_and_disambiguates_by_platform(self) -> None:
+        user_game_1 = UserGame.objects.create(user=self.user, game=self.game, platform=self.platform_1)
+        user_game_2 = UserGame.objects.create(user=self.user, game=self.game, platform=self.platform_2)
+        csv_file = self._write_file("playtimes.csv", "name,playtime\n{},1\n".format(self.game.name))
+
+        output = self._import(csv_file)
+
+        self.assertIn("{} : ambiguous, owned on several platforms".format(self.game.name), output)
+        self.assertEqual(self._minutes_played(), {self.user_game.id: 30, user_game_1.id: 0, user_game_2.id: 0})
+
+        tsv_file = self._write_file(
+            "playtimes.tsv",
+            "{}\t2\t{}\n{}\t1\t{}\n".format(
+                self.game.name, self.platform_2.shortname, self.another_game.name, self.platform_2.shortname
+            ),
+        )
+
+        output = self._import(tsv_file)
+
+        self.assertIn(
+            "{} : game not found for user on {}".format(self.another_game.name, self.platform_2.shortname), output
+        )
+        self.assertEqual(self._minutes_played(), {self.user_game.id: 30, user_game_1.id: 0, user_game_2.id: 120})
+
+    def test_updates_with_a_single_query(self) -> None:
+        other_user_game = UserGame.objects.create(user=self.user, game=self.game, platform=self.platform_2)
+        csv_file = self._write_file("playtimes.csv", "{},1\n{},2\n".format(self.another_game.name, self.game.name))
+
+        # Loading the user games, and the bulk update and the playtime history insert inside a savepoint
+        with self.assertNumQueries(5):
+            self._import(csv_file)
+
+        self.assertEqual(self._minutes_played(), {self.user_game.id: 60, other_user_game.id: 120})
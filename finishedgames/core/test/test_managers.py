@@ -1,9 +1,12 @@
+from datetime import timedelta
+
 from core.constants import DLC_DEFAULT_MINUTES_PLAYED
 from core.managers import CatalogManager
 from core.models import UserGame, WishlistedUserGame
 from core.test.tests_helpers import create_game, create_platform, create_user
 from django.core.exceptions import ValidationError
 from django.test import TestCase
+from django.utils import timezone
 
 
 class UserGameTests(TestCase):
@@ -243,3 +246,12 @@ class UserGameTests(TestCase):
         self.user_game.refresh_from_db()
         self.assertTrue(self.user_game.finished)
         self.assertEqual(self.user_game.minutes_played, 0)
+
+    def test_changes_update_modified_at(self) -> None:
+        an_hour_ago = timezone.now() - timedelta(hours=1)
+        UserGame.objects.update(modified_at=an_hour_ago)
+
+        CatalogManager.update_minutes_played(self.user, self.user_game.id, 10)
+
+        self.user_game.refresh_from_db()
+        self.assertGreater(self.user_game.modified_at, an_hour_ago)
@@ -0,0 +1,132 @@
+from datetime import date, datetime, timedelta
+from io import StringIO
+from typing import List, Tuple, cast
+
+from core.managers import CatalogManager
+from core.models import PlaytimeHistory, UserGame
+from core.playtime_history import (
+    RESOLUTION_DAY,
+    RESOLUTION_MONTH,
+    SOURCE_WEB,
+    bucket_start,
+    compact_playtime_history,
+    monthly_minutes_played,
+    record_playtime_changes,
+)
+from core.test.tests_helpers import create_game, create_platform, create_user
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+from django.utils import timezone
+
+
+class PlaytimeHistoryTests(TestCase):
+    def setUp(self) -> None:
+        self.platform = create_platform()
+        self.game = create_game(platforms=[self.platform])
+        self.another_game = create_game(name="Another Game", platforms=[self.platform])
+        self.user = create_user()
+        self.user_game = UserGame.objects.create(user=self.user, game=self.game, platform=self.platform)
+        self.another_user_game = UserGame.objects.create(user=self.user, game=self.another_game, platform=self.platform)
+
+    def _at(self, year: int, month: int, day: int, hour: int = 12) -> datetime:
+        return cast(datetime, timezone.make_aware(datetime(year, month, day, hour)))
+
+    def _record(self, user_game: UserGame, *points: Tuple[datetime, int]) -> None:
+        for observed_at, minutes_played in points:
+            record_playtime_changes(
+                [(self.user.id, user_game.id, user_game.minutes_played, minutes_played)], "test", observed_at
+            )
+            user_game.minutes_played = minutes_played
+
+    def _points(self, user_game: UserGame) -> List[Tuple[datetime, int, int]]:
+        return list(
+            PlaytimeHistory.objects.filter(user_game=user_game)
+            .order_by("observed_at")
+            .values_list("observed_at", "minutes_played", "minutes_delta")
+        )
+
+    def test_records_only_changes(self) -> None:
+        points = record_playtime_changes(
+            [(self.user.id, self.user_game.id, 0, 30), (self.user.id, self.another_user_game.id, 10, 10)], "test"
+        )
+
+        self.assertEqual(len(points), 1)
+        self.assertEqual(PlaytimeHistory.objects.get().minutes_delta, 30)
+
+    def test_updating_minutes_played_records_them(self) -> None:
+        CatalogManager.update_minutes_played(self.user, self.user_game.id, 10)
+        CatalogManager.update_minutes_played(self.user, self.user_game.id, 10)
+        CatalogManager.update_minutes_played(self.user, self.user_game.id, 25)
+
+        self.assertEqual(
+            list(PlaytimeHistory.objects.order_by("id").values_list("minutes_played", "minutes_delta", "source")),
+            [(10, 10, SOURCE_WEB), (25, 15, SOURCE_WEB)],
+        )
+
+    def test_monthly_minutes_played(self) -> None:
+        self._record(
+            self.user_game, (self._at(2025, 1, 5), 60), (self._at(2025, 1, 20), 90), (self._at(2025, 3, 1), 100)
+        )
+        self._record(self.another_user_game, (self._at(2025, 1, 31, 23), 20))
+
+        self.assertEqual(monthly_minutes_played(self.user.id), [(date(2025, 1, 1), 110), (date(2025, 3, 1), 10)])
+        self.assertEqual(monthly_minutes_played(self.user.id, since=self._at(2025, 2, 1)), [(date(2025, 3, 1), 10)])
+        self.assertEqual(monthly_minutes_played(create_user(username="another").id), [])
+
+    def test_compacting_keeps_the_last_point_of_each_period_with_the_sum_of_deltas(self) -> None:
+        self._record(
+            self.user_game,
+            (self._at(2025, 1, 5, 10), 60),
+            (self._at(2025, 1, 5, 20), 90),
+            (self._at(2025, 1, 20), 100),
+            (self._at(2025, 2, 1), 130),
+            (self._at(2025, 2, 1, 18), 150),
+        )
+        self._record(self.another_user_game, (self._at(2025, 1, 5), 20))
+        monthly = monthly_minutes_played(self.user.id)
+
+        self.assertEqual(compact_playtime_history(RESOLUTION_DAY, before=self._at(2025, 2, 1, 0)), (1, 1))
+        self.assertEqual(
+            self._points(self.user_game),
+            [
+                (self._at(2025, 1, 5, 20), 90, 90),
+                (self._at(2025, 1, 20), 100, 10),
+                (self._at(2025, 2, 1), 130, 30),
+                (self._at(2025, 2, 1, 18), 150, 20),
+            ],
+        )
+
+        self.assertEqual(compact_playtime_history(RESOLUTION_MONTH, before=self._at(2025, 3, 1, 0)), (2, 2))
+        self.assertEqual(
+            self._points(self.user_game), [(self._at(2025, 1, 20), 100, 100), (self._at(2025, 2, 1, 18), 150, 50)]
+        )
+        self.assertEqual(self._points(self.another_user_game), [(self._at(2025, 1, 5), 20, 20)])
+        self.assertEqual(monthly_minutes_played(self.user.id), monthly)
+
+    def test_compact_command_downsamples_by_age(self) -> None:
+        now = timezone.now()
+        # Two points of the same month, regardless of the current date
+        month_start = bucket_start(now - timedelta(days=500), RESOLUTION_MONTH)
+        self._record(
+            self.user_game,
+            (now - timedelta(days=800), 10),
+            (month_start + timedelta(days=1), 20),
+            (month_start + timedelta(days=2), 30),
+            (now - timedelta(days=1), 40),
+            (now, 50),
+        )
+        output = StringIO()
+
+        call_command("compact_playtime_history", "--delete-after-days=730", stdout=output)
+
+        self.assertEqual(
+            output.getvalue().strip(), "> 2 points merged into 1 monthly ones, 0 into 0 daily ones, 1 older deleted"
+        )
+        self.assertEqual(
+            [(minutes_played, minutes_delta) for _, minutes_played, minutes_delta in self._points(self.user_game)],
+            [(30, 20), (40, 10), (50, 10)],
+        )
+
+        with self.assertRaises(CommandError):
+            call_command("compact_playtime_history", "--daily-after-days=60", "--monthly-after-days=30")
@@ -0,0 +1,45 @@
+from core.models import Game, UserGame
+from core.routers import ReadReplicaRouter, replica_reads
+from django.test import SimpleTestCase, override_settings
+
+A_REPLICA_DATABASE = "replica"
+
+
+@override_settings(READ_REPLICA_DATABASE=A_REPLICA_DATABASE)
+class ReadReplicaRouterTests(SimpleTestCase):
+    def setUp(self) -> None:
+        self.router = ReadReplicaRouter()
+
+    def test_reads_from_primary_by_default(self) -> None:
+        self.assertIsNone(self.router.db_for_read(Game))
+
+    def test_reads_from_replica_when_enabled(self) -> None:
+        with replica_reads():
+            self.assertEqual(self.router.db_for_read(Game), A_REPLICA_DATABASE)
+        self.assertIsNone(self.router.db_for_read(Game))
+
+    def test_writes_to_primary_and_reads_own_writes(self) -> None:
+        user_game = UserGame()
+        user_game._state.db = A_REPLICA_DATABASE
+
+        with replica_reads():
+            self.assertEqual(self.router.db_for_write(UserGame, instance=user_game), "default")
+            self.assertIsNone(self.router.db_for_read(UserGame))
+
+    def test_allows_relations_between_primary_and_replica(self) -> None:
+        game = Game()
+        game._state.db = A_REPLICA_DATABASE
+        user_game = UserGame()
+        user_game._state.db = "default"
+
+        self.assertTrue(self.router.allow_relation(game, user_game))
+
+    def test_does_not_migrate_replica(self) -> None:
+        self.assertFalse(self.router.allow_migrate(A_REPLICA_DATABASE, "core"))
+        self.assertIsNone(self.router.allow_migrate("default", "core"))
+
+    @override_settings(READ_REPLICA_DATABASE=None)
+    def test_does_nothing_without_replica(self) -> None:
+        with replica_reads():
+            self.assertIsNone(self.router.db_for_read(Game))
+            self.assertIsNone(self.router.db_for_write(Game))
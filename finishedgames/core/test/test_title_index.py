@@ -0,0 +1,70 @@
+from core.models import Game
+from core.test.tests_helpers import create_game, create_platform
+from core.title_index import TitleIndex, TitleMatch, catalog_title_index, format_matches, trigrams
+from django.test import SimpleTestCase, TestCase
+
+
+class TitleIndexTests(SimpleTestCase):
+    def setUp(self) -> None:
+        names = [
+            (1, "The Secret of Monkey Island"),
+            (2, "Monkey Island 2: LeChuck's Revenge"),
+            (3, "The Curse of Monkey Island"),
+            (4, "Loom"),
+            (5, "The Secret of Monkey Island (2009)"),
+        ]
+        self.index = TitleIndex((game_id, name, Game.clean_name_for_search(name)) for game_id, name in names)
+
+    def test_trigrams_of_each_word(self) -> None:
+        self.assertEqual(trigrams("doom ii"), {"  d", " do", "doo", "oom", "om ", "  i", " ii", "ii "})
+
+    def test_returns_the_most_similar_names(self) -> None:
+        matches = self.index.search("Secret of Monkey Islnd", limit=2)
+
+        # Same search name, the oldest game first
+        self.assertEqual(
+            [(match.game_id, match.name) for match in matches],
+            [(1, "The Secret of Monkey Island"), (5, "The Secret of Monkey Island (2009)")],
+        )
+        self.assertEqual(matches[0].score, matches[1].score)
+        self.assertLess(matches[0].score, 1)
+        self.assertEqual(self.index.search("the secret of monkey island!", limit=1)[0].score, 1)
+
+    def test_filters_by_score_and_games(self) -> None:
+        matches = self.index.search("Monkey Island", limit=5, min_score=0.5)
+
+        self.assertEqual({match.game_id for match in matches}, {1, 2, 3, 5})
+        self.assertEqual(
+            self.index.search("Monkey Island", limit=5, min_score=0.5, game_ids={2, 4}),
+            [match for match in matches if match.game_id == 2],
+        )
+        self.assertEqual(self.index.search("Monkey Island", limit=2, min_score=0.5), matches[:2])
+        self.assertEqual(self.index.search("Monkey Island", min_score=1), [])
+        self.assertEqual(self.index.search("Zak McKracken"), [])
+        self.assertEqual(self.index.search(""), [])
+
+    def test_formats_matches(self) -> None:
+        self.assertEqual(format_matches([]), "")
+        self.assertEqual(
+            format_matches([TitleMatch(4, "Loom", 1), TitleMatch(1, "Doom", 0.333)]),
+            ", did you mean: 'Loom' (1.00), 'Doom' (0.33)?",
+        )
+
+
+class CatalogTitleIndexTests(TestCase):
+    def test_is_rebuilt_only_if_the_catalog_changes(self) -> None:
+        platform = create_platform()
+        game = create_game(name="Day of the Tentacle", platforms=[platform])
+        index = catalog_title_index()
+
+        # Only checking the catalog version
+        with self.assertNumQueries(1):
+            self.assertIs(catalog_title_index(), index)
+
+        game.name = "Maniac Mansion: Day of the Tentacle"
+        game.save()
+        index = catalog_title_index()
+        self.assertEqual(index.search("Maniac Mansion Day of the Tentacle", limit=1)[0].game_id, game.id)
+
+        another_game = create_game(name="Full Throttle", platforms=[platform])
+        self.assertEqual(catalog_title_index().search("Full Throtle", limit=1)[0].game_id, another_game.id)
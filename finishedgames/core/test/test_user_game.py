@@ -1,4 +1,4 @@
-from core.models import UserGame
+from core.models import UserGame, WishlistedUserGame
 from core.test.tests_helpers import create_game, create_platform, create_user
 from django.core.exceptions import ValidationError
 from django.test import TestCase
@@ -86,3 +86,44 @@ class UserGameTests(TestCase):
 
         self.assertNotEqual(user_game_1.id, user_game_2.id)
         self.assertNotEqual(user_game_1, user_game_2)
+
+    def test_stores_sort_names_on_creation(self) -> None:
+        game = create_game(name="The Secret of Monkey Island", platforms=[self.platform_1])
+        self.platform_1.shortname = "PC-DOS"
+        self.platform_1.save()
+
+        user_game = UserGame(user=self.user, game=game, platform=self.platform_1)
+        user_game.save()
+
+        user_game.refresh_from_db()
+        self.assertEqual(user_game.game_sort_name, "the secret of monkey island")
+        self.assertEqual(user_game.platform_sort_name, "pc-dos")
+
+    def test_updates_sort_names_when_game_or_platform_is_renamed(self) -> None:
+        user_game = UserGame(user=self.user, game=self.game_1, platform=self.platform_1)
+        user_game.save()
+        wishlisted_user_game = WishlistedUserGame(user=self.user, game=self.game_1, platform=self.platform_2)
+        wishlisted_user_game.save()
+
+        self.game_1.name = "Grim Fandango"
+        self.game_1.save()
+        self.platform_1.shortname = "Win"
+        self.platform_1.save()
+
+        user_game.refresh_from_db()
+        wishlisted_user_game.refresh_from_db()
+        self.assertEqual(user_game.game_sort_name, "grim fandango")
+        self.assertEqual(user_game.platform_sort_name, "win")
+        self.assertEqual(wishlisted_user_game.game_sort_name, "grim fandango")
+
+    def test_updates_sort_names_when_game_changes(self) -> None:
+        another_game = create_game(name="Loom", platforms=[self.platform_1])
+        user_game = UserGame(user=self.user, game=self.game_1, platform=self.platform_1)
+        user_game.save()
+
+        user_game = UserGame.objects.get(id=user_game.id)
+        user_game.game = another_game
+        user_game.save(update_fields=["game"])
+
+        user_game.refresh_from_db()
+        self.assertEqual(user_game.game_sort_name, "loom")
@@ -0,0 +1,139 @@
+import heapq
+import math
+import threading
+from array import array
+from collections import Counter
+from dataclasses import dataclass
+from datetime import datetime  # NOQA: F401
+from typing import Collection, Dict, Iterable, List, Optional, Set, Tuple  # NOQA: F401
+
+from core.models import Game
+from django.db.models import Count, Max
+
+# Defaults of `TitleIndex.search`
+DEFAULT_LIMIT = 3
+# Dice coefficient of the trigrams, from 0 (nothing in common) to 1 (same trigrams)
+DEFAULT_MIN_SCORE = 0.6
+
+# Catalog index of this process and the catalog version (number of games, last modification) it was built from
+_catalog_index = None  # type: Optional[Tuple[Tuple[int, Optional[datetime]], TitleIndex]]
+_catalog_index_lock = threading.Lock()
+
+
+@dataclass(frozen=True)
+class TitleMatch:
+    game_id: int
+    name: str
+    score: float
+
+
+def trigrams(search_name: str) -> Set[str]:
+    """Trigrams of each word of a name cleaned for searches, padded as `pg_trgm` does so starts weight more."""
+    result = set()  # type: Set[str]
+    for word in search_name.split():
+        padded = "  {} ".format(word)
+        result.update(padded[index : index + 3] for index in range(len(padded) - 2))
+    return result
+
+
+class TitleIndex:
+    """
+    In-memory inverted index of the trigrams of game names, to find the most similar ones to a title (e.g. those an
+    importer could not match exactly). Names are scored by counting, for each trigram of the title, the names having
+    it, so only compact arrays of positions are kept per trigram.
+    """
+
+    def __init__(self, games: Iterable[Tuple[int, str, str]]) -> None:
+        """From (game id, name, name for search) tuples."""
+        self.game_ids = array("q")
+        self.names = []  # type: List[str]
+        # Trigrams of each name, for the length filter
+        self.sizes = array("H")
+        self.postings = {}  # type: Dict[str, array]
+
+        for position, (game_id, name, search_name) in enumerate(games):
+            name_trigrams = trigrams(search_name)
+            self.game_ids.append(game_id)
+            self.names.append(name)
+            self.sizes.append(len(name_trigrams))
+            for trigram in name_trigrams:
+                if trigram not in self.postings:
+                    self.postings[trigram] = array("I")
+                self.postings[trigram].append(position)
+
+    @classmethod
+    def from_catalog(cls) -> "TitleIndex":
+        return cls(Game.objects.values_list("id", "name", "name_for_search").iterator(chunk_size=5000))
+
+    def __len__(self) -> int:
+        return len(self.game_ids)
+
+    def search(
+        self,
+        title: str,
+        limit: int = DEFAULT_LIMIT,
+        min_score: float = DEFAULT_MIN_SCORE,
+        game_ids: Optional[Collection[int]] = None,
+    ) -> List[TitleMatch]:
+        """
+        The (at most) `limit` games most similar to the title, best first, optionally only among `game_ids`.
+
+        Names need at least `min_score * (a + b) / 2` trigrams in common to score enough (with `a` and `b` the trigrams
+        of each), and at least `min_score / (2 - min_score) * a` as `b` can't be smaller than that either. So any
+        candidate has one of the `a - that + 1` rarest trigrams of the title.
+        """
+        title_trigrams = trigrams(Game.clean_name_for_search(title))
+        size = len(title_trigrams)
+        if not size or not 0 < min_score <= 1:
+            return []
+
+        min_common = max(math.ceil(min_score / (2 - min_score) * size), 1)
+        rarest_trigrams = sorted(title_trigrams, key=lambda trigram: len(self.postings.get(trigram, ())))
+        prefix_size = size - min_common + 1
+        # Trigrams in common with the title of the candidates (any name with one of the prefix) and of every name,
+        # counted all at once
+        prefix_counts = Counter()  # type: Counter[int]
+        for trigram in rarest_trigrams[:prefix_size]:
+            prefix_counts.update(self.postings.get(trigram, ()))
+        suffix_counts = Counter()  # type: Counter[int]
+        for trigram in rarest_trigrams[prefix_size:]:
+            suffix_counts.update(self.postings.get(trigram, ()))
+
+        min_size = min_score / (2 - min_score) * size
+        max_size = (2 - min_score) / min_score * size
+        matches = []  # type: List[Tuple[float, int]]
+        for position, prefix_count in prefix_counts.items():
+            candidate_size = self.sizes[position]
+            if not min_size <= candidate_size <= max_size:
+                continue
+            if game_ids is not None and self.game_ids[position] not in game_ids:
+                continue
+            score = 2 * (prefix_count + suffix_counts[position]) / (size + candidate_size)
+            if score >= min_score:
+                matches.append((score, position))
+
+        # Ties by the oldest game
+        best = heapq.nsmallest(limit, matches, key=lambda match: (-match[0], self.game_ids[match[1]]))
+        return [TitleMatch(self.game_ids[position], self.names[position], round(score, 3)) for score, position in best]
+
+
+def catalog_title_index() -> TitleIndex:
+    """
+    The index of the whole catalog, built once per process and rebuilt only when games are added, removed or modified
+    (checked with a single aggregation).
+    """
+    global _catalog_index
+
+    aggregation = Game.objects.aggregate(count=Count("id"), last_modified=Max("modified_at"))
+    version = (aggregation["count"], aggregation["last_modified"])  # type: Tuple[int, Optional[datetime]]
+    with _catalog_index_lock:
+        if _catalog_index is None or _catalog_index[0] != version:
+            _catalog_index = (version, TitleIndex.from_catalog())
+        return _catalog_index[1]
+
+
+def format_matches(matches: List[TitleMatch]) -> str:
+    """Suffix for reports of unmatched titles, empty if there are no matches."""
+    if not matches:
+        return ""
+    return ", did you mean: {}?".format(", ".join("'{}' ({:.2f})".format(match.name, match.score) for match in matches))
@@ -6,6 +6,8 @@ ADAPTER_BATCH_SIZE = "batch_size"
 ADAPTER_DISPLAY_NAME = "display_name"
 ADAPTER_USERNAME = "username"
 ADAPTER_USER_ID = "user_id"
+# Mapping of Finished Games user ids to their source user ids
+ADAPTER_USER_IDS = "user_ids"
 
 # Used for filters and the like
 ALL_IDS = "*"
@@ -4,7 +4,7 @@ For the full list of settings and their values, see https://docs.djangoproject.c
 """
 
 import os
-from typing import Dict  # NOQA: F401
+from typing import Dict, Optional  # NOQA: F401
 
 # Build paths inside the project like this: os.path.join(BASE_DIR, ...)
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -42,11 +42,17 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # First so that its total time includes the rest of middlewares. Does nothing unless `REQUEST_TIMING_ENABLED`
+    "web.middleware.RequestTimingMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    # Needs the authenticated user. Does nothing unless `REQUEST_PROFILER_ENABLED`
+    "web.middleware.RequestProfilerMiddleware",
+    # Needs the session and the authenticated user. Does nothing unless `READ_REPLICA_DATABASE`
+    "web.middleware.ReadReplicaMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
@@ -75,7 +81,53 @@ WSGI_APPLICATION = "finishedgames.wsgi.application"
 
 # Database https://docs.djangoproject.com/en/2.2/ref/settings/#databases
 
-DATABASES = {"default": {"ENGINE": "django.db.backends.sqlite3", "NAME": os.path.join(BASE_DIR, "fg-dev.db.sqlite3")}}
+# SQLite performance profile, applied to each new connection. WAL allows readers to keep working while a command (like
+# `fetch_games`) writes, and with it `synchronous=NORMAL` is still safe from corruption.
+# cache_size: negative means KiB instead of pages. busy_timeout: milliseconds to wait for a lock before failing.
+SQLITE_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "cache_size": -64000,
+    "mmap_size": 268435456,
+    "temp_store": "MEMORY",
+    "busy_timeout": 20000,
+}
+
+
+def sqlite_options(pragmas: Dict) -> Dict:
+    return {
+        "init_command": ";".join("PRAGMA {}={}".format(name, value) for name, value in pragmas.items()),
+        # Writing transactions take the lock from the start, instead of failing when upgrading from a read lock
+        "transaction_mode": "IMMEDIATE",
+    }
+
+
+# Built here, so overriding `SQLITE_PRAGMAS` in other settings does not change them. Override instead the `OPTIONS` of
+# the database, e.g. `DATABASES["default"]["OPTIONS"] = sqlite_options({**SQLITE_PRAGMAS, "cache_size": -128000})`
+SQLITE_OPTIONS = sqlite_options(SQLITE_PRAGMAS)
+
+DATABASES = {
+    "default": {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": os.path.join(BASE_DIR, "fg-dev.db.sqlite3"),
+        "OPTIONS": SQLITE_OPTIONS,
+        # Persistent connections, instead of opening one per request (and running the PRAGMAs again)
+        "CONN_MAX_AGE": 600,
+        "CONN_HEALTH_CHECKS": True,
+    }
+}
+
+# Database alias for the catalog sources (fetched platforms and games). Set it to a different database (e.g. another
+# SQLite file) so that fetching games does not lock the one serving the website.
+CATALOG_SOURCES_DATABASE = "default"
+
+# Database alias of a read-only copy of the default database, to serve website reads from. Website writes, the admin
+# and commands (except exports) always use the default one. For SQLite, keep it updated with `refresh_read_replica`.
+READ_REPLICA_DATABASE = None  # type: Optional[str]
+# After writing, reads of the same session come from the default database during this time, to see the changes
+READ_REPLICA_STICKY_SECONDS = 30
+
+DATABASE_ROUTERS = ["catalogsources.routers.CatalogSourcesRouter", "core.routers.ReadReplicaRouter"]
 
 
 # Password validation https://docs.djangoproject.com/en/2.2/ref/settings/#auth-password-validators
@@ -133,3 +185,29 @@ EXTRA_GAME_INFO_BUTTONS = [
 HIDE_GAMES_BUTTON = False
 HIDE_PLATFORMS_BUTTON = False
 HIDE_USERS_BUTTON = False
+
+# If True, responses include `Server-Timing` headers with total, SQL and template rendering times
+REQUEST_TIMING_ENABLED = False
+# If greater than 0 (and request timing is enabled), logs that many slowest queries of each request with their plan
+REQUEST_TIMING_LOG_SLOWEST_QUERIES = 0
+
+# If True, staff users can profile any request adding the `REQUEST_PROFILER_PARAMETER` query string parameter (or the
+# `X-Profile` header), getting a report with the SQL queries, templates rendered and the call tree instead of the page
+REQUEST_PROFILER_ENABLED = False
+REQUEST_PROFILER_PARAMETER = "_profile"
+# If set, reports are instead stored in this folder and the normal response returned
+REQUEST_PROFILER_REPORTS_DIR = None  # type: Optional[str]
+# Amount of functions to include in the profile and call tree sections of the report
+REQUEST_PROFILER_STATS_LIMIT = 60
+
+# GOG Galaxy 2.0 database location by `sys.platform`, for `import_gog_db_game_times` (which also accepts `--db-path`)
+GOG_GALAXY_DB_PATHS = {
+    "darwin": "/Users/Shared/GOG.com/Galaxy/Storage/galaxy-2.0.db",
+    "win32": "C:\\ProgramData\\GOG.com\\Galaxy\\storage\\galaxy-2.0.db",
+}  # type: Dict[str, str]
+
+# Steam owned games (the whole library with playtimes) are cached on disk this long, so fetching the catalog and
+# importing game times back to back only requests them once. Expired entries are re-validated with conditional requests
+STEAM_OWNED_GAMES_CACHE_SECONDS = 6 * 60 * 60
+# Owned games of several Steam accounts (`constants.ADAPTER_USER_IDS`) are fetched with up to this many requests at once
+STEAM_MAX_CONCURRENT_REQUESTS = 4
@@ -1,7 +1,7 @@
 from typing import Any, List, Set, cast
 
 from core.forms import GameForm, PlatformForm
-from core.models import Game, Platform, UserGame, WishlistedUserGame
+from core.models import Game, GameAlias, Platform, UserGame, WishlistedUserGame
 from django.contrib import admin, auth
 from django.db.models.functions import Lower
 from django.forms import ModelForm
@@ -140,12 +140,23 @@ class WishlistedUserGameAdmin(FGModelAdmin):
         return form
 
 
+class GameAliasAdmin(FGModelAdmin):
+    list_display = ["title", "source_id", "game", "ignored"]
+    list_filter = ["source_id", "ignored"]
+    search_fields = ["title", "game__name"]
+    raw_id_fields = ["game"]
+
+    def get_ordering(self, request: HttpRequest) -> List[str]:
+        return ["source_id", "title"]
+
+
 admin.site.unregister(auth.models.User)
 admin.site.register(auth.models.User, CustomUserAdmin)
 admin.site.register(Game, GameAdmin)
 admin.site.register(Platform, PlatformAdmin)
 admin.site.register(UserGame, UserGameAdmin)
 admin.site.register(WishlistedUserGame, WishlistedUserGameAdmin)
+admin.site.register(GameAlias, GameAliasAdmin)
 # Remove the Django 3.1+ sidebar
 admin.site.enable_nav_sidebar = False
 admin.site.site_header = "Finished Games Admin"
@@ -15,23 +15,24 @@ SORT_BY_NO_LONGER_OWNED_DESC = "-notowned"
 SORT_BY_GAME_TIME = "gametime"
 SORT_BY_GAME_TIME_DESC = "-gametime"
 
+# Sort by the denormalized `*_sort_name` columns of user games instead of joined names, so that indexes can be used
 SORT_FIELDS_MAPPING = {
-    SORT_BY_GAME_NAME: ["game__name"],
-    SORT_BY_GAME_NAME_DESC: ["-game__name"],
-    SORT_BY_PLATFORM: ["platform__shortname", "game__name"],
-    SORT_BY_PLATFORM_DESC: ["-platform__shortname", "game__name"],
-    SORT_BY_YEAR: ["year_finished", "game__name"],
-    SORT_BY_YEAR_DESC: ["-year_finished", "game__name"],
-    SORT_BY_FINISHED: ["-year_finished", "game__name"],
-    SORT_BY_FINISHED_DESC: ["year_finished", "game__name"],
-    SORT_BY_ABANDONED: ["-abandoned", "game__name"],
-    SORT_BY_ABANDONED_DESC: ["abandoned", "game__name"],
-    SORT_BY_CURRENTLY_PLAYING: ["-currently_playing", "game__name"],
-    SORT_BY_CURRENTLY_PLAYING_DESC: ["currently_playing", "game__name"],
-    SORT_BY_NO_LONGER_OWNED: ["-no_longer_owned", "game__name"],
-    SORT_BY_NO_LONGER_OWNED_DESC: ["no_longer_owned", "game__name"],
-    SORT_BY_GAME_TIME: ["-minutes_played", "game__name"],
-    SORT_BY_GAME_TIME_DESC: ["minutes_played", "game__name"],
+    SORT_BY_GAME_NAME: ["game_sort_name"],
+    SORT_BY_GAME_NAME_DESC: ["-game_sort_name"],
+    SORT_BY_PLATFORM: ["platform_sort_name", "game_sort_name"],
+    SORT_BY_PLATFORM_DESC: ["-platform_sort_name", "game_sort_name"],
+    SORT_BY_YEAR: ["year_finished", "game_sort_name"],
+    SORT_BY_YEAR_DESC: ["-year_finished", "game_sort_name"],
+    SORT_BY_FINISHED: ["-year_finished", "game_sort_name"],
+    SORT_BY_FINISHED_DESC: ["year_finished", "game_sort_name"],
+    SORT_BY_ABANDONED: ["-abandoned", "game_sort_name"],
+    SORT_BY_ABANDONED_DESC: ["abandoned", "game_sort_name"],
+    SORT_BY_CURRENTLY_PLAYING: ["-currently_playing", "game_sort_name"],
+    SORT_BY_CURRENTLY_PLAYING_DESC: ["currently_playing", "game_sort_name"],
+    SORT_BY_NO_LONGER_OWNED: ["-no_longer_owned", "game_sort_name"],
+    SORT_BY_NO_LONGER_OWNED_DESC: ["no_longer_owned", "game_sort_name"],
+    SORT_BY_GAME_TIME: ["-minutes_played", "game_sort_name"],
+    SORT_BY_GAME_TIME_DESC: ["minutes_played", "game_sort_name"],
 }
 
 PLATFORM_FILTER_ABANDONED = "abandoned"
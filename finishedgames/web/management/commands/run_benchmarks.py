@@ -0,0 +1,375 @@
+import json
+import os
+import statistics
+import tempfile
+import threading
+import time
+from contextlib import ExitStack, nullcontext
+from io import StringIO
+from typing import Any, Callable, Dict, List, Optional, Tuple, cast
+
+from catalogsources.adapters.base_adapter import BaseAdapter
+from catalogsources.management.commands import fetch_games, import_gog_db_game_times, import_steam_game_times
+from catalogsources.management.helpers import TimeProfiler
+from catalogsources.models import FetchedGame
+from core.models import Game, Platform, UserGame
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+from django.db import DEFAULT_DB_ALIAS, connection, connections, router, transaction
+from django.db.models import Count
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from web.urls import urlpatterns
+
+from finishedgames import constants
+
+# Sample value for each url parameter name, filled from the dataset
+URL_PARAMETER_NAMES = ["username", "game_id", "platform_id", "character"]
+
+# Fetched games re-upserted by each write of the mixed load
+MIXED_LOAD_WRITE_BATCH_SIZE = 10
+
+
+class Command(BaseCommand):
+    help = "Benchmarks latency and queries of every website URL and the importers, writing results as JSON"
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument("--output", type=str, default="benchmark_results.json", help="JSON results file")
+        parser.add_argument("--label", type=str, default="", help="Label to identify the run when comparing results")
+        parser.add_argument("--repeat", type=int, default=5, help="Measurements per URL")
+        parser.add_argument("--username", type=str, help="User for user URLs, defaults to the one with more games")
+        parser.add_argument("--importer-items", type=int, default=200, help="Items to process by each importer")
+        parser.add_argument("--skip-urls", action="store_true", default=False)
+        parser.add_argument("--skip-importers", action="store_true", default=False)
+        parser.add_argument(
+            "--mixed-load-seconds",
+            type=int,
+            default=0,
+            help="Seconds to run concurrent user URL reads while 'fetch_games' writes, 0 to skip",
+        )
+        parser.add_argument("--mixed-load-readers", type=int, default=4, help="Concurrent readers of the mixed load")
+
+    def handle(self, *args: Any, **options: Dict) -> None:
+        repeat = max(cast(int, options["repeat"]), 1)
+        importer_items = max(cast(int, options["importer_items"]), 1)
+        output = cast(str, options["output"])
+
+        user = self._get_user(cast(Optional[str], options["username"]))
+        url_parameters = self._get_url_parameters(user)
+
+        results = {
+            "label": cast(str, options["label"]),
+            "date": timezone.now().isoformat(),
+            "database": connection.vendor,
+            "dataset": {
+                "games": Game.objects.count(),
+                "platforms": Platform.objects.count(),
+                "fetched_games": FetchedGame.objects.count(),
+                "users": get_user_model().objects.count(),
+                "user_games": UserGame.objects.count(),
+                "benchmark_user_games": UserGame.objects.filter(user=user).count(),
+            },
+            "urls": [],
+            "importers": [],
+            "mixed_load": None,
+        }  # type: Dict[str, Any]
+
+        if not options["skip_urls"]:
+            self.stdout.write("> Benchmarking URLs")
+            results["urls"] = self._benchmark_urls(user, url_parameters, repeat)
+        if not options["skip_importers"]:
+            self.stdout.write("> Benchmarking importers")
+            results["importers"] = self._benchmark_importers(user, importer_items)
+        mixed_load_seconds = cast(int, options["mixed_load_seconds"])
+        if mixed_load_seconds > 0:
+            self.stdout.write("> Benchmarking mixed load")
+            results["mixed_load"] = self._benchmark_mixed_load(
+                user, url_parameters, mixed_load_seconds, max(cast(int, options["mixed_load_readers"]), 1)
+            )
+
+        with open(output, "w") as file_handle:
+            json.dump(results, file_handle, indent=2)
+
+        self.stdout.write(self.style.SUCCESS("> Results written to {}".format(output)))
+
+    def _get_user(self, username: Optional[str]) -> settings.AUTH_USER_MODEL:
+        users = get_user_model().objects.filter(is_active=True, is_superuser=False)
+        if username:
+            users = users.filter(username=username)
+        user = users.annotate(games_count=Count("usergame")).order_by("-games_count").first()
+        if not user:
+            raise CommandError("No user to benchmark with, generate a dataset with 'generate_synthetic_dataset'")
+        return user
+
+    def _get_url_parameters(self, user: settings.AUTH_USER_MODEL) -> Dict[str, Any]:
+        user_game = UserGame.objects.filter(user=user).order_by("id").first()
+        if not user_game:
+            raise CommandError("User {} has no games to benchmark with".format(user.username))
+
+        return {
+            "username": user.username,
+            "game_id": user_game.game_id,
+            "platform_id": user_game.platform_id,
+            "character": user_game.game_sort_name[:1] or "a",
+        }
+
+    def _benchmark_urls(
+        self, user: settings.AUTH_USER_MODEL, url_parameters: Dict[str, Any], repeat: int
+    ) -> List[Dict]:
+        results = []  # type: List[Dict]
+
+        # The test client uses 'testserver' as host
+        with override_settings(ALLOWED_HOSTS=settings.ALLOWED_HOSTS + ["testserver"]):
+            anonymous_client = Client(raise_request_exception=False)
+            authenticated_client = Client(raise_request_exception=False)
+            authenticated_client.force_login(user)
+
+            for url_name, parameter_names in self._get_web_url_patterns():
+                url = reverse(url_name, kwargs={name: url_parameters[name] for name in parameter_names})
+                for client, authenticated in ((anonymous_client, False), (authenticated_client, True)):
+                    result = self._measure(lambda: client.get(url), repeat)
+                    result.update({"name": url_name, "url": url, "authenticated": authenticated})
+                    results.append(result)
+                    self._write_result("{} {}".format(url, "(authenticated)" if authenticated else ""), result)
+
+        return results
+
+    @staticmethod
+    def _get_web_url_patterns() -> List[Tuple[str, List[str]]]:
+        """Returns (url name, parameter names) of web URLs that can be requested with GET."""
+        patterns = []  # type: List[Tuple[str, List[str]]]
+
+        for pattern in urlpatterns:
+            if not pattern.name:
+                continue
+
+            view_class = getattr(pattern.callback, "view_class", None)
+            if view_class and ("get" not in view_class.http_method_names or not hasattr(view_class, "get")):
+                continue
+
+            parameter_names = list(pattern.pattern.converters.keys())
+            if any(name not in URL_PARAMETER_NAMES for name in parameter_names):
+                continue
+
+            patterns.append((pattern.name, parameter_names))
+
+        return patterns
+
+    def _benchmark_importers(self, user: settings.AUTH_USER_MODEL, items: int) -> List[Dict]:
+        results = []  # type: List[Dict]
+        user_game_names = list(
+            UserGame.objects.filter(user=user).order_by("id").values_list("game__name", flat=True)[:items]
+        )
+        source_ids = list(FetchedGame.objects.order_by().values_list("source_id", flat=True).distinct())
+
+        # Importers require a display name for sources, not configured outside production
+        catalog_sources_adapters = {
+            source_id: {constants.ADAPTER_DISPLAY_NAME: source_id} for source_id in source_ids
+        }  # type: Dict[str, Dict]
+        catalog_sources_adapters.update(settings.CATALOG_SOURCES_ADAPTERS)
+
+        with tempfile.TemporaryDirectory() as directory:
+            names_file = os.path.join(directory, "names.txt")
+            times_file = os.path.join(directory, "times.txt")
+            with open(names_file, "w", encoding="utf-8") as file_handle:
+                file_handle.write("\n".join(user_game_names))
+            with open(times_file, "w", encoding="utf-8") as file_handle:
+                file_handle.write("\n".join("{}".format(index % 100 + 1) for index in range(len(user_game_names))))
+
+            gog_command = import_gog_db_game_times.Command(stdout=StringIO())
+            steam_command = import_steam_game_times.Command(stdout=StringIO())
+            steam_games = list(
+                FetchedGame.objects.filter(source_id=import_steam_game_times.SOURCE_ID, fg_game__isnull=False)
+                .order_by("id")
+                .values_list("name", "source_game_id")[:items]
+            )
+
+            # These two read from GOG Galaxy DB and Steam API, so only benchmark the matching against the catalog
+            def gog_game_times() -> None:
+                gog_command.process_game_times(
+                    [
+                        import_gog_db_game_times.GameTimeData(name, import_gog_db_game_times.PLATFORM_PC, 600)
+                        for name in user_game_names
+                    ],
+                    user.id,
+                )
+
+            def steam_game_times() -> None:
+                steam_command.process_game_times(
+                    [
+                        import_steam_game_times.GameTimeData(
+                            name, import_steam_game_times.PLATFORM_PC, 600, app_id=int(app_id)
+                        )
+                        for name, app_id in steam_games
+                    ],
+                    user.id,
+                )
+
+            importers = [
+                (
+                    "import_fetched_games_without_fg_game",
+                    lambda: call_command("import_fetched_games_without_fg_game", items, stdout=StringIO()),
+                ),
+                ("sync_games", lambda: call_command("sync_games", items, stdout=StringIO())),
+                (
+                    "import_games_playtime",
+                    lambda: call_command("import_games_playtime", names_file, times_file, user.id, stdout=StringIO()),
+                ),
+                ("import_gog_db_game_times", gog_game_times),
+                ("import_steam_game_times", steam_game_times),
+            ]
+
+            with override_settings(CATALOG_SOURCES_ADAPTERS=catalog_sources_adapters):
+                for name, importer in importers:
+                    result = self._measure(importer, repeat=1, rollback=True)
+                    result.update({"name": name, "items": items})
+                    results.append(result)
+                    self._write_result(name, result)
+
+        return results
+
+    def _benchmark_mixed_load(
+        self, user: settings.AUTH_USER_MODEL, url_parameters: Dict[str, Any], seconds: int, readers: int
+    ) -> Dict[str, Any]:
+        """Readers request user URLs while a writer re-upserts fetched games as 'fetch_games' does, so writes
+        compete with reads for the database like when running importers on a live site."""
+        urls = [
+            reverse(url_name, kwargs={name: url_parameters[name] for name in parameter_names})
+            for url_name, parameter_names in self._get_web_url_patterns()
+            if "username" in parameter_names
+        ]
+        fetched_games = list(FetchedGame.objects.prefetch_related("platforms").order_by("id")[:500])
+        if not fetched_games:
+            raise CommandError("No fetched games to write during the mixed load")
+
+        lock = threading.Lock()
+        read_durations = []  # type: List[float]
+        counters = {"read_errors": 0, "writes": 0, "write_errors": 0}
+        deadline = time.perf_counter() + seconds
+
+        def read() -> None:
+            client = Client(raise_request_exception=False)
+            client.force_login(user)
+            durations = []  # type: List[float]
+            errors = 0
+            index = 0
+            try:
+                while time.perf_counter() < deadline:
+                    with TimeProfiler(use_performance_counter=True) as profiler:
+                        response = client.get(urls[index % len(urls)])
+                    durations.append(profiler.duration * 1000)
+                    if response.status_code != 200:
+                        errors += 1
+                    index += 1
+            finally:
+                connections.close_all()
+            with lock:
+                read_durations.extend(durations)
+                counters["read_errors"] += errors
+
+        def write() -> None:
+            output = StringIO()
+            command = fetch_games.Command(stdout=output)
+            command.default_publish_date = BaseAdapter.DEFAULT_PUBLISH_DATE
+            writes = 0
+            index = 0
+            try:
+                while time.perf_counter() < deadline:
+                    batch = []  # type: List[Tuple[FetchedGame, List]]
+                    for fetched_game in fetched_games[index : index + MIXED_LOAD_WRITE_BATCH_SIZE]:
+                        # Unsaved copy, as adapters return them
+                        game = FetchedGame(
+                            name=fetched_game.name,
+                            source_id=fetched_game.source_id,
+                            source_game_id=fetched_game.source_game_id,
+                            source_url=fetched_game.source_url,
+                            publish_date=fetched_game.publish_date,
+                        )
+                        batch.append((game, list(fetched_game.platforms.all())))
+                    command._upsert_results(batch)
+                    writes += len(batch)
+                    index = (index + MIXED_LOAD_WRITE_BATCH_SIZE) % len(fetched_games)
+            finally:
+                connections.close_all()
+            with lock:
+                counters["writes"] += writes
+                # The command reports errors instead of raising them
+                counters["write_errors"] += output.getvalue().count("✗")
+
+        threads = [threading.Thread(target=read) for _ in range(readers)] + [threading.Thread(target=write)]
+        with override_settings(ALLOWED_HOSTS=settings.ALLOWED_HOSTS + ["testserver"]):
+            with TimeProfiler(use_performance_counter=True) as profiler:
+                for thread in threads:
+                    thread.start()
+                for thread in threads:
+                    thread.join()
+
+        read_durations.sort()
+        result = {
+            "seconds": round(profiler.duration, 2),
+            "readers": readers,
+            "reads": len(read_durations),
+            "reads_per_second": round(len(read_durations) / profiler.duration, 2),
+            "read_median_ms": round(statistics.median(read_durations), 2) if read_durations else None,
+            "read_p95_ms": round(read_durations[int(len(read_durations) * 0.95)], 2) if read_durations else None,
+            "read_errors": counters["read_errors"],
+            "writes": counters["writes"],
+            "writes_per_second": round(counters["writes"] / profiler.duration, 2),
+            "write_errors": counters["write_errors"],
+        }  # type: Dict[str, Any]
+        self.stdout.write(
+            "{reads_per_second} reads/s ({read_errors} errors)  {writes_per_second} writes/s ({write_errors} errors)  "
+            "read median {read_median_ms} ms  p95 {read_p95_ms} ms".format(**result)
+        )
+        return result
+
+    @staticmethod
+    def _measure(function: Callable, repeat: int, rollback: bool = False) -> Dict[str, Any]:
+        durations = []  # type: List[float]
+        status_code = None
+        sources_database = router.db_for_write(FetchedGame)
+        # Queries routed to the catalog sources or read replica databases count too
+        aliases = sorted({DEFAULT_DB_ALIAS, sources_database, settings.READ_REPLICA_DATABASE or DEFAULT_DB_ALIAS})
+
+        for _ in range(repeat):
+            with ExitStack() as stack:
+                queries_contexts = {
+                    alias: stack.enter_context(CaptureQueriesContext(connections[alias])) for alias in aliases
+                }
+                # Rolling back keeps the dataset untouched so runs are comparable
+                with transaction.atomic() if rollback else nullcontext():
+                    # Importers also write to the catalog sources, which might be in their own database
+                    with transaction.atomic(using=sources_database) if rollback else nullcontext():
+                        with TimeProfiler(use_performance_counter=True) as profiler:
+                            response = function()
+                        if rollback:
+                            transaction.set_rollback(True, using=sources_database)
+                    if rollback:
+                        transaction.set_rollback(True)
+            durations.append(profiler.duration * 1000)
+            status_code = getattr(response, "status_code", None)
+
+        queries_by_database = {alias: len(context.captured_queries) for alias, context in queries_contexts.items()}
+        return {
+            "status_code": status_code,
+            "queries": sum(queries_by_database.values()),
+            "queries_by_database": queries_by_database,
+            "min_ms": round(min(durations), 2),
+            "median_ms": round(statistics.median(durations), 2),
+            "max_ms": round(max(durations), 2),
+        }
+
+    def _write_result(self, name: str, result: Dict[str, Any]) -> None:
+        line = "{:<70} {:>9.2f} ms {:>6} queries".format(name, result["median_ms"], result["queries"])
+        if len(result["queries_by_database"]) > 1:
+            line += " ({})".format(
+                ", ".join("{}: {}".format(alias, count) for alias, count in result["queries_by_database"].items())
+            )
+        if result["status_code"] and result["status_code"] != 200:
+            self.stdout.write(self.style.WARNING("{} (status {})".format(line, result["status_code"])))
+        else:
+            self.stdout.write(line)
@@ -0,0 +1,287 @@
+import cProfile
+import logging
+import os
+import pstats
+import threading
+import time
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+from io import StringIO
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple  # NOQA: F401
+
+from core.routers import replica_reads
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import DatabaseError, connections
+from django.http import HttpRequest, HttpResponse
+from django.template.base import Template
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.text import slugify
+
+logger = logging.getLogger(__name__)
+
+
+class RequestTimingStats:
+    def __init__(self, keep_queries: bool = False, keep_templates: bool = False) -> None:
+        self.keep_queries = keep_queries
+        self.keep_templates = keep_templates
+        self.queries_count = 0
+        self.db_time = 0.0
+        self.template_time = 0.0
+        self.template_depth = 0
+        # (duration, database alias, sql, params)
+        self.queries = []  # type: List[Tuple[float, str, str, Any]]
+        # [depth, template name, duration], in rendering start order
+        self.templates = []  # type: List[List[Any]]
+
+    def __call__(self, execute: Callable, sql: str, params: Any, many: bool, context: Dict) -> Any:
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - start
+            self.queries_count += 1
+            self.db_time += duration
+            if self.keep_queries and not many:
+                self.queries.append((duration, context["connection"].alias, sql, params))
+
+    @contextmanager
+    def measure(self) -> Iterator["RequestTimingStats"]:
+        """Collects SQL queries of all databases and template renders of the wrapped code."""
+        token = _active_stats.set(_active_stats.get() + (self,))
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(self))
+                yield self
+        finally:
+            _active_stats.reset(token)
+
+    def template_render_started(self, template: Template) -> Optional[List[Any]]:
+        self.template_depth += 1
+        if not self.keep_templates:
+            return None
+        entry = [self.template_depth - 1, template.name or "<unknown>", 0.0]
+        self.templates.append(entry)
+        return entry
+
+    def template_render_finished(self, entry: Optional[List[Any]], duration: float) -> None:
+        self.template_depth -= 1
+        # Includes and inclusion tags render nested templates, total only counts the outermost ones
+        if self.template_depth == 0:
+            self.template_time += duration
+        if entry is not None:
+            entry[2] = duration
+
+
+# Multiple middlewares can be measuring the same request
+_active_stats = ContextVar("request_timing_stats", default=())  # type: ContextVar[Tuple[RequestTimingStats, ...]]
+_original_template_render = None  # type: Optional[Callable]
+
+
+def _timed_template_render(template: Template, context: Any) -> Any:
+    active_stats = _active_stats.get()
+    if not active_stats:
+        return _original_template_render(template, context)  # type: ignore
+
+    entries = [stats.template_render_started(template) for stats in active_stats]
+    start = time.perf_counter()
+    try:
+        return _original_template_render(template, context)  # type: ignore
+    finally:
+        duration = time.perf_counter() - start
+        for stats, entry in zip(active_stats, entries):
+            stats.template_render_finished(entry, duration)
+
+
+def _instrument_template_render() -> None:
+    global _original_template_render
+
+    if _original_template_render is None:
+        _original_template_render = Template.render
+        Template.render = _timed_template_render
+
+
+class RequestTimingMiddleware:
+    """
+    Measures the total time, SQL queries (amount and time) and template rendering time of each request, and sends them
+    as `Server-Timing` headers. If `REQUEST_TIMING_LOG_SLOWEST_QUERIES` is set, also logs that many slowest queries of
+    the request with their query plan.
+    When `REQUEST_TIMING_ENABLED` is False, Django removes the middleware from the chain, so it has no cost.
+    """
+
+    def __init__(self, get_response: Callable) -> None:
+        if not settings.REQUEST_TIMING_ENABLED:
+            raise MiddlewareNotUsed()
+
+        self.get_response = get_response
+        self.log_slowest_queries = settings.REQUEST_TIMING_LOG_SLOWEST_QUERIES
+        _instrument_template_render()
+
+    def __call__(self, request: HttpRequest) -> HttpResponse:
+        stats = RequestTimingStats(keep_queries=self.log_slowest_queries > 0)
+        start = time.perf_counter()
+        with stats.measure():
+            response = self.get_response(request)
+        total_time = time.perf_counter() - start
+
+        response["Server-Timing"] = ", ".join(
+            [
+                "total;dur={:.1f}".format(total_time * 1000),
+                'db;dur={:.1f};desc="{} queries"'.format(stats.db_time * 1000, stats.queries_count),
+                "templates;dur={:.1f}".format(stats.template_time * 1000),
+            ]
+        )
+
+        if stats.queries:
+            self._log_slowest_queries(request, stats)
+
+        return response
+
+    def _log_slowest_queries(self, request: HttpRequest, stats: RequestTimingStats) -> None:
+        slowest_queries = sorted(stats.queries, key=lambda query: query[0], reverse=True)[: self.log_slowest_queries]
+
+        for duration, alias, sql, params in slowest_queries:
+            query_plan = ""
+            if sql.lstrip().upper().startswith("SELECT"):
+                connection = connections[alias]
+                try:
+                    with connection.cursor() as cursor:
+                        cursor.execute("{} {}".format(connection.ops.explain_query_prefix(), sql), params)
+                        query_plan = "\n".join(" ".join(str(value) for value in row) for row in cursor.fetchall())
+                except DatabaseError as error:
+                    query_plan = "Could not explain query: {}".format(error)
+
+            logger.warning(
+                "%s %s slow query (%.1f ms): %s\n%s", request.method, request.path, duration * 1000, sql, query_plan
+            )
+
+
+class RequestProfilerMiddleware:
+    """
+    Allows staff users to profile a request, by adding the `REQUEST_PROFILER_PARAMETER` query string parameter or the
+    `X-Profile` header. The request runs under `cProfile`, and the report (SQL queries, templates rendered and the call
+    tree) replaces the response, or if `REQUEST_PROFILER_REPORTS_DIR` is set, is stored there.
+    Must go after `AuthenticationMiddleware`.
+    """
+
+    HEADER_NAME = "HTTP_X_PROFILE"
+
+    # cProfile cannot run multiple profilers at the same time
+    profiling_lock = threading.Lock()
+
+    def __init__(self, get_response: Callable) -> None:
+        if not settings.REQUEST_PROFILER_ENABLED:
+            raise MiddlewareNotUsed()
+
+        self.get_response = get_response
+        self.parameter = settings.REQUEST_PROFILER_PARAMETER
+        self.reports_dir = settings.REQUEST_PROFILER_REPORTS_DIR
+        self.stats_limit = settings.REQUEST_PROFILER_STATS_LIMIT
+        _instrument_template_render()
+
+    def __call__(self, request: HttpRequest) -> HttpResponse:
+        if not self._must_profile(request) or not self.profiling_lock.acquire(blocking=False):
+            return self.get_response(request)
+
+        try:
+            stats = RequestTimingStats(keep_queries=True, keep_templates=True)
+            profiler = cProfile.Profile()
+            start = time.perf_counter()
+            with stats.measure():
+                profiler.enable()
+                try:
+                    response = self.get_response(request)
+                finally:
+                    profiler.disable()
+            total_time = time.perf_counter() - start
+        finally:
+            self.profiling_lock.release()
+
+        report = self._build_report(request, response, stats, profiler, total_time)
+
+        if not self.reports_dir:
+            return HttpResponse(report, content_type="text/plain; charset=utf-8")
+
+        filename = "{}_{}.txt".format(timezone.now().strftime("%Y%m%d_%H%M%S_%f"), slugify(request.path) or "index")
+        with open(os.path.join(self.reports_dir, filename), "w", encoding="utf-8") as file_handle:
+            file_handle.write(report)
+        response["X-Profile-Report"] = filename
+        return response
+
+    def _must_profile(self, request: HttpRequest) -> bool:
+        if self.parameter not in request.GET and self.HEADER_NAME not in request.META:
+            return False
+        user = getattr(request, "user", None)
+        return bool(user and user.is_authenticated and user.is_staff)
+
+    def _build_report(
+        self,
+        request: HttpRequest,
+        response: HttpResponse,
+        stats: RequestTimingStats,
+        profiler: cProfile.Profile,
+        total_time: float,
+    ) -> str:
+        report = StringIO()
+
+        report.write(
+            "{} {} -> {} in {:.1f} ms\n".format(
+                request.method, request.get_full_path(), response.status_code, total_time * 1000
+            )
+        )
+
+        report.write("\n== SQL: {} queries, {:.1f} ms ==\n".format(stats.queries_count, stats.db_time * 1000))
+        for duration, alias, sql, params in stats.queries:
+            report.write("{:>9.2f} ms [{}] {} {}\n".format(duration * 1000, alias, sql, params))
+
+        report.write("\n== Templates: {:.1f} ms ==\n".format(stats.template_time * 1000))
+        for depth, name, duration in stats.templates:
+            report.write("{:>9.2f} ms {}{}\n".format(duration * 1000, "  " * depth, name))
+
+        profile_stats = pstats.Stats(profiler, stream=report)
+        profile_stats.sort_stats(pstats.SortKey.CUMULATIVE)
+        report.write("\n== Profile: top {} functions by cumulative time ==\n".format(self.stats_limit))
+        profile_stats.print_stats(self.stats_limit)
+        report.write("\n== Call tree ==\n")
+        profile_stats.print_callees(self.stats_limit)
+
+        return report.getvalue()
+
+
+class ReadReplicaMiddleware:
+    """
+    Serves the reads of safe (GET, HEAD, OPTIONS) website requests from the `READ_REPLICA_DATABASE`. Requests of a
+    session that wrote less than `READ_REPLICA_STICKY_SECONDS` ago read from the primary database instead, so that
+    users see their own changes. The admin always uses the primary.
+    Must go after `AuthenticationMiddleware`.
+    """
+
+    SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+    SESSION_KEY = "_read_primary_until"
+
+    def __init__(self, get_response: Callable) -> None:
+        if not settings.READ_REPLICA_DATABASE:
+            raise MiddlewareNotUsed()
+
+        self.get_response = get_response
+        self.sticky_seconds = settings.READ_REPLICA_STICKY_SECONDS
+
+    def __call__(self, request: HttpRequest) -> HttpResponse:
+        if self._can_read_from_replica(request):
+            with replica_reads():
+                return self.get_response(request)
+
+        response = self.get_response(request)
+
+        if request.method not in self.SAFE_METHODS and request.user.is_authenticated:
+            request.session[self.SESSION_KEY] = time.time() + self.sticky_seconds
+
+        return response
+
+    def _can_read_from_replica(self, request: HttpRequest) -> bool:
+        if request.method not in self.SAFE_METHODS or request.path.startswith(reverse("admin:index")):
+            return False
+        # Reading it before enabling the replica, so it comes from the primary
+        return bool(request.session.get(self.SESSION_KEY, 0) < time.time())
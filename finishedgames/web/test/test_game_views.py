@@ -0,0 +1,28 @@
+from typing import List
+
+from core.test.tests_helpers import create_game, create_platform
+from django.test import TestCase
+from django.urls import reverse
+
+
+class GamesStartingWithCharacterViewTests(TestCase):
+    def setUp(self) -> None:
+        platform = create_platform()
+        for name in ["Abe's Oddysee", "abc game", "ABCD", "Abd", "Another game", "B game"]:
+            create_game(name=name, platforms=[platform])
+
+    def _game_names(self, character: str) -> List[str]:
+        response = self.client.get(reverse("games_filtered_by_starting_character", args=[character]))
+        self.assertEqual(response.status_code, 200)
+        return [game.name for game in response.context["games"]]
+
+    def test_lists_games_starting_with_character_ignoring_case(self) -> None:
+        self.assertEqual(self._game_names("A"), ["abc game", "ABCD", "Abd", "Abe's Oddysee", "Another game"])
+
+    def test_lists_games_starting_with_several_characters(self) -> None:
+        self.assertEqual(self._game_names("abc"), ["abc game", "ABCD"])
+
+    def test_redirects_invalid_characters(self) -> None:
+        response = self.client.get(reverse("games_filtered_by_starting_character", args=["ab!"]))
+
+        self.assertRedirects(response, reverse("games"))
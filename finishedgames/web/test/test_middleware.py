@@ -0,0 +1,125 @@
+import os
+import tempfile
+import time
+from typing import Any, Callable, Dict, List  # NOQA: F401
+
+from core.models import UserGame
+from core.routers import _replica_reads
+from core.test.tests_helpers import create_game, create_platform, create_user
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+
+class RequestTimingMiddlewareTests(TestCase):
+    def setUp(self) -> None:
+        self.platform = create_platform()
+        create_game(platforms=[self.platform])
+
+    @override_settings(REQUEST_TIMING_ENABLED=False)
+    def test_no_headers_if_disabled(self) -> None:
+        response = self.client.get(reverse("games_by_platform", args=[self.platform.id]))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("Server-Timing", response)
+
+    @override_settings(REQUEST_TIMING_ENABLED=True)
+    def test_adds_server_timing_headers(self) -> None:
+        response = self.client.get(reverse("games_by_platform", args=[self.platform.id]))
+
+        self.assertEqual(response.status_code, 200)
+        metrics = {metric.split(";")[0]: metric for metric in response["Server-Timing"].split(", ")}
+        self.assertEqual(set(metrics.keys()), {"total", "db", "templates"})
+        # platform, game list and relation count
+        self.assertIn('desc="3 queries"', metrics["db"])
+
+    @override_settings(REQUEST_TIMING_ENABLED=True, REQUEST_TIMING_LOG_SLOWEST_QUERIES=2)
+    def test_logs_slowest_queries_with_query_plan(self) -> None:
+        with self.assertLogs("web.middleware", level="WARNING") as logs:
+            self.client.get(reverse("games_by_platform", args=[self.platform.id]))
+
+        self.assertEqual(len(logs.output), 2)
+        for log_line in logs.output:
+            self.assertIn("slow query", log_line)
+            self.assertIn("SEARCH", log_line)
+
+
+@override_settings(REQUEST_PROFILER_ENABLED=True)
+class RequestProfilerMiddlewareTests(TestCase):
+    def setUp(self) -> None:
+        self.platform = create_platform()
+        self.user = create_user()
+        UserGame.objects.create(user=self.user, game=create_game(platforms=[self.platform]), platform=self.platform)
+        self.url = reverse("user_games", args=[self.user.username])
+
+    def test_non_staff_users_cannot_profile(self) -> None:
+        self.client.force_login(self.user)
+
+        response = self.client.get(self.url, {"_profile": "1"})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTemplateUsed(response, "user/games.html")
+
+    def test_staff_users_get_profile_report(self) -> None:
+        self.user.is_staff = True
+        self.user.save()
+        self.client.force_login(self.user)
+
+        response = self.client.get(self.url, HTTP_X_PROFILE="1")
+
+        self.assertEqual(response["Content-Type"], "text/plain; charset=utf-8")
+        report = response.content.decode()
+        self.assertIn("-> 200 in", report)
+        self.assertIn('FROM "core_usergame"', report)
+        self.assertIn("user/games.html", report)
+        # inclusion tags templates are nested
+        self.assertIn("  templatetags/", report)
+        self.assertIn("authenticated_user_games", report)
+
+    def test_stores_report_if_configured(self) -> None:
+        self.user.is_staff = True
+        self.user.save()
+        self.client.force_login(self.user)
+
+        with tempfile.TemporaryDirectory() as directory:
+            with override_settings(REQUEST_PROFILER_REPORTS_DIR=directory):
+                response = self.client.get(self.url, {"_profile": "1"})
+
+            self.assertTemplateUsed(response, "user/games.html")
+            self.assertEqual(os.listdir(directory), [response["X-Profile-Report"]])
+
+
+# The default database acts as replica of itself, what matters is from which one each request reads
+@override_settings(READ_REPLICA_DATABASE="default")
+class ReadReplicaMiddlewareTests(TestCase):
+    def setUp(self) -> None:
+        self.platform = create_platform()
+        self.game = create_game(platforms=[self.platform])
+        self.user = create_user()
+        self.client.force_login(self.user)
+        self.replica_reads_enabled = []  # type: List[bool]
+
+        def record_replica_reads(execute: Callable, sql: str, params: Any, many: bool, context: Dict) -> Any:
+            self.replica_reads_enabled.append(_replica_reads.get())
+            return execute(sql, params, many, context)
+
+        self.enterContext(connection.execute_wrapper(record_replica_reads))
+
+    def test_reads_from_replica(self) -> None:
+        response = self.client.get(reverse("user_games", args=[self.user.username]))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(True, self.replica_reads_enabled)
+
+    def test_reads_from_primary_after_writing(self) -> None:
+        response = self.client.post(
+            reverse("user_games", args=[self.user.username]),
+            {"user": self.user.id, "game": self.game.id, "platform": self.platform.id},
+        )
+        self.assertEqual(response.status_code, 204)
+        self.assertNotIn(True, self.replica_reads_enabled)
+        self.assertGreater(self.client.session["_read_primary_until"], time.time())
+
+        self.client.get(reverse("user_games", args=[self.user.username]))
+
+        self.assertNotIn(True, self.replica_reads_enabled)
@@ -0,0 +1,82 @@
+from typing import List
+
+from core.models import UserGame, WishlistedUserGame
+from core.test.tests_helpers import create_game, create_platform, create_user
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from web import constants
+
+
+class QueryPlansTests(TestCase):
+    """Ensures list views keep using indexes. SQLite reports a full table (or whole index) walk as `SCAN <table>`."""
+
+    # Tables that grow with users, which should always be searched by user
+    USER_TABLES = ["core_usergame", "core_wishlistedusergame"]
+
+    def setUp(self) -> None:
+        self.user = create_user()
+        self.platform = create_platform()
+        another_platform = create_platform()
+
+        for index in range(5):
+            game = create_game(platforms=[self.platform, another_platform])
+            UserGame.objects.create(
+                user=self.user,
+                game=game,
+                platform=self.platform,
+                currently_playing=index == 0,
+                year_finished=2020 if index == 1 else None,
+                abandoned=index == 2,
+            )
+            WishlistedUserGame.objects.create(user=self.user, game=game, platform=another_platform)
+
+    def test_user_list_views_do_not_scan_user_tables(self) -> None:
+        username = self.user.username
+        urls = [
+            reverse("user_catalog", args=[username]),
+            reverse("user_platforms", args=[username]),
+            reverse("user_games", args=[username]),
+            reverse("user_games_by_platform", args=[username, self.platform.id]),
+            reverse("user_currently_playing_games", args=[username]),
+            reverse("user_finished_games", args=[username]),
+            reverse("user_pending_games", args=[username]),
+            reverse("user_abandoned_games", args=[username]),
+            reverse("user_wishlisted_games", args=[username]),
+        ]
+        sort_options = [
+            constants.SORT_BY_GAME_NAME,
+            constants.SORT_BY_GAME_NAME_DESC,
+            constants.SORT_BY_PLATFORM,
+        ]
+
+        for url in urls:
+            for sort_by in sort_options:
+                self._assert_no_user_tables_scans(url, {"sort_by": sort_by})
+            self._assert_no_user_tables_scans(url, {"exclude": constants.EXCLUDE_ABANDONED})
+            self._assert_no_user_tables_scans(url, {"platform": str(self.platform.id)})
+
+    def _assert_no_user_tables_scans(self, url: str, query_params: dict) -> None:
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url, query_params)
+        self.assertEqual(response.status_code, 200)
+
+        for query in context.captured_queries:
+            sql = query["sql"]
+            if not sql.startswith("SELECT") or not any(table in sql for table in self.USER_TABLES):
+                continue
+            query_plan = self._query_plan(sql)
+            for table in self.USER_TABLES:
+                for step in query_plan:
+                    self.assertFalse(
+                        step.startswith("SCAN {}".format(table)),
+                        "{} {} -> {}\n{}".format(url, query_params, step, sql),
+                    )
+
+    @staticmethod
+    def _query_plan(sql: str) -> List[str]:
+        # captured queries already have the parameters interpolated
+        with connection.cursor() as cursor:
+            cursor.execute("EXPLAIN QUERY PLAN {}".format(sql))
+            return [str(row[-1]) for row in cursor.fetchall()]
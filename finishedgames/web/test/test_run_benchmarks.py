@@ -0,0 +1,52 @@
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+
+class RunBenchmarksTests(TestCase):
+    def test_writes_results_of_urls_and_importers(self) -> None:
+        call_command(
+            "generate_synthetic_dataset",
+            "--users=1",
+            "--platforms=3",
+            "--games=30",
+            "--sources",
+            "steam",
+            "--fetched-games=10",
+            "--user-games=10",
+            "--wishlisted-games=2",
+            stdout=StringIO(),
+        )
+
+        with tempfile.TemporaryDirectory() as directory:
+            output = os.path.join(directory, "results.json")
+            call_command(
+                "run_benchmarks", "--output={}".format(output), "--repeat=1", "--importer-items=5", stdout=StringIO()
+            )
+            with open(output, "r") as file_handle:
+                results = json.load(file_handle)
+
+        self.assertEqual(results["dataset"]["benchmark_user_games"], 10)
+        url_names = {result["name"] for result in results["urls"]}
+        self.assertIn("user_games", url_names)
+        self.assertIn("games_by_platform", url_names)
+        # POST only views are not benchmarked
+        self.assertNotIn("user_game_time", url_names)
+        for result in results["urls"]:
+            self.assertEqual(result["status_code"], 200, result["url"])
+            # A single database configured
+            self.assertEqual(result["queries_by_database"], {"default": result["queries"]})
+        self.assertEqual(
+            [result["name"] for result in results["importers"]],
+            [
+                "import_fetched_games_without_fg_game",
+                "sync_games",
+                "import_games_playtime",
+                "import_gog_db_game_times",
+                "import_steam_game_times",
+            ],
+        )
@@ -5,6 +5,7 @@ from urllib.parse import quote_plus
 from core.models import Game, Platform, UserGame
 from django.conf import settings
 from django.core.paginator import Paginator
+from django.db.models import Exists, OuterRef
 from django.db.models.functions import Lower
 from django.http import HttpRequest, HttpResponse, HttpResponseRedirect
 from django.shortcuts import get_object_or_404, render
@@ -48,9 +49,17 @@ class GamesByPlatformView(View):
     def get(self, request: HttpRequest, platform_id: int, *args: Any, **kwargs: Any) -> HttpResponse:
         platform = get_object_or_404(Platform, pk=platform_id)
 
-        games = Game.objects.only("id", "name").filter(platforms__id=platform_id).order_by(Lower("name"))
+        # Filtering with EXISTS instead of joining lets SQLite walk the `Lower("name")` index in order and stop at the
+        # page limit, instead of sorting every game of the platform
+        games = (
+            Game.objects.only("id", "name")
+            .filter(Exists(Game.platforms.through.objects.filter(game_id=OuterRef("pk"), platform_id=platform_id)))
+            .order_by(Lower("name"))
+        )
 
         paginator = Paginator(games, settings.PAGINATION_ITEMS_PER_PAGE)
+        # Counting the relation rows alone is an index-only lookup, much cheaper than counting the EXISTS queryset
+        paginator.count = Game.platforms.through.objects.filter(platform_id=platform_id).count()
         page_number = request.GET.get("page", 1)
         games = paginator.get_page(page_number)
 
@@ -88,12 +97,18 @@ class GamesStartingWithCharacterView(View):
             return HttpResponseRedirect(reverse("games"))
 
         if character == constants.CHARACTER_FILTER_NON_ALPHANUMERIC:
-            all_games = Game.objects.only("id", "name").order_by(Lower("name"))
-            # Non-optimal but ORM doesn't easily supports substring operations to build a complex filter
             # This will have more values as games starting with other non-alphanumeric appear in the main catalog
-            games = [game for game in all_games if game.name.startswith(".")]
+            games = Game.objects.only("id", "name").filter(name__startswith=".").order_by(Lower("name"))
         else:
-            games = Game.objects.only("id", "name").filter(name__istartswith=character).order_by(Lower("name"))
+            # Same as `name__istartswith` but expressed as a range over `Lower("name")`, so it uses the index both for
+            # filtering and ordering. Validation allows longer prefixes (e.g. "abc"), the range ends after the last one
+            prefix_end = character[:-1] + chr(ord(character[-1]) + 1)
+            games = (
+                Game.objects.only("id", "name")
+                .alias(lower_name=Lower("name"))
+                .filter(lower_name__gte=character, lower_name__lt=prefix_end)
+                .order_by("lower_name")
+            )
 
         paginator = Paginator(games, settings.PAGINATION_ITEMS_PER_PAGE)
         page_number = request.GET.get("page", 1)
@@ -6,7 +6,7 @@ from django.shortcuts import get_object_or_404, render
 
 def platform_details(request: HttpRequest, platform_id: int) -> HttpResponse:
     platform = get_object_or_404(Platform, pk=platform_id)
-    platform_games_count = Game.objects.filter(platforms__id=platform_id).count()
+    platform_games_count = Game.platforms.through.objects.filter(platform_id=platform_id).count()
 
     context = {"platform": platform, "platform_games_count": platform_games_count}
     return render(request, "platform_details.html", context)
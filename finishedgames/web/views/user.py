@@ -6,6 +6,7 @@ from core.models import Platform, UserGame, WishlistedUserGame
 from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.core.paginator import Paginator
+from django.db.models import Count, Q, Sum
 from django.db.models.functions import Lower
 from django.db.models.query import QuerySet
 from django.http import Http404, HttpRequest, HttpResponse, HttpResponseRedirect
@@ -16,6 +17,13 @@ from django.views import View
 from web import constants
 from web.decorators import authenticated_user_games, viewed_user
 
+PROGRESS_COUNTERS = {
+    "games_count": Count("id"),
+    "currently_playing_games_count": Count("id", filter=Q(currently_playing=True)),
+    "finished_games_count": Count("id", filter=Q(year_finished__isnull=False, abandoned=False)),
+    "abandoned_games_count": Count("id", filter=Q(abandoned=True)),
+}
+
 
 def progress_bar_class(progress: int) -> str:
     # Leaving "bad" colors for low thresholds, as in general users will have high % of catalog unfinished
@@ -59,11 +67,12 @@ def filter_and_exclude_games(user_games: QuerySet, request: HttpRequest) -> Tupl
 
 
 def calculate_progress_counters(unfiltered_user_games: QuerySet) -> Tuple[int, int, int, int, int, int, int]:
-    # counters use unfiltered list
-    unfiltered_games_count = unfiltered_user_games.count()
-    currently_playing_games_count = unfiltered_user_games.filter(currently_playing=True).count()
-    finished_games_count = unfiltered_user_games.exclude(year_finished__isnull=True).exclude(abandoned=True).count()
-    abandoned_games_count = unfiltered_user_games.filter(abandoned=True).count()
+    # counters use unfiltered list, all calculated in a single query
+    counters = unfiltered_user_games.order_by().aggregate(**PROGRESS_COUNTERS)
+    unfiltered_games_count = counters["games_count"]
+    currently_playing_games_count = counters["currently_playing_games_count"]
+    finished_games_count = counters["finished_games_count"]
+    abandoned_games_count = counters["abandoned_games_count"]
     completed_games_count = finished_games_count + abandoned_games_count
     pending_games_count = unfiltered_games_count - completed_games_count
     if unfiltered_games_count > 0:
@@ -102,16 +111,14 @@ def catalog(request: HttpRequest, username: str) -> HttpResponse:
 
     all_user_games = UserGame.objects.filter(user=viewed_user)
 
-    user_games = all_user_games.order_by("-id").select_related("game", "platform")
-    user_games_count = len(user_games)
-    # trying to use ORM's distinct() causes an extra query and always leaves usergame.id
-    user_platform_ids = [user_game.platform_id for user_game in user_games]
-    user_platform_ids = sorted(set(user_platform_ids))  # remove duplicates
-    user_platforms_count = Platform.objects.filter(id__in=user_platform_ids).count()
+    # Resetting the ordering allows distinct() to only consider the platform, and it is served from the user index
+    user_platforms_count = all_user_games.order_by().values("platform_id").distinct().count()
 
-    currently_playing_games_count = all_user_games.filter(currently_playing=True).count()
-    finished_games_count = all_user_games.exclude(year_finished__isnull=True).exclude(abandoned=True).count()
-    abandoned_games_count = all_user_games.filter(abandoned=True).count()
+    counters = all_user_games.order_by().aggregate(**PROGRESS_COUNTERS, total_minutes_played=Sum("minutes_played"))
+    user_games_count = counters["games_count"]
+    currently_playing_games_count = counters["currently_playing_games_count"]
+    finished_games_count = counters["finished_games_count"]
+    abandoned_games_count = counters["abandoned_games_count"]
     completed_games_count = finished_games_count + abandoned_games_count
     pending_games_count = user_games_count - completed_games_count
     if user_games_count > 0:
@@ -120,8 +127,7 @@ def catalog(request: HttpRequest, username: str) -> HttpResponse:
         completed_games_progress = 0
     wishlisted_games_count = WishlistedUserGame.objects.filter(user=viewed_user).count()
 
-    total_minutes_played = sum(user_game.minutes_played for user_game in all_user_games)
-    total_hours_played = total_minutes_played / 60.0
+    total_hours_played = (counters["total_minutes_played"] or 0) / 60.0
 
     if request.user.is_authenticated and request.user == viewed_user:
         options_auto_exclude = request.COOKIES.get(constants.USER_OPTIONS_EXCLUDE_COOKIE_NAME, None) is not None
@@ -150,10 +156,8 @@ def catalog(request: HttpRequest, username: str) -> HttpResponse:
 def platforms(request: HttpRequest, username: str) -> HttpResponse:
     viewed_user = get_object_or_404(get_user_model(), username=username)
 
-    user_games = UserGame.objects.filter(user=viewed_user)
-    # trying to use ORM's distinct() causes an extra query and always leaves usergame.id
-    user_platform_ids = [user_game.platform_id for user_game in user_games]
-    user_platform_ids = sorted(set(user_platform_ids))  # remove duplicates
+    # Subquery instead of loading all user games to collect their platform ids
+    user_platform_ids = UserGame.objects.filter(user=viewed_user).order_by().values("platform_id")
     user_platforms = Platform.objects.filter(id__in=user_platform_ids).order_by(Lower("name"))
 
     context = {
@@ -364,9 +368,8 @@ class GamesPendingView(View):
         if not viewed_user:
             raise Http404("Invalid URL")
 
-        queryset = (
-            UserGame.objects.filter(user=viewed_user).exclude(year_finished__isnull=False).exclude(abandoned=True)
-        )
+        # Conditions must match `core_ug_pending_sort_idx`, SQLite does not consider it for the `exclude()` equivalent
+        queryset = UserGame.objects.filter(user=viewed_user, year_finished__isnull=True, abandoned=False)
 
         platform_filter = request.GET.get("platform")
         if platform_filter is not None:
@@ -402,7 +405,7 @@ class GamesFinishedView(View):
         if not viewed_user:
             raise Http404("Invalid URL")
 
-        queryset = UserGame.objects.filter(user=viewed_user).exclude(year_finished__isnull=True)
+        queryset = UserGame.objects.filter(user=viewed_user, year_finished__isnull=False)
 
         platform_filter = request.GET.get("platform")
         if platform_filter is not None: